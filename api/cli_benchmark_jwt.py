@@ -0,0 +1,61 @@
+import argparse
+import time
+
+from src.config import app_config
+from src.services.auth import get_signing_key, get_verification_key
+from src.services.jwt_backend import jwt_backends, create_jwt_backend, validate_claims
+
+
+def measure(fn, iterations: int) -> float:
+    """Get operations per second of fn"""
+    started_at = time.perf_counter()
+
+    for _ in range(iterations):
+        fn()
+
+    return iterations / (time.perf_counter() - started_at)
+
+
+def benchmark_jwt():
+    try:
+        # Setup args
+        parser = argparse.ArgumentParser(description="Compare encode/decode speed of JWT backends.")
+        parser.add_argument("--iterations", help="Operations measured per backend.", type=int, default=5000)
+
+        args = parser.parse_args()
+
+        algorithm = app_config.JWT_ALGORITHM
+        signing_key, headers = get_signing_key()
+
+        now = int(time.time())
+        payload = {
+            "sub": "1",
+            "iat": now,
+            "exp": now + 900,
+            "jti": "benchmark",
+            "ep": 0,
+            "rid": 1,
+            "rv": 1,
+            "caps": ["read_user", "update_user"],
+        }
+
+        print(f"Algorithm {algorithm}, {args.iterations} iterations")
+
+        for name in jwt_backends:
+            try:
+                backend = create_jwt_backend(name, algorithm)
+                token = backend.encode(payload, signing_key, algorithm=algorithm, headers=headers)
+                verification_key = get_verification_key(token)
+            except Exception as e:
+                print(f"{name:>8}: unavailable ({e})")
+                continue
+
+            encode_ops = measure(lambda: backend.encode(payload, signing_key, algorithm=algorithm, headers=headers), args.iterations)
+            decode_ops = measure(lambda: validate_claims(backend.decode(token, verification_key, algorithm=algorithm)), args.iterations)
+
+            print(f"{name:>8}: encode {encode_ops:>10,.0f} ops/sec, decode {decode_ops:>10,.0f} ops/sec")
+    except Exception as e:
+        print(f"An unexpected error occurred: {e}")
+
+
+benchmark_jwt()
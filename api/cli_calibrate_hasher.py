@@ -0,0 +1,90 @@
+import argparse
+import os
+import time
+
+from src.config import app_config
+from src.services.hashers import ScryptHasher, create_hasher
+
+
+# Cost parameter raised by the calibration of each hasher
+COST_PARAMS = {
+    "bcrypt": ("rounds", "BCRYPT_ROUNDS", 4, 20),
+    "scrypt": ("log_n", "SCRYPT_LOG_N", 10, 22),
+    "argon2id": ("time_cost", "ARGON2_TIME_COST", 1, 20),
+}
+
+
+def get_memory_bytes(algorithm: str, cost: int) -> int:
+    """Get memory used by one hash at cost, bcrypt uses a few KiB only"""
+    if algorithm == "scrypt":
+        return ScryptHasher.memory_bytes(log_n=cost, r=app_config.SCRYPT_R)
+
+    if algorithm == "argon2id":
+        return app_config.ARGON2_MEMORY_COST * 1024
+
+    return 0
+
+
+def measure(hasher, samples: int) -> float:
+    """Get median time in ms to hash a password"""
+    timings = []
+
+    for _ in range(samples):
+        started_at = time.perf_counter()
+        hasher.hash("calibration-password")
+        timings.append((time.perf_counter() - started_at) * 1000)
+
+    return sorted(timings)[len(timings) // 2]
+
+
+def calibrate_hasher():
+    try:
+        # Setup args
+        parser = argparse.ArgumentParser(description="Pick password hasher cost for a target latency on this machine.")
+        parser.add_argument("--algorithm", help="Hasher to calibrate.", choices=COST_PARAMS.keys(), default=app_config.PASSWORD_HASHER)
+        parser.add_argument("--target-ms", help="Target hashing time in milliseconds.", type=float, default=250)
+        parser.add_argument("--samples", help="Hashes measured per cost.", type=int, default=3)
+        parser.add_argument("--memory-budget-mb", help="Memory all concurrent hashes may use.", type=int, default=app_config.HASH_MEMORY_BUDGET_MB)
+
+        args = parser.parse_args()
+
+        param, env_name, cost, max_cost = COST_PARAMS[args.algorithm]
+        chosen = None
+
+        # Every pool worker may hash at the same time
+        workers = app_config.HASH_POOL_WORKERS or os.cpu_count() or 1
+        memory_limit = args.memory_budget_mb * 1024 * 1024 // workers
+
+        print(f"Memory limit per hash: {memory_limit // (1024 * 1024)} MiB ({args.memory_budget_mb} MiB / {workers} workers)")
+
+        # Raise cost until hashing takes at least the target time
+        while cost <= max_cost:
+            memory = get_memory_bytes(args.algorithm, cost)
+
+            if memory > memory_limit:
+                print(f"{param}={cost}: needs {memory // (1024 * 1024)} MiB per hash, over the memory limit")
+                break
+
+            elapsed = measure(create_hasher(args.algorithm, **{param: cost}), samples=args.samples)
+            print(f"{param}={cost}: {elapsed:.1f} ms")
+
+            if elapsed > args.target_ms and chosen is not None:
+                break
+
+            chosen = cost
+
+            if elapsed >= args.target_ms:
+                break
+
+            cost += 1
+
+        if chosen is None:
+            print(f"No {param} of {args.algorithm} fits the memory limit, raise --memory-budget-mb or lower the memory cost")
+            return
+
+        print(f"Set {env_name}={chosen} for {args.algorithm} (target {args.target_ms:.0f} ms)")
+    except Exception as e:
+        print(f"An unexpected error occurred: {e}")
+
+
+calibrate_hasher()
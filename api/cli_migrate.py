@@ -0,0 +1,21 @@
+from src.db import engine
+from src.db.migrations import run_migrations
+
+
+def migrate_app():
+    try:
+        with engine.connect() as connection:
+            # Run pending migrations
+            executed = run_migrations(connection=connection)
+
+        # Print migrated message
+        if executed:
+            for migration_id in executed:
+                print(f"Migration {migration_id} applied")
+        else:
+            print("No pending migrations")
+    except Exception as e:
+        print(f"An unexpected error occurred: {e}")
+
+
+migrate_app()
@@ -0,0 +1,30 @@
+from src.db import engine
+from src.db.partitions import (
+    is_auth_tokens_partitioned,
+    create_future_partitions,
+    drop_expired_partitions,
+)
+
+
+def maintain_partitions():
+    try:
+        # Partitions are created and dropped in separate transactions
+        with engine.connect() as connection:
+            if not is_auth_tokens_partitioned(connection=connection):
+                print("Table auth_tokens is not partitioned, set AUTH_TOKENS_PARTITIONED=true before install")
+                return
+
+            # Create partitions for upcoming refresh tokens
+            for name in create_future_partitions(connection=connection):
+                print(f"Partition {name} created")
+
+            # Drop partitions of expired refresh tokens
+            for name in drop_expired_partitions(connection=connection):
+                print(f"Partition {name} dropped")
+
+        print("Partitions are up to date")
+    except Exception as e:
+        print(f"An unexpected error occurred: {e}")
+
+
+maintain_partitions()
@@ -0,0 +1,39 @@
+import argparse
+
+from src.config import app_config
+from src.services.reaper import reap_expired_tokens
+
+
+def reap_tokens():
+    try:
+        # Setup args
+        parser = argparse.ArgumentParser(description="Delete expired refresh tokens and one-time codes.")
+        parser.add_argument("--batch-size", help="Tokens deleted per batch.", type=int, default=app_config.REAPER_BATCH_SIZE)
+        parser.add_argument("--time-budget", help="Maximum run time in seconds.", type=float, default=app_config.REAPER_TIME_BUDGET)
+
+        args = parser.parse_args()
+
+        result = reap_expired_tokens(
+            batch_size=args.batch_size,
+            time_budget=args.time_budget,
+        )
+
+        # Print result message
+        if result is None:
+            print("Reaper is running on another worker")
+            return
+
+        for name in result["created_partitions"]:
+            print(f"Partition {name} created")
+
+        for name in result["dropped_partitions"]:
+            print(f"Partition {name} dropped")
+
+        print(f"{result['deleted_count']} expired tokens removed in {result['batches']} batches ({result['duration_ms']} ms)")
+        print(f"{result['deleted_codes']} expired codes removed")
+        print(f"{result['deleted_revoked_tokens']} expired revoked token ids removed")
+    except Exception as e:
+        print(f"An unexpected error occurred: {e}")
+
+
+reap_tokens()
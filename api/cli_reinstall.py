@@ -3,8 +3,11 @@ import argparse
 from importlib import import_module
 
 from startup import registered_modules
-from src.db import DB
-from src.db.schema import QUERY_DROP_TABLES, QUERY_CREATE_TABLES, QUERY_INSERT_DATA
+from src.config import app_config
+from src.db import DB, engine
+from src.db.migrations import mark_all_migrations_applied
+from src.db.partitions import create_future_partitions
+from src.db.schema import get_create_auth_tokens_table_query, QUERY_DROP_TABLES, QUERY_CREATE_TABLES, QUERY_INSERT_DATA
 
 
 def reinstall_app():
@@ -30,9 +33,18 @@ def reinstall_app():
             DB.execute(
                 QUERY_DROP_TABLES
                 + QUERY_CREATE_TABLES
+                + get_create_auth_tokens_table_query()
                 + QUERY_INSERT_DATA
             )
 
+            # Fresh tables already have the latest schema
+            with engine.connect() as connection:
+                mark_all_migrations_applied(connection=connection)
+                connection.commit()
+
+                if app_config.AUTH_TOKENS_PARTITIONED:
+                    create_future_partitions(connection=connection)
+
             # Reinstall all registered module
             for module in registered_modules:
                 import_module(f"modules.{module}.cli_reinstall")
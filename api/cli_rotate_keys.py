@@ -0,0 +1,32 @@
+import argparse
+
+from src.config import app_config
+from src.services.keyring import jwt_keyring, is_asymmetric_algorithm
+
+
+def rotate_keys():
+    try:
+        # Setup args
+        parser = argparse.ArgumentParser(description="Rotate JWT signing keys.")
+        parser.add_argument("--prune-only", help="Only remove expired retired keys.", action="store_true")
+
+        args = parser.parse_args()
+
+        if not is_asymmetric_algorithm(app_config.JWT_ALGORITHM):
+            print(f"Algorithm {app_config.JWT_ALGORITHM} uses JWT_SECRET_KEY, no key ring is needed")
+            return
+
+        # Add new signing key, published before it signs so cached JWKS know it
+        if not args.prune_only:
+            kid = jwt_keyring.rotate(publish_delay=app_config.JWKS_CACHE_MAX_AGE)
+            print(f"Key {kid} is published, it signs new tokens in {app_config.JWKS_CACHE_MAX_AGE} seconds")
+
+        # Remove retired keys once every token signed by them is expired
+        max_age = app_config.JWT_TOKEN_DURATION_MINUTES * 60 + app_config.JWKS_CACHE_MAX_AGE
+        for kid in jwt_keyring.prune(max_age=max_age):
+            print(f"Key {kid} is removed")
+    except Exception as e:
+        print(f"An unexpected error occurred: {e}")
+
+
+rotate_keys()
@@ -0,0 +1,95 @@
+import threading
+import time
+
+from collections import OrderedDict
+
+
+class TTLCache:
+    """Thread-safe LRU cache where every entry has its own expiry time.
+
+    Bounded by entry count and, when max_bytes is set, by the total size
+    given by the caller for each entry.
+    """
+
+    def __init__(self, max_entries: int, max_bytes: int = 0):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+
+        # key -> (value, expires_at, size)
+        self._entries = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key):
+        """Get cached value, expired entries are evicted"""
+        with self._lock:
+            entry = self._entries.get(key)
+
+            if entry is None:
+                self.misses += 1
+                return None
+
+            value, expires_at, size = entry
+
+            if expires_at <= time.time():
+                del self._entries[key]
+                self._size -= size
+                self.evictions += 1
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+
+            return value
+
+    def set(self, key, value, expires_at: float, size: int = 0):
+        """Cache value until expires_at (unix timestamp), size counts toward max_bytes"""
+        if self.max_entries <= 0 or (self.max_bytes and size > self.max_bytes):
+            return
+
+        with self._lock:
+            previous = self._entries.pop(key, None)
+
+            if previous is not None:
+                self._size -= previous[2]
+
+            self._entries[key] = (value, expires_at, size)
+            self._size += size
+
+            # Drop least recently used entries
+            while len(self._entries) > self.max_entries or (self.max_bytes and self._size > self.max_bytes):
+                _, (_, _, evicted_size) = self._entries.popitem(last=False)
+                self._size -= evicted_size
+                self.evictions += 1
+
+    def delete(self, key):
+        with self._lock:
+            entry = self._entries.pop(key, None)
+
+            if entry is not None:
+                self._size -= entry[2]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._size = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            total = self.hits + self.misses
+
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "bytes": self._size,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": round(self.hits / total, 4) if total else 0.0,
+            }
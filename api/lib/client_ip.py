@@ -0,0 +1,49 @@
+import ipaddress
+
+
+def parse_networks(value: str) -> list:
+    """Parse comma separated addresses or CIDR ranges, e.g. "10.0.0.0/8,127.0.0.1" """
+    return [
+        ipaddress.ip_network(item.strip(), strict=False)
+        for item in value.split(",")
+        if item.strip()
+    ]
+
+
+def is_in_networks(address: str, networks: list) -> bool:
+    try:
+        ip = ipaddress.ip_address(address)
+    except ValueError:
+        return False
+
+    return any(ip in network for network in networks)
+
+
+def resolve_client_ip(peer: str | None, forwarded_for: str | None, trusted_proxies: list) -> str | None:
+    """Get client address behind trusted proxies.
+
+    X-Forwarded-For is only read when the direct peer is a trusted proxy.
+    Hops are walked from the right, the first address that is not a trusted
+    proxy is the client. Addresses left of it are set by the client and are
+    never trusted.
+    """
+    if not peer or not forwarded_for or not is_in_networks(peer, trusted_proxies):
+        return peer
+
+    client = peer
+
+    for hop in reversed(forwarded_for.split(",")):
+        hop = hop.strip()
+
+        try:
+            ipaddress.ip_address(hop)
+        except ValueError:
+            # Malformed hop, keep the last address a trusted proxy reported
+            break
+
+        client = hop
+
+        if not is_in_networks(hop, trusted_proxies):
+            break
+
+    return client
@@ -0,0 +1,94 @@
+import threading
+import time
+
+from collections import OrderedDict
+
+
+class TokenBucketLimiter:
+    """Thread-safe token buckets keyed by string, least recently used buckets are evicted.
+
+    An evicted bucket starts full again, so memory is bounded by max_entries
+    at the cost of forgetting the least active keys.
+    """
+
+    def __init__(self, capacity: int, refill_per_second: float, max_entries: int):
+        self.capacity = capacity
+        self.refill_per_second = refill_per_second
+        self.max_entries = max_entries
+
+        # key -> [tokens, updated_at], tokens below zero delay the next token
+        self._buckets = OrderedDict()
+        self._lock = threading.Lock()
+
+        self.allowed = 0
+        self.rejected = 0
+        self.evictions = 0
+
+    def _get_tokens(self, key: str, now: float) -> float:
+        bucket = self._buckets.get(key)
+
+        if bucket is None:
+            return float(self.capacity)
+
+        tokens, updated_at = bucket
+
+        return min(float(self.capacity), tokens + max(0.0, now - updated_at) * self.refill_per_second)
+
+    def _get_wait(self, key: str, now: float) -> float:
+        tokens = self._get_tokens(key, now)
+
+        if tokens >= 1:
+            return 0.0
+
+        return (1 - tokens) / self.refill_per_second
+
+    def _put(self, key: str, tokens: float, updated_at: float):
+        self._buckets[key] = [tokens, updated_at]
+        self._buckets.move_to_end(key)
+
+        # Drop least recently used buckets
+        while len(self._buckets) > self.max_entries:
+            self._buckets.popitem(last=False)
+            self.evictions += 1
+
+    def get_wait(self, key: str) -> float:
+        """Get seconds until key has a token, 0 when a token is available"""
+        with self._lock:
+            return self._get_wait(key, time.time())
+
+    def consume(self, key: str) -> float:
+        """Take one token, returns seconds until the next token is available"""
+        now = time.time()
+
+        with self._lock:
+            self._put(key, self._get_tokens(key, now) - 1, now)
+
+            return self._get_wait(key, now)
+
+    def block(self, key: str, until: float):
+        """Make the next token of key available at the given unix timestamp"""
+        now = time.time()
+
+        with self._lock:
+            tokens = min(self._get_tokens(key, now), 1 - (until - now) * self.refill_per_second)
+            self._put(key, tokens, now)
+
+    def record(self, allowed: bool):
+        with self._lock:
+            if allowed:
+                self.allowed += 1
+            else:
+                self.rejected += 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            total = self.allowed + self.rejected
+
+            return {
+                "entries": len(self._buckets),
+                "max_entries": self.max_entries,
+                "allowed": self.allowed,
+                "rejected": self.rejected,
+                "evictions": self.evictions,
+                "reject_rate": round(self.rejected / total, 4) if total else 0.0,
+            }
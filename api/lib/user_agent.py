@@ -0,0 +1,65 @@
+import re
+
+from functools import lru_cache
+
+
+# Checked in order, the first match wins
+OS_PATTERNS = [
+    (re.compile(r"Windows NT 10\.0"), "Windows 10"),
+    (re.compile(r"Windows NT 6\.3"), "Windows 8.1"),
+    (re.compile(r"Windows NT 6\.1"), "Windows 7"),
+    (re.compile(r"Windows"), "Windows"),
+    (re.compile(r"(?:iPhone|iPad|iPod).*? OS (\d+)"), "iOS"),
+    (re.compile(r"Android (\d+)"), "Android"),
+    (re.compile(r"Mac OS X (\d+[_.]\d+)"), "macOS"),
+    (re.compile(r"CrOS"), "ChromeOS"),
+    (re.compile(r"Linux"), "Linux"),
+]
+
+BROWSER_PATTERNS = [
+    (re.compile(r"Edg(?:e|A|iOS)?/(\d+)"), "Edge"),
+    (re.compile(r"OPR/(\d+)"), "Opera"),
+    (re.compile(r"SamsungBrowser/(\d+)"), "Samsung Internet"),
+    (re.compile(r"Firefox/(\d+)"), "Firefox"),
+    (re.compile(r"FxiOS/(\d+)"), "Firefox"),
+    (re.compile(r"CriOS/(\d+)"), "Chrome"),
+    (re.compile(r"Chrome/(\d+)"), "Chrome"),
+    (re.compile(r"Version/(\d+).*Safari/"), "Safari"),
+    (re.compile(r"curl/(\d+)"), "curl"),
+]
+
+BOT_PATTERN = re.compile(r"bot|crawl|spider|slurp|curl|wget|python-requests|httpx", re.IGNORECASE)
+TABLET_PATTERN = re.compile(r"iPad|Tablet|Android(?!.*Mobile)")
+MOBILE_PATTERN = re.compile(r"Mobile|iPhone|iPod|Android")
+
+
+def match_name(patterns: list, user_agent: str) -> str | None:
+    for pattern, name in patterns:
+        match = pattern.search(user_agent)
+
+        if match:
+            return f"{name} {match.group(1).replace('_', '.')}" if match.groups() else name
+
+    return None
+
+
+@lru_cache(maxsize=1024)
+def parse_user_agent(user_agent: str | None) -> dict:
+    """Get device family, OS and browser of a user agent, memoized per user agent"""
+    if not user_agent:
+        return {"device": None, "os": None, "browser": None}
+
+    if BOT_PATTERN.search(user_agent):
+        device = "Bot"
+    elif TABLET_PATTERN.search(user_agent):
+        device = "Tablet"
+    elif MOBILE_PATTERN.search(user_agent):
+        device = "Mobile"
+    else:
+        device = "Desktop"
+
+    return {
+        "device": device,
+        "os": match_name(OS_PATTERNS, user_agent),
+        "browser": match_name(BROWSER_PATTERNS, user_agent),
+    }
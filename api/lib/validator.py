@@ -5,3 +5,8 @@ def is_valid_email(email: str) -> bool:
     """Validate email format using regex."""
     email_regex = r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$'
     return re.match(email_regex, email) is not None
+
+
+def normalize_email(email: str) -> str:
+    """Normalize email for storage and lookup, emails are case-insensitive."""
+    return email.strip().lower()
@@ -1,20 +1,52 @@
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
 from startup import load_modules
 from src.config import app_config
+from src.services.capability_registry import freeze_capability_registry
 from src.router import load_routers
+from src.services.events import start_event_listener, stop_event_listener
+from src.services.hashing import hashing_engine
+from src.services.reaper import start_token_reaper, stop_token_reaper
+from src.services.revocation import load_user_epochs, load_revoked_jtis
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Assign capability bits after every module registered its capabilities
+    freeze_capability_registry()
+
+    # Load revoked tokens before serving, the listener reloads them on reconnect
+    load_user_epochs()
+    load_revoked_jtis()
+
+    # Receive events published by other workers
+    start_event_listener()
+
+    # Delete expired refresh tokens in background
+    start_token_reaper()
+
+    yield
+
+    stop_token_reaper()
+    stop_event_listener()
+
+    # Stop password hashing processes
+    hashing_engine.shutdown()
 
 
 # Setup API
 app = FastAPI(
     version="0.0.1",
+    lifespan=lifespan,
     docs_url="/docs" if app_config.ENV != "production" else None,
     redoc_url="/redoc" if app_config.ENV != "production" else None,
 )
 
 @app.get("/health", tags=["Health"])
-def route_health_check():
+async def route_health_check():
     return {
         "status": "healthy",
     }
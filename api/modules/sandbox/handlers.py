@@ -1,20 +1,13 @@
 from fastapi import Request, HTTPException, status, Depends
 from sqlalchemy import select
-from sqlalchemy.orm import Session, load_only
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import load_only
 from sqlalchemy.sql import func
 
 from lib.log_error import log_error
 from src.config import app_config
-from src.models.auth import AuthPayload
-from src.services.user import is_user_can
-from src.error import ForbiddenError, DataNotFoundError, ERROR_MESSAGES
-
-from .capabilities import (
-    READ_SANDBOX,
-    CREATE_SANDBOX,
-    UPDATE_SANDBOX,
-    DELETE_SANDBOX,
-)
+from src.models.auth import Principal
+from src.error import DataNotFoundError
 
 from .models import (
     CreateSandboxRequest,
@@ -25,28 +18,19 @@ from .models import (
 from .repository import Sandbox
 
 
-def get_sandbox_list_handler(
+async def get_sandbox_list_handler(
         request: Request,
         search: str,
         page: int,
         limit: int,
-        payload: AuthPayload,
-        session: Session,
+        session: AsyncSession,
     ):
     try:
-        # Verify if user has permission to read sandbox
-        if not is_user_can(
-                session=session,
-                user_id=int(payload.user_id),
-                capabilities=[READ_SANDBOX],
-            ):
-            raise ForbiddenError(ERROR_MESSAGES["forbidden"])
-
         # Set offset for pagination
         offset = (page * limit) - limit
 
         # Setup base query & filters
-        base_query = session.query(
+        base_query = select(
             Sandbox.sandbox_id,
             Sandbox.sandbox_name,
             Sandbox.created_at,
@@ -61,9 +45,9 @@ def get_sandbox_list_handler(
 
         # Apply filters to the base query
         if limit == -1:
-            results = base_query.filter(*filters).all()
+            results = (await session.execute(base_query.filter(*filters))).all()
         else:
-            results = base_query.filter(*filters).offset(offset).limit(limit).all()
+            results = (await session.execute(base_query.filter(*filters).offset(offset).limit(limit))).all()
 
         sandboxes = [dict(
             sandbox_id=sandbox.sandbox_id,
@@ -73,17 +57,14 @@ def get_sandbox_list_handler(
         ) for sandbox in results]
 
         # Get total count for pagination
-        total_count = base_query.filter(*filters).count()
+        total_count = await session.scalar(
+            select(func.count()).select_from(base_query.filter(*filters).subquery())
+        )
 
         return {
             "sandboxes": sandboxes,
             "count": total_count,
         }
-    except ForbiddenError as e:
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail=str(e),
-        )
     except Exception as e:
         log_error.add_error(
             message="An error occurred during get sandbox list",
@@ -96,21 +77,12 @@ def get_sandbox_list_handler(
         )
 
 
-def get_sandbox_detail_handler(
+async def get_sandbox_detail_handler(
         request: Request,
         sandbox_id: int,
-        payload: AuthPayload,
-        session: Session,
+        session: AsyncSession,
     ):
     try:
-        # Verify if user has permission to read sandbox
-        if not is_user_can(
-                session=session,
-                user_id=int(payload.user_id),
-                capabilities=[READ_SANDBOX],
-            ):
-            raise ForbiddenError(ERROR_MESSAGES["forbidden"])
-
         # Validate sandbox_id
         if not sandbox_id:
             raise ValueError("Sandbox ID is required")
@@ -129,7 +101,7 @@ def get_sandbox_detail_handler(
             Sandbox.sandbox_id == sandbox_id,
         )
 
-        sandbox = session.scalar(
+        sandbox = await session.scalar(
             statement=stmt,
         )
 
@@ -144,11 +116,6 @@ def get_sandbox_detail_handler(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail=str(e),
         )
-    except ForbiddenError as e:
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail=str(e),
-        )
     except DataNotFoundError as e:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -166,21 +133,13 @@ def get_sandbox_detail_handler(
         )
 
 
-def create_sandbox_handler(
+async def create_sandbox_handler(
         request: Request,
         params: CreateSandboxRequest,
-        payload: AuthPayload,
-        session: Session,
+        principal: Principal,
+        session: AsyncSession,
     ):
     try:
-        # Verify if user has permission to create sandbox
-        if not is_user_can(
-                session=session,
-                user_id=int(payload.user_id),
-                capabilities=[CREATE_SANDBOX],
-            ):
-            raise ForbiddenError(ERROR_MESSAGES["forbidden"])
-
         # Validate request params
         if not params.sandbox_name:
             raise ValueError("Sandbox name is required")
@@ -188,15 +147,15 @@ def create_sandbox_handler(
         # Create new sandbox
         new_sandbox = Sandbox(
             sandbox_name=params.sandbox_name,
-            created_by=int(payload.user_id),
+            created_by=principal.user_id,
             updated_at=func.now(),
         )
 
         session.add(new_sandbox)
-        session.flush()
+        await session.flush()
 
         # Commit transactions
-        session.commit()
+        await session.commit()
 
         return {
             "data": {
@@ -204,13 +163,8 @@ def create_sandbox_handler(
                 "status": "sandbox_created",
             },
         }
-    except ForbiddenError as e:
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail=str(e),
-        )
     except Exception as e:
-        session.rollback()
+        await session.rollback()
 
         log_error.add_error(
             message="An error occurred during create sandbox",
@@ -223,31 +177,24 @@ def create_sandbox_handler(
         )
 
 
-def update_sandbox_handler(
+async def update_sandbox_handler(
         request: Request,
         params: UpdateSandboxRequest,
-        payload: AuthPayload,
-        session: Session,
+        session: AsyncSession,
     ):
     try:
-        # Verify if user has permission to update sandbox
-        if not is_user_can(
-                session=session,
-                user_id=int(payload.user_id),
-                capabilities=[UPDATE_SANDBOX],
-            ):
-            raise ForbiddenError(ERROR_MESSAGES["forbidden"])
-
         # Validate request params
         if not params.sandbox_id:
             raise ValueError("Sandbox ID is required")
 
         # Check if sandbox exists
-        sandbox = session.query(
-            Sandbox,
-        ).filter(
-            Sandbox.sandbox_id == params.sandbox_id,
-        ).first()
+        sandbox = await session.scalar(
+            select(
+                Sandbox,
+            ).filter(
+                Sandbox.sandbox_id == params.sandbox_id,
+            )
+        )
 
         if not sandbox:
             raise DataNotFoundError("Sandbox not found")
@@ -257,7 +204,7 @@ def update_sandbox_handler(
         sandbox.updated_at = func.now()
 
         # Commit transactions
-        session.commit()
+        await session.commit()
 
         return {
             "data": {
@@ -270,18 +217,13 @@ def update_sandbox_handler(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail=str(e),
         )
-    except ForbiddenError as e:
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail=str(e),
-        )
     except DataNotFoundError as e:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail=str(e),
         )
     except Exception as e:
-        session.rollback()
+        await session.rollback()
 
         log_error.add_error(
             message="An error occurred during update sandbox",
@@ -294,40 +236,33 @@ def update_sandbox_handler(
         )
 
 
-def delete_sandbox_handler(
+async def delete_sandbox_handler(
         request: Request,
         params: DeleteSandboxRequest,
-        payload: AuthPayload,
-        session: Session,
+        session: AsyncSession,
     ):
     try:
-        # Verify if user has permission to delete sandbox
-        if not is_user_can(
-                session=session,
-                user_id=int(payload.user_id),
-                capabilities=[DELETE_SANDBOX],
-            ):
-            raise ForbiddenError(ERROR_MESSAGES["forbidden"])
-
         # Validate request params
         if not params.sandbox_id:
             raise ValueError("Sandbox ID is required")
 
         # Check if sandbox exists
-        sandbox = session.query(
-            Sandbox,
-        ).filter(
-            Sandbox.sandbox_id == params.sandbox_id,
-        ).first()
+        sandbox = await session.scalar(
+            select(
+                Sandbox,
+            ).filter(
+                Sandbox.sandbox_id == params.sandbox_id,
+            )
+        )
 
         if not sandbox:
             raise DataNotFoundError("Sandbox not found")
 
         # Delete sandbox
-        session.delete(sandbox)
+        await session.delete(sandbox)
 
         # Commit transactions
-        session.commit()
+        await session.commit()
 
         return {
             "data": {
@@ -340,18 +275,13 @@ def delete_sandbox_handler(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail=str(e),
         )
-    except ForbiddenError as e:
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail=str(e),
-        )
     except DataNotFoundError as e:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail=str(e),
         )
     except Exception as e:
-        session.rollback()
+        await session.rollback()
 
         log_error.add_error(
             message="An error occurred during delete sandbox",
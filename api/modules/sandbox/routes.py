@@ -1,9 +1,16 @@
 from fastapi import APIRouter, Request, Depends
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from src.db import db_session
-from src.dependencies.auth import authorize_token
-from src.models.auth import AuthPayload
+from src.db import async_db_session
+from src.dependencies.auth import get_principal, require
+from src.models.auth import Principal
+
+from .capabilities import (
+    READ_SANDBOX,
+    CREATE_SANDBOX,
+    UPDATE_SANDBOX,
+    DELETE_SANDBOX,
+)
 
 from modules.sandbox.handlers import (
     get_sandbox_list_handler,
@@ -25,76 +32,68 @@ sandbox_router = APIRouter(
     tags=["Sandbox"],
 )
 
-@sandbox_router.get("/list")
-def route_get_sandbox_list(
+@sandbox_router.get("/list", dependencies=[require(READ_SANDBOX)])
+async def route_get_sandbox_list(
         request: Request,
         search: str = "",
         page: int = 1,
         limit: int = 10,
-        payload: AuthPayload = Depends(authorize_token),
-        session: Session = Depends(db_session),
+        session: AsyncSession = Depends(async_db_session),
     ):
-    return get_sandbox_list_handler(
+    return await get_sandbox_list_handler(
         request=request,
         search=search,
         page=page,
         limit=limit,
-        payload=payload,
         session=session,
     )
 
-@sandbox_router.get("/detail/{sandbox_id}")
-def route_get_sandbox_detail(
+@sandbox_router.get("/detail/{sandbox_id}", dependencies=[require(READ_SANDBOX)])
+async def route_get_sandbox_detail(
         request: Request,
         sandbox_id: int,
-        payload: AuthPayload = Depends(authorize_token),
-        session: Session = Depends(db_session),
+        session: AsyncSession = Depends(async_db_session),
     ):
-    return get_sandbox_detail_handler(
+    return await get_sandbox_detail_handler(
         request=request,
         sandbox_id=sandbox_id,
-        payload=payload,
         session=session,
     )
 
-@sandbox_router.post("/create")
-def route_create_sandbox(
+@sandbox_router.post("/create", dependencies=[require(CREATE_SANDBOX)])
+async def route_create_sandbox(
         request: Request,
         params: CreateSandboxRequest,
-        payload: AuthPayload = Depends(authorize_token),
-        session: Session = Depends(db_session),
+        principal: Principal = Depends(get_principal),
+        session: AsyncSession = Depends(async_db_session),
     ):
-    return create_sandbox_handler(
+    return await create_sandbox_handler(
         request=request,
         params=params,
-        payload=payload,
+        principal=principal,
         session=session,
     )
 
-@sandbox_router.patch("/update")
-def route_update_sandbox(
+@sandbox_router.patch("/update", dependencies=[require(UPDATE_SANDBOX)])
+async def route_update_sandbox(
         request: Request,
         params: UpdateSandboxRequest,
-        payload: AuthPayload = Depends(authorize_token),
-        session: Session = Depends(db_session),
+        session: AsyncSession = Depends(async_db_session),
     ):
-    return update_sandbox_handler(
+    return await update_sandbox_handler(
         request=request,
         params=params,
-        payload=payload,
         session=session,
     )
 
-@sandbox_router.delete("/delete")
-def route_delete_sandbox(
+@sandbox_router.delete("/delete", dependencies=[require(DELETE_SANDBOX)])
+async def route_delete_sandbox(
         request: Request,
         params: DeleteSandboxRequest,
-        payload: AuthPayload = Depends(authorize_token),
-        session: Session = Depends(db_session),
+        session: AsyncSession = Depends(async_db_session),
     ):
-    return delete_sandbox_handler(
+    return await delete_sandbox_handler(
         request=request,
         params=params,
-        payload=payload,
         session=session,
     )
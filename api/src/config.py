@@ -13,12 +13,111 @@ class AppConfig:
     # DB URL
     DATABASE_URL: str = os.getenv("DATABASE_URL", "sqlite:///./test.db")
 
+    # Async DB engine (asyncpg), falls back to the sync engine when disabled
+    DB_ASYNC_ENABLED: bool = os.getenv("DB_ASYNC_ENABLED", "false").lower() == "true"
+    ASYNC_DATABASE_URL: str = os.getenv("ASYNC_DATABASE_URL") or DATABASE_URL.replace("postgresql://", "postgresql+asyncpg://", 1)
+
+    # Connection pool of each engine, per worker process
+    # Keep workers * (DB_POOL_SIZE + DB_MAX_OVERFLOW) below Postgres max_connections
+    DB_POOL_SIZE: int = int(os.getenv("DB_POOL_SIZE", "5"))
+    DB_MAX_OVERFLOW: int = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+    DB_POOL_TIMEOUT: float = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+    DB_POOL_PRE_PING: bool = os.getenv("DB_POOL_PRE_PING", "true").lower() == "true"
+    DB_POOL_RECYCLE: int = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+    DB_POOL_USE_LIFO: bool = os.getenv("DB_POOL_USE_LIFO", "true").lower() == "true"
+
     # JWT Secret Key
     JWT_SECRET_KEY: str = os.getenv("JWT_SECRET_KEY", "your_jwt_secret_key_here")
     JWT_ALGORITHM: str = os.getenv("JWT_ALGORITHM", "HS256")
     JWT_TOKEN_DURATION_MINUTES: int = int(os.getenv("JWT_TOKEN_DURATION_MINUTES", "10"))
     JWT_REFRESH_TOKEN_DURATION_DAYS: int = int(os.getenv("JWT_REFRESH_TOKEN_DURATION_DAYS", "7"))
 
+    # Key ring for asymmetric algorithms (RS256, ES256, ...)
+    JWT_KEYS_DIR: str = os.getenv("JWT_KEYS_DIR", "jwt_keys")
+    JWT_RSA_KEY_SIZE: int = int(os.getenv("JWT_RSA_KEY_SIZE", "2048"))
+    JWKS_CACHE_MAX_AGE: int = int(os.getenv("JWKS_CACHE_MAX_AGE", "300"))
+
+    # Refresh token digest key, falls back to JWT secret key
+    REFRESH_TOKEN_HASH_KEY: str = os.getenv("REFRESH_TOKEN_HASH_KEY") or JWT_SECRET_KEY
+
+    # JWT backend (auto, jose, pyjwt or builtin), run cli_benchmark_jwt.py to compare
+    JWT_BACKEND: str = os.getenv("JWT_BACKEND", "auto")
+    JWT_LEEWAY_SECONDS: int = int(os.getenv("JWT_LEEWAY_SECONDS", "0"))
+
+    # Embed role and capabilities in access tokens
+    JWT_EMBED_CLAIMS: bool = os.getenv("JWT_EMBED_CLAIMS", "false").lower() == "true"
+
+    # Role capability cache, reloaded after role changes or at the latest after TTL seconds
+    ROLE_CACHE_TTL: int = int(os.getenv("ROLE_CACHE_TTL", "300"))
+
+    # Browser cache of GET /account/can responses, 0 revalidates with ETag on every use
+    PERMISSION_CACHE_MAX_AGE: int = int(os.getenv("PERMISSION_CACHE_MAX_AGE", "0"))
+
+    # Verified access token cache
+    JWT_CACHE_ENABLED: bool = os.getenv("JWT_CACHE_ENABLED", "true").lower() == "true"
+    JWT_CACHE_MAX_ENTRIES: int = int(os.getenv("JWT_CACHE_MAX_ENTRIES", "10000"))
+    JWT_CACHE_MAX_MB: int = int(os.getenv("JWT_CACHE_MAX_MB", "16"))
+
+    # Password hasher of new passwords (bcrypt, scrypt or argon2id) and its cost
+    PASSWORD_HASHER: str = os.getenv("PASSWORD_HASHER", "bcrypt")
+    BCRYPT_ROUNDS: int = int(os.getenv("BCRYPT_ROUNDS", "12"))
+    SCRYPT_LOG_N: int = int(os.getenv("SCRYPT_LOG_N", "15"))
+    SCRYPT_R: int = int(os.getenv("SCRYPT_R", "8"))
+    SCRYPT_P: int = int(os.getenv("SCRYPT_P", "1"))
+    ARGON2_TIME_COST: int = int(os.getenv("ARGON2_TIME_COST", "3"))
+    ARGON2_MEMORY_COST: int = int(os.getenv("ARGON2_MEMORY_COST", "65536"))
+    ARGON2_PARALLELISM: int = int(os.getenv("ARGON2_PARALLELISM", "1"))
+
+    # Password hashing pool, workers 0 means one process per core
+    HASH_POOL_ENABLED: bool = os.getenv("HASH_POOL_ENABLED", "true").lower() == "true"
+    HASH_POOL_WORKERS: int = int(os.getenv("HASH_POOL_WORKERS", "0"))
+    HASH_POOL_QUEUE_SIZE: int = int(os.getenv("HASH_POOL_QUEUE_SIZE", "64"))
+    HASH_POOL_RETRY_AFTER: int = int(os.getenv("HASH_POOL_RETRY_AFTER", "1"))
+
+    # Memory all concurrent hashes may use, shared by the pool workers
+    HASH_MEMORY_BUDGET_MB: int = int(os.getenv("HASH_MEMORY_BUDGET_MB", "1024"))
+
+    # Events shared between workers with PostgreSQL LISTEN/NOTIFY
+    EVENTS_ENABLED: bool = os.getenv("EVENTS_ENABLED", "true").lower() == "true"
+    EVENTS_CHANNEL: str = os.getenv("EVENTS_CHANNEL", "auth_events")
+    EVENTS_RECONNECT_MIN_DELAY: float = float(os.getenv("EVENTS_RECONNECT_MIN_DELAY", "1"))
+    EVENTS_RECONNECT_MAX_DELAY: float = float(os.getenv("EVENTS_RECONNECT_MAX_DELAY", "30"))
+
+    # Reverse proxies allowed to set X-Forwarded-For, comma separated addresses or CIDR ranges
+    TRUSTED_PROXIES: str = os.getenv("TRUSTED_PROXIES", "")
+
+    # Login guard token buckets by client IP and by email, refill per minute
+    LOGIN_GUARD_ENABLED: bool = os.getenv("LOGIN_GUARD_ENABLED", "true").lower() == "true"
+    LOGIN_GUARD_IP_CAPACITY: int = int(os.getenv("LOGIN_GUARD_IP_CAPACITY", "20"))
+    LOGIN_GUARD_IP_REFILL_PER_MINUTE: float = float(os.getenv("LOGIN_GUARD_IP_REFILL_PER_MINUTE", "10"))
+    LOGIN_GUARD_EMAIL_CAPACITY: int = int(os.getenv("LOGIN_GUARD_EMAIL_CAPACITY", "5"))
+    LOGIN_GUARD_EMAIL_REFILL_PER_MINUTE: float = float(os.getenv("LOGIN_GUARD_EMAIL_REFILL_PER_MINUTE", "1"))
+    LOGIN_GUARD_MAX_ENTRIES: int = int(os.getenv("LOGIN_GUARD_MAX_ENTRIES", "100000"))
+    LOGIN_GUARD_SHARED: bool = os.getenv("LOGIN_GUARD_SHARED", "true").lower() == "true"
+
+    # One-time reset password and account verification codes
+    AUTH_CODE_RESET_EXPIRE_MINUTES: int = int(os.getenv("AUTH_CODE_RESET_EXPIRE_MINUTES", "30"))
+    AUTH_CODE_VERIFY_EXPIRE_MINUTES: int = int(os.getenv("AUTH_CODE_VERIFY_EXPIRE_MINUTES", "4320"))
+    AUTH_CODE_MAX_ATTEMPTS: int = int(os.getenv("AUTH_CODE_MAX_ATTEMPTS", "5"))
+
+    # Range partitioned auth tokens by expiration date, applied on install
+    AUTH_TOKENS_PARTITIONED: bool = os.getenv("AUTH_TOKENS_PARTITIONED", "false").lower() == "true"
+    AUTH_TOKENS_PARTITION_DAYS: int = int(os.getenv("AUTH_TOKENS_PARTITION_DAYS", "7"))
+    AUTH_TOKENS_PARTITIONS_AHEAD: int = int(os.getenv("AUTH_TOKENS_PARTITIONS_AHEAD", "2"))
+    AUTH_TOKENS_PARTITION_LOCK_TIMEOUT_MS: int = int(os.getenv("AUTH_TOKENS_PARTITION_LOCK_TIMEOUT_MS", "1000"))
+    AUTH_TOKENS_PARTITION_STATEMENT_TIMEOUT_MS: int = int(os.getenv("AUTH_TOKENS_PARTITION_STATEMENT_TIMEOUT_MS", "2000"))
+    AUTH_TOKENS_PARTITION_MOVE_MAX_ROWS: int = int(os.getenv("AUTH_TOKENS_PARTITION_MOVE_MAX_ROWS", "1000"))
+
+    # Expired refresh token reaper, one worker runs it at a time
+    REAPER_ENABLED: bool = os.getenv("REAPER_ENABLED", "true").lower() == "true"
+    REAPER_INTERVAL: int = int(os.getenv("REAPER_INTERVAL", "300"))
+    REAPER_BATCH_SIZE: int = int(os.getenv("REAPER_BATCH_SIZE", "1000"))
+    REAPER_BATCH_TIMEOUT_MS: int = int(os.getenv("REAPER_BATCH_TIMEOUT_MS", "2000"))
+    REAPER_TIME_BUDGET: int = int(os.getenv("REAPER_TIME_BUDGET", "10"))
+
+    # Internal endpoints key, internal endpoints are disabled when empty
+    INTERNAL_API_KEY: str = os.getenv("INTERNAL_API_KEY", "")
+
     # Mail
     MAIL_SENDER: str = os.getenv("MAIL_SENDER", "noreply@example.ai")
 
@@ -1,14 +1,71 @@
+from contextlib import asynccontextmanager
+
 from sqlalchemy import create_engine, inspect, text
-from sqlalchemy.orm import sessionmaker, declarative_base
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.orm import Session, sessionmaker, declarative_base
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+from starlette.concurrency import run_in_threadpool
 
 from src.config import app_config
+from src.db.pool import PoolMetrics, create_instrumented_pool_class
+
 
+# Connection pool settings shared by both engines
+pool_options = dict(
+    pool_size=app_config.DB_POOL_SIZE,
+    max_overflow=app_config.DB_MAX_OVERFLOW,
+    pool_timeout=app_config.DB_POOL_TIMEOUT,
+    pool_pre_ping=app_config.DB_POOL_PRE_PING,
+    pool_recycle=app_config.DB_POOL_RECYCLE,
+    pool_use_lifo=app_config.DB_POOL_USE_LIFO,
+)
+
+# Checkout stats of each engine pool
+pool_metrics = PoolMetrics()
+async_pool_metrics = PoolMetrics()
 
 # Create database engine
 # Set echo=True for SQL query logging
-engine = create_engine(app_config.DATABASE_URL, echo=False)
+engine = create_engine(
+    app_config.DATABASE_URL,
+    echo=False,
+    poolclass=create_instrumented_pool_class(QueuePool, pool_metrics),
+    **pool_options,
+)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Create async database engine, only when enabled so the async driver stays optional
+async_engine = None
+AsyncSessionLocal = None
+
+if app_config.DB_ASYNC_ENABLED:
+    async_engine = create_async_engine(
+        app_config.ASYNC_DATABASE_URL,
+        echo=False,
+        poolclass=create_instrumented_pool_class(AsyncAdaptedQueuePool, async_pool_metrics),
+        **pool_options,
+    )
+    AsyncSessionLocal = async_sessionmaker(
+        bind=async_engine,
+        class_=AsyncSession,
+        autoflush=False,
+        expire_on_commit=False,
+    )
+
+
+def get_pool_stats() -> dict:
+    """Get live state and checkout stats of each engine pool"""
+    stats = {
+        "settings": pool_options,
+        "sync": pool_metrics.stats(engine.pool),
+    }
+
+    if async_engine is not None:
+        stats["async"] = async_pool_metrics.stats(async_engine.pool)
+
+    return stats
+
+
 Base = declarative_base()
 Base.metadata.create_all(engine)
 
@@ -21,6 +78,67 @@ def db_session():
         session.close()
 
 
+class SyncSessionAdapter:
+    """Expose a sync session with the AsyncSession API.
+
+    Used as fallback when the async engine is disabled, every database call
+    runs in the threadpool so the event loop is never blocked.
+    """
+
+    def __init__(self, session: Session):
+        self.sync_session = session
+
+    def add(self, instance):
+        self.sync_session.add(instance)
+
+    def add_all(self, instances):
+        self.sync_session.add_all(instances)
+
+    async def execute(self, *args, **kwargs):
+        return await run_in_threadpool(self.sync_session.execute, *args, **kwargs)
+
+    async def scalar(self, *args, **kwargs):
+        return await run_in_threadpool(self.sync_session.scalar, *args, **kwargs)
+
+    async def scalars(self, *args, **kwargs):
+        return await run_in_threadpool(self.sync_session.scalars, *args, **kwargs)
+
+    async def get(self, *args, **kwargs):
+        return await run_in_threadpool(self.sync_session.get, *args, **kwargs)
+
+    async def delete(self, instance):
+        await run_in_threadpool(self.sync_session.delete, instance)
+
+    async def flush(self):
+        await run_in_threadpool(self.sync_session.flush)
+
+    async def commit(self):
+        await run_in_threadpool(self.sync_session.commit)
+
+    async def rollback(self):
+        await run_in_threadpool(self.sync_session.rollback)
+
+    async def close(self):
+        await run_in_threadpool(self.sync_session.close)
+
+
+# Create async DB session, falls back to the sync engine when async is disabled
+async def async_db_session():
+    if AsyncSessionLocal is not None:
+        async with AsyncSessionLocal() as session:
+            yield session
+    else:
+        session = SyncSessionAdapter(SessionLocal(expire_on_commit=False))
+        try:
+            yield session
+        finally:
+            await session.close()
+
+
+# Open async DB session outside of a request dependency
+open_async_db_session = asynccontextmanager(async_db_session)
+
+
 class DB:
 
     @staticmethod
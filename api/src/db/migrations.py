@@ -0,0 +1,267 @@
+from sqlalchemy import text
+from sqlalchemy.engine import Connection
+
+from src.config import app_config
+from src.services.auth import hash_token
+from src.services.auth_code import PURPOSE_RESET_PASSWORD, PURPOSE_VERIFY_ACCOUNT
+
+
+QUERY_CREATE_MIGRATIONS_TABLE = """
+    CREATE TABLE IF NOT EXISTS schema_migrations (
+        migration_id VARCHAR(100) PRIMARY KEY,
+        applied_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP
+    );
+"""
+
+MIGRATION_BATCH_SIZE = 1000
+
+
+def migrate_auth_token_digest(connection: Connection):
+    """Replace bcrypt-hashed refresh tokens with an indexed HMAC digest.
+
+    Clients of existing sessions hold the bcrypt string as their refresh token,
+    so the digest of that string is stored and those sessions keep working.
+    """
+    # Add digest column
+    connection.execute(text("ALTER TABLE auth_tokens ADD COLUMN IF NOT EXISTS token_digest CHAR(64)"))
+
+    # Backfill digest of existing tokens in batches
+    while True:
+        rows = connection.execute(
+            text("""
+                SELECT auth_id, refresh_token FROM auth_tokens
+                WHERE token_digest IS NULL
+                LIMIT :limit
+            """),
+            {"limit": MIGRATION_BATCH_SIZE},
+        ).all()
+
+        if not rows:
+            break
+
+        connection.execute(
+            text("UPDATE auth_tokens SET token_digest = :token_digest WHERE auth_id = :auth_id"),
+            [
+                {"auth_id": row.auth_id, "token_digest": hash_token(row.refresh_token)}
+                for row in rows
+            ],
+        )
+
+    # Enforce digest and drop the old column
+    connection.execute(text("""
+        ALTER TABLE auth_tokens ALTER COLUMN token_digest SET NOT NULL;
+        CREATE UNIQUE INDEX IF NOT EXISTS auth_tokens_token_digest_key ON auth_tokens (token_digest);
+        ALTER TABLE auth_tokens DROP COLUMN refresh_token;
+    """))
+
+
+def migrate_role_version(connection: Connection):
+    """Add role version used to detect outdated access token claims"""
+    connection.execute(text("ALTER TABLE roles ADD COLUMN IF NOT EXISTS version INT NOT NULL DEFAULT 1"))
+
+
+def migrate_user_token_epoch(connection: Connection):
+    """Add user epoch used to revoke issued access tokens"""
+    connection.execute(text("ALTER TABLE users ADD COLUMN IF NOT EXISTS token_epoch INT NOT NULL DEFAULT 0"))
+
+
+def migrate_auth_token_expires_at_index(connection: Connection):
+    """Index expiration date used by the expired token reaper"""
+    connection.execute(text("CREATE INDEX IF NOT EXISTS auth_tokens_expires_at_idx ON auth_tokens (expires_at)"))
+
+
+def migrate_auth_token_user_sessions_index(connection: Connection):
+    """Index sessions of a user in keyset pagination order"""
+    connection.execute(text("CREATE INDEX IF NOT EXISTS auth_tokens_user_id_created_at_idx ON auth_tokens (user_id, created_at DESC, auth_id DESC)"))
+
+
+def migrate_user_email_index(connection: Connection):
+    """Store lower-cased emails and enforce unique email among active users"""
+    duplicates = connection.scalars(text("""
+        SELECT lower(trim(email)) FROM users
+        WHERE is_deleted = false
+        GROUP BY lower(trim(email))
+        HAVING count(*) > 1
+    """)).all()
+
+    if duplicates:
+        raise RuntimeError(f"Resolve duplicate emails before migrating: {', '.join(duplicates)}")
+
+    # Backfill normalized emails in batches
+    while True:
+        result = connection.execute(
+            text("""
+                UPDATE users SET email = lower(trim(email))
+                WHERE user_id IN (
+                    SELECT user_id FROM users
+                    WHERE email <> lower(trim(email))
+                    LIMIT :limit
+                )
+            """),
+            {"limit": MIGRATION_BATCH_SIZE},
+        )
+
+        if not result.rowcount:
+            break
+
+    connection.execute(text(
+        "CREATE UNIQUE INDEX IF NOT EXISTS users_email_key ON users (lower(email)) WHERE is_deleted = false"
+    ))
+
+
+def migrate_auth_codes(connection: Connection):
+    """Move reset and verification codes out of users into expiring hashed codes.
+
+    Pending codes get the configured lifetime from now, so emails already
+    sent keep working until then.
+    """
+    connection.execute(text("""
+        CREATE TABLE IF NOT EXISTS auth_codes (
+            user_id BIGINT NOT NULL,
+            purpose VARCHAR(20) NOT NULL,
+            code_digest CHAR(64) NOT NULL,
+            attempts INT NOT NULL DEFAULT 0,
+            created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
+            expires_at TIMESTAMP WITH TIME ZONE NOT NULL,
+            PRIMARY KEY (user_id, purpose)
+        );
+
+        CREATE INDEX IF NOT EXISTS auth_codes_expires_at_idx ON auth_codes (expires_at);
+    """))
+
+    columns = {
+        "reset_code": (PURPOSE_RESET_PASSWORD, app_config.AUTH_CODE_RESET_EXPIRE_MINUTES),
+        "verify_code": (PURPOSE_VERIFY_ACCOUNT, app_config.AUTH_CODE_VERIFY_EXPIRE_MINUTES),
+    }
+
+    # Copy pending codes in batches
+    last_user_id = 0
+
+    while True:
+        rows = connection.execute(
+            text("""
+                SELECT user_id, reset_code, verify_code FROM users
+                WHERE user_id > :last_user_id
+                AND (coalesce(reset_code, '') <> '' OR coalesce(verify_code, '') <> '')
+                ORDER BY user_id
+                LIMIT :limit
+            """),
+            {"last_user_id": last_user_id, "limit": MIGRATION_BATCH_SIZE},
+        ).mappings().all()
+
+        if not rows:
+            break
+
+        codes = [
+            {
+                "user_id": row["user_id"],
+                "purpose": purpose,
+                "code_digest": hash_token(row[column]),
+                "expire_minutes": expire_minutes,
+            }
+            for row in rows
+            for column, (purpose, expire_minutes) in columns.items()
+            if row[column]
+        ]
+
+        connection.execute(
+            text("""
+                INSERT INTO auth_codes (user_id, purpose, code_digest, expires_at)
+                VALUES (:user_id, :purpose, :code_digest, CURRENT_TIMESTAMP + make_interval(mins => :expire_minutes))
+                ON CONFLICT (user_id, purpose) DO NOTHING
+            """),
+            codes,
+        )
+
+        last_user_id = rows[-1]["user_id"]
+
+    connection.execute(text("""
+        ALTER TABLE users DROP COLUMN IF EXISTS reset_code;
+        ALTER TABLE users DROP COLUMN IF EXISTS verify_code;
+    """))
+
+
+def migrate_role_capability_mask(connection: Connection):
+    """Add capability bit index and role bitmask, masks are computed on startup"""
+    connection.execute(text("""
+        CREATE TABLE IF NOT EXISTS capability_bits (
+            capability_id VARCHAR(50) PRIMARY KEY,
+            bit SMALLINT NOT NULL UNIQUE
+        );
+
+        ALTER TABLE roles ADD COLUMN IF NOT EXISTS capability_mask BIGINT NOT NULL DEFAULT 0;
+    """))
+
+
+def migrate_revoked_tokens(connection: Connection):
+    """Persist revoked access token ids until the tokens expire"""
+    connection.execute(text("""
+        CREATE TABLE IF NOT EXISTS revoked_tokens (
+            jti VARCHAR(64) PRIMARY KEY,
+            expires_at TIMESTAMP WITH TIME ZONE NOT NULL
+        );
+
+        CREATE INDEX IF NOT EXISTS revoked_tokens_expires_at_idx ON revoked_tokens (expires_at);
+    """))
+
+
+# Ordered list of migrations, append new migration at the end
+app_migrations = [
+    ("0001_auth_token_digest", migrate_auth_token_digest),
+    ("0002_role_version", migrate_role_version),
+    ("0003_user_token_epoch", migrate_user_token_epoch),
+    ("0004_auth_token_expires_at_index", migrate_auth_token_expires_at_index),
+    ("0005_auth_token_user_sessions_index", migrate_auth_token_user_sessions_index),
+    ("0006_user_email_index", migrate_user_email_index),
+    ("0007_auth_codes", migrate_auth_codes),
+    ("0008_role_capability_mask", migrate_role_capability_mask),
+    ("0009_revoked_tokens", migrate_revoked_tokens),
+]
+
+
+def get_applied_migrations(connection: Connection) -> set[str]:
+    """Get ids of applied migrations"""
+    connection.execute(text(QUERY_CREATE_MIGRATIONS_TABLE))
+
+    return set(connection.scalars(
+        text("SELECT migration_id FROM schema_migrations")
+    ).all())
+
+
+def mark_migration_applied(connection: Connection, migration_id: str):
+    """Record migration as applied"""
+    connection.execute(
+        text("""
+            INSERT INTO schema_migrations (migration_id) VALUES (:migration_id)
+            ON CONFLICT (migration_id) DO NOTHING
+        """),
+        {"migration_id": migration_id},
+    )
+
+
+def mark_all_migrations_applied(connection: Connection):
+    """Mark every migration as applied, used after a fresh install"""
+    connection.execute(text(QUERY_CREATE_MIGRATIONS_TABLE))
+
+    for migration_id, _ in app_migrations:
+        mark_migration_applied(connection=connection, migration_id=migration_id)
+
+
+def run_migrations(connection: Connection) -> list[str]:
+    """Run pending migrations, each migration is committed separately"""
+    applied = get_applied_migrations(connection=connection)
+    connection.commit()
+
+    executed = []
+
+    for migration_id, migrate in app_migrations:
+        if migration_id in applied:
+            continue
+
+        migrate(connection)
+        mark_migration_applied(connection=connection, migration_id=migration_id)
+        connection.commit()
+
+        executed.append(migration_id)
+
+    return executed
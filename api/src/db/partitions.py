@@ -0,0 +1,206 @@
+import datetime
+import re
+
+from sqlalchemy import text
+from sqlalchemy.engine import Connection
+from sqlalchemy.exc import OperationalError
+
+from lib.log_error import log_error
+from src.config import app_config
+
+
+EPOCH = datetime.datetime(1970, 1, 1, tzinfo=datetime.timezone.utc)
+
+PARTITION_PREFIX = "auth_tokens_p"
+DEFAULT_PARTITION = "auth_tokens_default"
+
+# SQLSTATE raised when lock_timeout or statement_timeout expires
+LOCK_NOT_AVAILABLE = "55P03"
+QUERY_CANCELED = "57014"
+
+QUERY_GET_PARTITIONS = """
+    SELECT child.relname AS name, pg_get_expr(child.relpartbound, child.oid) AS bound
+    FROM pg_inherits
+    JOIN pg_class parent ON parent.oid = pg_inherits.inhparent
+    JOIN pg_class child ON child.oid = pg_inherits.inhrelid
+    WHERE parent.relname = 'auth_tokens'
+"""
+
+BOUND_UPPER_PATTERN = re.compile(r"TO \('([^']+)'\)")
+
+
+def is_auth_tokens_partitioned(connection: Connection) -> bool:
+    """Verify if auth tokens table uses the partitioned layout"""
+    return bool(connection.scalar(text("""
+        SELECT EXISTS (
+            SELECT 1 FROM pg_partitioned_table
+            JOIN pg_class ON pg_class.oid = pg_partitioned_table.partrelid
+            WHERE pg_class.relname = 'auth_tokens'
+        )
+    """)))
+
+
+def get_partition_start(value: datetime.datetime) -> datetime.datetime:
+    """Get start of partition containing value, aligned to partition width"""
+    days = app_config.AUTH_TOKENS_PARTITION_DAYS
+    offset = (value - EPOCH).days // days * days
+
+    return EPOCH + datetime.timedelta(days=offset)
+
+
+def set_timeouts(connection: Connection):
+    """Bound how long maintenance waits for a lock and how long it holds it.
+
+    lock_timeout only limits the wait, statement_timeout limits each
+    statement run while the lock is held, so logins and refreshes never
+    queue behind maintenance for long.
+    """
+    connection.execute(text(f"SET LOCAL lock_timeout = {int(app_config.AUTH_TOKENS_PARTITION_LOCK_TIMEOUT_MS)}"))
+    connection.execute(text(f"SET LOCAL statement_timeout = {int(app_config.AUTH_TOKENS_PARTITION_STATEMENT_TIMEOUT_MS)}"))
+
+
+def is_timeout(error: OperationalError) -> bool:
+    return getattr(error.orig, "pgcode", None) in (LOCK_NOT_AVAILABLE, QUERY_CANCELED)
+
+
+def count_default_rows(connection: Connection, start: datetime.datetime, end: datetime.datetime, limit: int) -> int:
+    """Count rows of the default partition in [start, end), stops counting after limit"""
+    return connection.scalar(
+        text(f"""
+            SELECT count(*) FROM (
+                SELECT 1 FROM {DEFAULT_PARTITION}
+                WHERE expires_at >= :start AND expires_at < :end
+                LIMIT :limit
+            ) AS rows_in_range
+        """),
+        {"start": start, "end": end, "limit": limit},
+    )
+
+
+def create_partition(connection: Connection, name: str, start: datetime.datetime, end: datetime.datetime) -> int:
+    """Create partition for [start, end) and move rows of that range out of the default partition.
+
+    Attaching a range fails while the default partition holds rows in it, e.g.
+    after maintenance did not run for a while. Inserts into the default
+    partition wait while rows are moved, the caller bounds the move with
+    AUTH_TOKENS_PARTITION_MOVE_MAX_ROWS and the statement timeout. Returns
+    the number of moved rows.
+    """
+    # Keep new rows out of the default partition until the range is attached
+    connection.execute(text(f"LOCK TABLE {DEFAULT_PARTITION} IN SHARE ROW EXCLUSIVE MODE"))
+    connection.execute(text(f"CREATE TABLE {name} (LIKE auth_tokens INCLUDING DEFAULTS INCLUDING CONSTRAINTS)"))
+
+    moved_count = connection.execute(
+        text(f"""
+            WITH moved AS (
+                DELETE FROM {DEFAULT_PARTITION}
+                WHERE expires_at >= :start AND expires_at < :end
+                RETURNING *
+            )
+            INSERT INTO {name} SELECT * FROM moved
+        """),
+        {"start": start, "end": end},
+    ).rowcount
+
+    connection.execute(text(f"""
+        ALTER TABLE auth_tokens ATTACH PARTITION {name}
+        FOR VALUES FROM ('{start.isoformat()}') TO ('{end.isoformat()}')
+    """))
+
+    return moved_count
+
+
+def create_future_partitions(connection: Connection) -> list[str]:
+    """Create partitions up to the furthest refresh token expiration plus spare partitions.
+
+    Each partition is created in its own transaction under the lock and
+    statement timeouts, a partition that times out is created on the next
+    run. A range with more than AUTH_TOKENS_PARTITION_MOVE_MAX_ROWS rows in
+    the default partition is not created, those rows stay in the default
+    partition and are deleted by the reaper once expired, ranges ahead of
+    them are still created.
+    """
+    width = datetime.timedelta(days=app_config.AUTH_TOKENS_PARTITION_DAYS)
+    now = datetime.datetime.now(datetime.timezone.utc)
+    max_rows = app_config.AUTH_TOKENS_PARTITION_MOVE_MAX_ROWS
+
+    start = get_partition_start(now)
+    until = now + datetime.timedelta(days=app_config.JWT_REFRESH_TOKEN_DURATION_DAYS) + width * app_config.AUTH_TOKENS_PARTITIONS_AHEAD
+
+    existing = set(connection.scalars(text(QUERY_GET_PARTITIONS)).all())
+    connection.commit()
+
+    created = []
+
+    while start < until:
+        name = f"{PARTITION_PREFIX}{start:%Y%m%d}"
+        end = start + width
+
+        if name not in existing:
+            try:
+                set_timeouts(connection=connection)
+
+                # Counted before locking, so a large range never holds the lock
+                if count_default_rows(connection=connection, start=start, end=end, limit=max_rows + 1) > max_rows:
+                    connection.rollback()
+                    log_error.add_error(f"Partition {name} not created, {DEFAULT_PARTITION} holds more than {max_rows} rows in its range")
+                    start = end
+                    continue
+
+                moved_count = create_partition(connection=connection, name=name, start=start, end=end)
+                connection.commit()
+            except OperationalError as e:
+                connection.rollback()
+
+                if not is_timeout(e):
+                    raise
+
+                log_error.add_error(f"Partition {name} not created, timeout: {e.orig}")
+            else:
+                created.append(name)
+
+                if moved_count:
+                    log_error.add_error(f"Partition {name} created, moved {moved_count} rows from {DEFAULT_PARTITION}")
+
+        start = end
+
+    return created
+
+
+def drop_expired_partitions(connection: Connection) -> list[str]:
+    """Drop partitions whose every token is expired.
+
+    DROP locks auth_tokens exclusively, so each partition is dropped in its
+    own transaction under the lock and statement timeouts, a partition that
+    times out is dropped on the next run. DETACH PARTITION CONCURRENTLY is not allowed
+    while the default partition exists.
+    """
+    now = datetime.datetime.now(datetime.timezone.utc)
+
+    partitions = connection.execute(text(QUERY_GET_PARTITIONS)).all()
+    connection.commit()
+
+    dropped = []
+
+    for partition in partitions:
+        # Default partition has no upper bound
+        match = BOUND_UPPER_PATTERN.search(partition.bound)
+
+        if not match or datetime.datetime.fromisoformat(match.group(1)) > now:
+            continue
+
+        try:
+            set_timeouts(connection=connection)
+            connection.execute(text(f'DROP TABLE "{partition.name}"'))
+            connection.commit()
+        except OperationalError as e:
+            connection.rollback()
+
+            if not is_timeout(e):
+                raise
+
+            log_error.add_error(f"Partition {partition.name} not dropped, timeout: {e.orig}")
+        else:
+            dropped.append(partition.name)
+
+    return dropped
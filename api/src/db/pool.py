@@ -0,0 +1,86 @@
+import threading
+import time
+from bisect import bisect_left
+
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import QueuePool
+
+
+# Upper bounds of checkout wait time buckets, in milliseconds
+WAIT_TIME_BUCKETS_MS = (1, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+
+
+class PoolMetrics:
+    """Checkout counters and wait time histogram of one connection pool.
+
+    Wait time is measured around the pool checkout, so it shows how long
+    requests queue for a connection (or open a new one), not query time.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.checkouts = 0
+        self.timeouts = 0
+        self._wait_time_total = 0.0
+        self._wait_time_max = 0.0
+        self._wait_time_counts = [0] * (len(WAIT_TIME_BUCKETS_MS) + 1)
+
+    def observe_checkout(self, wait_time: float):
+        with self._lock:
+            self.checkouts += 1
+            self._wait_time_total += wait_time
+            self._wait_time_max = max(self._wait_time_max, wait_time)
+            self._wait_time_counts[bisect_left(WAIT_TIME_BUCKETS_MS, wait_time * 1000)] += 1
+
+    def observe_timeout(self):
+        with self._lock:
+            self.timeouts += 1
+
+    def stats(self, pool: QueuePool) -> dict:
+        """Get live pool state along with checkout stats"""
+        with self._lock:
+            # Cumulative counts, like Prometheus "le" buckets
+            buckets = {}
+            total = 0
+
+            for bound, count in zip(WAIT_TIME_BUCKETS_MS + ("inf",), self._wait_time_counts):
+                total += count
+                buckets[f"le_{bound}ms" if bound != "inf" else "le_inf"] = total
+
+            return {
+                "size": pool.size(),
+                "checked_in": pool.checkedin(),
+                "checked_out": pool.checkedout(),
+                # Negative while the pool itself is not full
+                "overflow": max(pool.overflow(), 0),
+                "checkouts": self.checkouts,
+                "timeouts": self.timeouts,
+                "wait_time_avg_ms": round(self._wait_time_total / self.checkouts * 1000, 3) if self.checkouts else 0.0,
+                "wait_time_max_ms": round(self._wait_time_max * 1000, 3),
+                "wait_time_histogram": buckets,
+            }
+
+
+def create_instrumented_pool_class(pool_class: type[QueuePool], metrics: PoolMetrics) -> type[QueuePool]:
+    """Subclass a pool to time every checkout.
+
+    The subclass keeps the metrics across pool.recreate(), e.g. after
+    engine.dispose() or pre-ping invalidation.
+    """
+    class InstrumentedPool(pool_class):
+        def _do_get(self):
+            started = time.perf_counter()
+
+            try:
+                connection = super()._do_get()
+            except PoolTimeoutError:
+                metrics.observe_timeout()
+                raise
+
+            metrics.observe_checkout(time.perf_counter() - started)
+
+            return connection
+
+    InstrumentedPool.__name__ = f"Instrumented{pool_class.__name__}"
+
+    return InstrumentedPool
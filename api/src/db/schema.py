@@ -1,3 +1,6 @@
+from src.config import app_config
+
+
 QUERY_CREATE_TABLES = """
     CREATE TABLE IF NOT EXISTS users (
         user_id BIGSERIAL PRIMARY KEY,
@@ -10,16 +13,19 @@ QUERY_CREATE_TABLES = """
         created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
         updated_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
         verified_at TIMESTAMP WITH TIME ZONE,
-        reset_code VARCHAR(20),
-        verify_code VARCHAR(20),
         is_verified BOOLEAN DEFAULT FALSE,
         is_active BOOLEAN DEFAULT TRUE,
-        is_deleted BOOLEAN DEFAULT FALSE
+        is_deleted BOOLEAN DEFAULT FALSE,
+        token_epoch INT NOT NULL DEFAULT 0
     );
 
+    CREATE UNIQUE INDEX IF NOT EXISTS users_email_key ON users (lower(email)) WHERE is_deleted = false;
+
     CREATE TABLE IF NOT EXISTS roles (
         role_id SERIAL PRIMARY KEY,
         role_name VARCHAR(30) NOT NULL,
+        version INT NOT NULL DEFAULT 1,
+        capability_mask BIGINT NOT NULL DEFAULT 0,
         created_by BIGINT NOT NULL DEFAULT 1,
         created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
         updated_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP
@@ -31,25 +37,95 @@ QUERY_CREATE_TABLES = """
         PRIMARY KEY (role_id, capability_id)
     );
 
+    CREATE TABLE IF NOT EXISTS capability_bits (
+        capability_id VARCHAR(50) PRIMARY KEY,
+        bit SMALLINT NOT NULL UNIQUE
+    );
+
+    CREATE TABLE IF NOT EXISTS auth_codes (
+        user_id BIGINT NOT NULL,
+        purpose VARCHAR(20) NOT NULL,
+        code_digest CHAR(64) NOT NULL,
+        attempts INT NOT NULL DEFAULT 0,
+        created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
+        expires_at TIMESTAMP WITH TIME ZONE NOT NULL,
+        PRIMARY KEY (user_id, purpose)
+    );
+
+    CREATE INDEX IF NOT EXISTS auth_codes_expires_at_idx ON auth_codes (expires_at);
+
+    CREATE TABLE IF NOT EXISTS revoked_tokens (
+        jti VARCHAR(64) PRIMARY KEY,
+        expires_at TIMESTAMP WITH TIME ZONE NOT NULL
+    );
+
+    CREATE INDEX IF NOT EXISTS revoked_tokens_expires_at_idx ON revoked_tokens (expires_at);
+
+    CREATE TABLE IF NOT EXISTS schema_migrations (
+        migration_id VARCHAR(100) PRIMARY KEY,
+        applied_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP
+    );
+"""
+
+QUERY_CREATE_AUTH_TOKENS_TABLE = """
     CREATE TABLE IF NOT EXISTS auth_tokens (
         auth_id BIGSERIAL PRIMARY KEY,
         user_id BIGINT NOT NULL,
-        refresh_token TEXT NOT NULL,
+        token_digest CHAR(64) NOT NULL,
         user_agent TEXT,
         ip_address VARCHAR(30),
         metadata JSONB,
         created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
         expires_at TIMESTAMP WITH TIME ZONE
     );
+
+    CREATE UNIQUE INDEX IF NOT EXISTS auth_tokens_token_digest_key ON auth_tokens (token_digest);
+    CREATE INDEX IF NOT EXISTS auth_tokens_expires_at_idx ON auth_tokens (expires_at);
+    CREATE INDEX IF NOT EXISTS auth_tokens_user_id_created_at_idx ON auth_tokens (user_id, created_at DESC, auth_id DESC);
+"""
+
+# Partitioned by expiration date, expired partitions are dropped as a whole.
+# Unique constraints must include the partition key, random token digests
+# are indexed without a unique constraint.
+QUERY_CREATE_AUTH_TOKENS_PARTITIONED_TABLE = """
+    CREATE TABLE IF NOT EXISTS auth_tokens (
+        auth_id BIGSERIAL,
+        user_id BIGINT NOT NULL,
+        token_digest CHAR(64) NOT NULL,
+        user_agent TEXT,
+        ip_address VARCHAR(30),
+        metadata JSONB,
+        created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
+        expires_at TIMESTAMP WITH TIME ZONE NOT NULL,
+        PRIMARY KEY (auth_id, expires_at)
+    ) PARTITION BY RANGE (expires_at);
+
+    CREATE INDEX IF NOT EXISTS auth_tokens_token_digest_idx ON auth_tokens (token_digest);
+    CREATE INDEX IF NOT EXISTS auth_tokens_expires_at_idx ON auth_tokens (expires_at);
+    CREATE INDEX IF NOT EXISTS auth_tokens_user_id_created_at_idx ON auth_tokens (user_id, created_at DESC, auth_id DESC);
+
+    CREATE TABLE IF NOT EXISTS auth_tokens_default PARTITION OF auth_tokens DEFAULT;
 """
 
 QUERY_DROP_TABLES = """
     DROP TABLE IF EXISTS users;
     DROP TABLE IF EXISTS roles;
     DROP TABLE IF EXISTS role_capabilities;
+    DROP TABLE IF EXISTS capability_bits;
     DROP TABLE IF EXISTS auth_tokens;
+    DROP TABLE IF EXISTS auth_codes;
+    DROP TABLE IF EXISTS revoked_tokens;
+    DROP TABLE IF EXISTS schema_migrations;
 """
 
+def get_create_auth_tokens_table_query() -> str:
+    """Get auth tokens table query of configured layout"""
+    if app_config.AUTH_TOKENS_PARTITIONED:
+        return QUERY_CREATE_AUTH_TOKENS_PARTITIONED_TABLE
+
+    return QUERY_CREATE_AUTH_TOKENS_TABLE
+
+
 QUERY_INSERT_DATA = """
     INSERT INTO roles (role_id, role_name, created_by) VALUES
         (1, 'Super Admin', 1),
@@ -1,15 +1,20 @@
-from fastapi import Depends, HTTPException, status
-from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
-from jose import JWTError
+import hmac
 
+from fastapi import Depends, Header, HTTPException, Request, status
+from fastapi.routing import APIRoute
+from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
 from src.config import app_config
-from src.models.auth import AuthPayload
+from src.db import open_async_db_session
+from src.error import InvalidTokenError, UnauthorizedError, ERROR_MESSAGES
+from src.models.auth import AuthPayload, Principal
 from src.services.auth import verify_token
+from src.services.revocation import revocation_store
+from src.services.user import get_claims_principal, load_principal
 
 
 security = HTTPBearer(auto_error=False)
 
-def authorize_token(credentials: HTTPAuthorizationCredentials = Depends(security)) -> AuthPayload:
+async def authorize_token(credentials: HTTPAuthorizationCredentials = Depends(security)) -> AuthPayload:
     if not credentials:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -19,9 +24,96 @@ def authorize_token(credentials: HTTPAuthorizationCredentials = Depends(security
     token = credentials.credentials
 
     try:
-        return verify_token(token=token)
-    except JWTError as e:
+        payload = verify_token(token=token)
+    except InvalidTokenError as e:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail=str(e) if app_config.ENV != "production" else "Unauthorized",
+        )
+
+    # Reject revoked tokens without a database query
+    if revocation_store.is_revoked(payload):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Token is revoked" if app_config.ENV != "production" else "Unauthorized",
+        )
+
+    return payload
+
+
+async def get_principal(
+        request: Request,
+        payload: AuthPayload = Depends(authorize_token),
+    ) -> Principal:
+    # Resolved once per request, shared by handlers and capability checks
+    principal = getattr(request.state, "principal", None)
+
+    if principal is not None:
+        return principal
+
+    try:
+        # Embedded claims need no session while the role cache is fresh
+        principal = get_claims_principal(payload=payload)
+
+        # Otherwise a short session loads the user or the roles, its
+        # connection is back in the pool before the handler checks out one
+        if principal is None:
+            async with open_async_db_session() as session:
+                principal = await load_principal(session=session, payload=payload)
+    except UnauthorizedError as e:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail=str(e) if app_config.ENV != "production" else "Unauthorized",
         )
+
+    request.state.principal = principal
+
+    return principal
+
+
+def require(*capabilities: str):
+    """Declare capabilities of a route, any of them grants access.
+
+    Used as ``dependencies=[require(READ_USER)]``. Route dependencies run
+    before the request body is validated and before the handler session is
+    opened. With embedded claims and a fresh role cache no session is used,
+    otherwise get_principal opens a short session for one query.
+    """
+    async def check_capabilities(principal: Principal = Depends(get_principal)):
+        if not principal.can(list(capabilities)):
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN,
+                detail=ERROR_MESSAGES["forbidden"],
+            )
+
+    # Read back by get_required_capabilities
+    check_capabilities.required_capabilities = tuple(capabilities)
+
+    return Depends(check_capabilities)
+
+
+def get_required_capabilities(route: APIRoute) -> list[str]:
+    """Get capabilities declared with require() on a route"""
+    capabilities = []
+
+    for dependency in route.dependencies:
+        for capability in getattr(dependency.dependency, "required_capabilities", ()):
+            if capability not in capabilities:
+                capabilities.append(capability)
+
+    return capabilities
+
+
+def authorize_internal(x_internal_key: str = Header(default="")):
+    # Internal endpoints are hidden when no key is configured
+    if not app_config.INTERNAL_API_KEY:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Not Found",
+        )
+
+    if not hmac.compare_digest(x_internal_key, app_config.INTERNAL_API_KEY):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Unauthorized",
+        )
@@ -4,6 +4,12 @@ class UnauthorizedError(Exception):
         super().__init__(*args)
 
 
+class InvalidTokenError(Exception):
+    """Exception raised when access token is malformed, tampered or expired."""
+    def __init__(self, *args):
+        super().__init__(*args)
+
+
 class ForbiddenError(Exception):
     """Exception raised when user does not have permission to access a resource."""
     def __init__(self, *args):
@@ -16,6 +22,20 @@ class DataNotFoundError(Exception):
         super().__init__(*args)
 
 
+class ServiceUnavailableError(Exception):
+    """Exception raised when server is too busy to handle the request."""
+    def __init__(self, *args, retry_after: int = 1):
+        super().__init__(*args)
+        self.retry_after = retry_after
+
+
+class TooManyRequestsError(Exception):
+    """Exception raised when client exceeds the allowed request rate."""
+    def __init__(self, *args, retry_after: int = 1):
+        super().__init__(*args)
+        self.retry_after = retry_after
+
+
 ERROR_MESSAGES = {
     "unauthorized": "Unauthorized",
     "forbidden": "You do not have permission to access this resource",
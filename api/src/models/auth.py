@@ -1,5 +1,67 @@
+from src.services.capability_registry import capability_registry
+
+
 class AuthPayload:
     user_id: str
+    exp: int
+    role_id: int | None
+    role_version: int | None
+    capabilities: list[str] | None
+    jti: str | None
+    epoch: int | None
 
-    def __init__(self, user_id: str):
+    def __init__(
+            self,
+            user_id: str,
+            exp: int = 0,
+            role_id: int | None = None,
+            role_version: int | None = None,
+            capabilities: list[str] | None = None,
+            jti: str | None = None,
+            epoch: int | None = None,
+        ):
         self.user_id = user_id
+        self.exp = exp
+        self.role_id = role_id
+        self.role_version = role_version
+        self.capabilities = capabilities
+        self.jti = jti
+        self.epoch = epoch
+
+
+class Principal:
+    """Current user resolved once per request.
+
+    Profile fields are only loaded when the user row is queried, they are
+    None when the principal is built from access token claims.
+    """
+
+    user_id: int
+    role_id: int | None
+    capability_mask: int
+    payload: AuthPayload
+    email: str | None
+    full_name: str | None
+    is_active: bool | None
+
+    def __init__(
+            self,
+            user_id: int,
+            role_id: int | None,
+            capability_mask: int,
+            payload: AuthPayload,
+            email: str | None = None,
+            full_name: str | None = None,
+            is_active: bool | None = None,
+        ):
+        self.user_id = user_id
+        self.role_id = role_id
+        self.capability_mask = capability_mask
+        self.payload = payload
+        self.email = email
+        self.full_name = full_name
+        self.is_active = is_active
+
+    def can(self, capabilities: list[str]) -> bool:
+        """Verify if principal has any of the capabilities"""
+        return bool(self.capability_mask & capability_registry.get_mask(capabilities))
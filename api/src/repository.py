@@ -7,6 +7,7 @@ from sqlalchemy import (
     BigInteger,
     Text,
     ForeignKey,
+    Index,
 )
 
 from sqlalchemy.dialects.postgresql import JSONB
@@ -28,18 +29,24 @@ class User(Base):
     is_verified = Column(Boolean, default=False)
     is_active = Column(Boolean, default=False)
     is_deleted = Column(Boolean, default=False)
-    reset_code = Column(String(20))
-    verify_code = Column(String(20))
+    token_epoch = Column(Integer, nullable=False, default=0)
     verified_at = Column(DateTime(timezone=True))
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
 
+    # Unique email among active users, lookups filter on lower(email)
+    __table_args__ = (
+        Index("users_email_key", func.lower(email), unique=True, postgresql_where=is_deleted == False),
+    )
+
 
 class Role(Base):
     __tablename__ = "roles"
 
     role_id = Column(Integer, autoincrement=True, primary_key=True, nullable=False, index=True)
     role_name = Column(String(30), nullable=False)
+    version = Column(Integer, nullable=False, default=1)
+    capability_mask = Column(BigInteger, nullable=False, default=0)
     created_by = Column(BigInteger, ForeignKey("users.user_id"), nullable=False)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
@@ -57,9 +64,27 @@ class AuthToken(Base):
 
     auth_id = Column(BigInteger, autoincrement=True, primary_key=True, nullable=False, index=True)
     user_id = Column(BigInteger, ForeignKey("users.user_id"), nullable=False)
-    refresh_token = Column(Text, nullable=False)
+    token_digest = Column(String(64), nullable=False, unique=True)
     user_agent = Column(Text, nullable=True)
     ip_address = Column(String(30), nullable=True)
     log_metadata = Column("metadata", JSONB)
-    expires_at = Column(DateTime(timezone=True))
+    expires_at = Column(DateTime(timezone=True), index=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+
+class AuthCode(Base):
+    __tablename__ = "auth_codes"
+
+    user_id = Column(BigInteger, ForeignKey("users.user_id"), nullable=False, primary_key=True)
+    purpose = Column(String(20), nullable=False, primary_key=True)
+    code_digest = Column(String(64), nullable=False)
+    attempts = Column(Integer, nullable=False, default=0)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
+    expires_at = Column(DateTime(timezone=True), nullable=False, index=True)
+
+
+class RevokedToken(Base):
+    __tablename__ = "revoked_tokens"
+
+    jti = Column(String(64), nullable=False, primary_key=True)
+    expires_at = Column(DateTime(timezone=True), nullable=False, index=True)
@@ -1,9 +1,14 @@
 from fastapi import FastAPI, APIRouter
+from fastapi.routing import APIRoute
+
+from src.dependencies.auth import get_required_capabilities
 
 from .auth.routes import auth_router
 from .account.routes import account_router
 from .role.routes import role_router
 from .user.routes import user_router
+from .internal.routes import internal_router
+from .jwks.routes import jwks_router
 
 
 # Global app routers variable
@@ -12,6 +17,8 @@ app_routers = [
     account_router,
     role_router,
     user_router,
+    internal_router,
+    jwks_router,
 ]
 
 
@@ -28,4 +35,17 @@ def load_routers(app: FastAPI):
     for route in app_routers:
         app.include_router(router=route)
 
+    # Publish route capabilities in OpenAPI
+    for route in app.routes:
+        if not isinstance(route, APIRoute):
+            continue
+
+        capabilities = get_required_capabilities(route)
+
+        if capabilities:
+            route.openapi_extra = {
+                **(route.openapi_extra or {}),
+                "x-required-capabilities": capabilities,
+            }
+
     return app
@@ -1,63 +1,90 @@
-from fastapi import Request, HTTPException, status
-from sqlalchemy import select
-from sqlalchemy.orm import Session, load_only
+import hashlib
+import json
+
+from fastapi import Request, Response, HTTPException, status
+from fastapi.responses import JSONResponse
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import load_only
 from sqlalchemy.sql import func
 
 from lib.log_error import log_error
+from lib.user_agent import parse_user_agent
 from src.config import app_config
-from src.models.auth import AuthPayload
-from src.repository import User, RoleCapabilities, AuthToken
-from src.services.auth import verify_password, encrypt_password
-from src.error import DataNotFoundError
+from src.models.auth import AuthPayload, Principal
+from src.repository import User, AuthToken
+from src.services.auth import verify_password, encrypt_password, hash_token
+from src.services.auth_token import (
+    delete_refresh_tokens,
+    get_active_refresh_tokens,
+    encode_tokens_cursor,
+    decode_tokens_cursor,
+)
+from src.services.events import dispatch_event
+from src.services.revocation import revoke_user_tokens
+from src.services.role_cache import role_capability_cache
+from src.error import DataNotFoundError, ServiceUnavailableError
 
 from .models import (
     UpdateProfileRequest,
     ChangePasswordRequest,
     RevokeTokenRequest,
     RevokeOtherSessionsRequest,
+    CanRequest,
 )
 
 
-def get_profile_me_handler(
+# Maximum tokens per page
+MAX_TOKENS_LIMIT = 100
+
+# Maximum capabilities per permission query
+MAX_CAN_CAPABILITIES = 100
+
+
+async def get_profile_me_handler(
         request: Request,
         with_role_access: bool,
-        payload: AuthPayload,
-        session: Session,
+        principal: Principal,
+        session: AsyncSession,
     ):
     try:
-        stmt = select(
-            User,
-        ).options(
-            load_only(
-                User.email,
-                User.full_name,
-                User.role,
+        # Principal loaded from database already has the profile
+        if principal.email is not None:
+            profile = {
+                "email": principal.email,
+                "full_name": principal.full_name,
+                "role": principal.role_id,
+                "user_id": principal.user_id,
+            }
+        else:
+            profile = await session.scalar(
+                statement=select(
+                    User,
+                ).options(
+                    load_only(
+                        User.email,
+                        User.full_name,
+                        User.role,
+                    )
+                ).where(
+                    User.user_id == principal.user_id,
+                    User.is_deleted == False,
+                ),
             )
-        ).where(
-            User.user_id == int(payload.user_id),
-            User.is_deleted == False,
-        )
-
-        profile = session.scalar(
-            statement=stmt,
-        )
 
         if not profile:
             raise DataNotFoundError("Profile is not found")
 
         # Get role access if True
         if with_role_access:
-            role_access = session.scalars(
-                select(
-                    RoleCapabilities.capability_id,
-                ).filter(
-                    RoleCapabilities.role_id == profile.role,
-                )
-            ).all()
+            role_access = await role_capability_cache.get_capabilities(
+                session=session,
+                role_id=principal.role_id,
+            )
 
             return {
                 "profile": profile,
-                "role_access": role_access,
+                "role_access": sorted(role_access or []),
             }
 
         return {
@@ -80,26 +107,20 @@ def get_profile_me_handler(
         )
 
 
-def get_my_role_capabilities_handler(
+async def get_my_role_capabilities_handler(
         request: Request,
-        payload: AuthPayload,
-        session: Session,
+        principal: Principal,
+        session: AsyncSession,
     ):
     try:
-        capabilities = session.scalars(
-            select(
-                RoleCapabilities.capability_id,
-            ).join(
-                User,
-                User.role == RoleCapabilities.role_id,
-            ).filter(
-                User.user_id == int(payload.user_id),
-                User.is_deleted.is_(False),
-            )
-        ).all()
+        # Get role capabilities from memory
+        capabilities = await role_capability_cache.get_capabilities(
+            session=session,
+            role_id=principal.role_id,
+        )
 
         return {
-            "capabilities": capabilities,
+            "capabilities": sorted(capabilities or []),
         }
     except Exception as e:
         log_error.add_error(
@@ -113,34 +134,142 @@ def get_my_role_capabilities_handler(
         )
 
 
-def update_profile_handler(
+def get_can_map(principal: Principal, capabilities: list[str]) -> dict[str, bool]:
+    """Check each capability against the principal mask, without queries"""
+    if not capabilities:
+        raise ValueError("Capabilities are required")
+
+    if len(capabilities) > MAX_CAN_CAPABILITIES:
+        raise ValueError(f"Maximum {MAX_CAN_CAPABILITIES} capabilities per request")
+
+    return {
+        capability: principal.can([capability])
+        for capability in capabilities
+    }
+
+
+async def can_handler(
+        request: Request,
+        params: CanRequest,
+        principal: Principal,
+    ):
+    try:
+        # Never cached, cacheable checks use GET /account/can
+        return JSONResponse(
+            content={
+                "can": get_can_map(principal=principal, capabilities=params.capabilities),
+            },
+            headers={
+                "Cache-Control": "private, no-store",
+                "Vary": "Authorization",
+            },
+        )
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e),
+        )
+    except Exception as e:
+        log_error.add_error(
+            message="An error occurred during check capabilities",
+            exc_info=e,
+        )
+
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="An error occurred during check capabilities" if app_config.ENV == "production" else str(e),
+        )
+
+
+async def get_can_handler(
+        request: Request,
+        capabilities: list[str],
+        principal: Principal,
+        session: AsyncSession,
+    ):
+    try:
+        can = get_can_map(principal=principal, capabilities=capabilities)
+
+        # Answer only changes with the role or its version
+        role = await role_capability_cache.get_role(
+            session=session,
+            role_id=principal.role_id,
+        )
+
+        etag = '"%s"' % hashlib.sha256(json.dumps([
+            principal.role_id,
+            role.version if role else None,
+            sorted(set(capabilities)),
+        ]).encode("utf-8")).hexdigest()[:32]
+
+        max_age = app_config.PERMISSION_CACHE_MAX_AGE
+
+        headers = {
+            "ETag": etag,
+            "Cache-Control": f"private, max-age={max_age}" if max_age > 0 else "private, no-cache",
+            "Vary": "Authorization",
+        }
+
+        if_none_match = request.headers.get("if-none-match", "")
+
+        if etag in [value.strip() for value in if_none_match.split(",")]:
+            return Response(
+                status_code=status.HTTP_304_NOT_MODIFIED,
+                headers=headers,
+            )
+
+        return JSONResponse(
+            content={
+                "can": can,
+            },
+            headers=headers,
+        )
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e),
+        )
+    except Exception as e:
+        log_error.add_error(
+            message="An error occurred during check capabilities",
+            exc_info=e,
+        )
+
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="An error occurred during check capabilities" if app_config.ENV == "production" else str(e),
+        )
+
+
+async def update_profile_handler(
         request: Request,
         params: UpdateProfileRequest,
-        payload: AuthPayload,
-        session: Session,
+        principal: Principal,
+        session: AsyncSession,
     ):
     try:
         # Validate request params
         if not params.full_name:
             raise ValueError("Full name is required")
 
-        # Check if profile is exists
-        profile = session.query(
-            User,
-        ).filter(
-            User.user_id == int(payload.user_id),
-            User.is_deleted == False,
-        ).first()
+        # Update profile data without loading it first
+        result = await session.execute(
+            update(
+                User,
+            ).where(
+                User.user_id == principal.user_id,
+                User.is_deleted == False,
+            ).values(
+                full_name=params.full_name,
+                updated_at=func.now(),
+            )
+        )
 
-        if not profile:
+        if not result.rowcount:
             raise DataNotFoundError("Profile not found")
 
-        # Update profile data
-        profile.full_name = params.full_name
-        profile.updated_at = func.now()
-
         # Commit transactions
-        session.commit()
+        await session.commit()
 
         return {
             "data": {
@@ -158,7 +287,7 @@ def update_profile_handler(
             detail=str(e),
         )
     except Exception as e:
-        session.rollback()
+        await session.rollback()
 
         log_error.add_error(
             message="An error occurred during update profile",
@@ -171,11 +300,11 @@ def update_profile_handler(
         )
 
 
-def change_password_handler(
+async def change_password_handler(
         request: Request,
         params: ChangePasswordRequest,
         payload: AuthPayload,
-        session: Session,
+        session: AsyncSession,
     ):
     try:
         # Validate request params
@@ -191,26 +320,40 @@ def change_password_handler(
             raise ValueError("Invalid confirm password")
 
         # Check if profile is exists
-        profile = session.query(
-            User,
-        ).filter(
-            User.user_id == int(payload.user_id),
-            User.is_deleted == False,
-        ).first()
+        profile = await session.scalar(
+            select(
+                User,
+            ).filter(
+                User.user_id == int(payload.user_id),
+                User.is_deleted == False,
+            )
+        )
 
         if not profile:
             raise DataNotFoundError("Profile not found")
 
         # Verify old password
-        if not verify_password(password=params.old_password, hashed_password=profile.password):
+        if not await verify_password(password=params.old_password, hashed_password=profile.password):
             raise ValueError("Invalid old password")
 
         # Update user password
-        profile.password = encrypt_password(password=params.new_password)
+        profile.password = await encrypt_password(password=params.new_password)
         profile.updated_at = func.now()
 
+        # Sign out other sessions, keeping the current session when it is given
+        await delete_refresh_tokens(
+            session=session,
+            user_ids=[profile.user_id],
+            except_token_digest=hash_token(params.refresh_token) if params.refresh_token else None,
+        )
+
+        # Revoke issued access tokens
+        event = await revoke_user_tokens(session=session, user_id=profile.user_id)
+
         # Commit transactions
-        session.commit()
+        await session.commit()
+
+        dispatch_event(event)
 
         return {
             "data": {
@@ -227,8 +370,14 @@ def change_password_handler(
             status_code=status.HTTP_404_NOT_FOUND,
             detail=str(e),
         )
+    except ServiceUnavailableError as e:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=str(e),
+            headers={"Retry-After": str(e.retry_after)},
+        )
     except Exception as e:
-        session.rollback()
+        await session.rollback()
 
         log_error.add_error(
             message="An error occurred during change password",
@@ -241,32 +390,49 @@ def change_password_handler(
         )
 
 
-def get_user_tokens_handler(
+async def get_user_tokens_handler(
         request: Request,
         payload: AuthPayload,
-        session: Session,
+        session: AsyncSession,
+        cursor: str = "",
+        limit: int = 20,
     ):
     try:
-        # Get user tokens
-        results = session.query(
-            AuthToken.auth_id,
-            AuthToken.created_at,
-            AuthToken.ip_address,
-            AuthToken.user_agent,
-        ).filter(
-            AuthToken.user_id == int(payload.user_id),
-        ).all()
+        # Validate request params
+        if limit < 1 or limit > MAX_TOKENS_LIMIT:
+            raise ValueError(f"Limit must be between 1 and {MAX_TOKENS_LIMIT}")
+
+        # Get a page of active tokens, one extra row tells if there is a next page
+        results = await get_active_refresh_tokens(
+            session=session,
+            user_id=int(payload.user_id),
+            limit=limit + 1,
+            cursor=decode_tokens_cursor(cursor) if cursor else None,
+        )
+
+        next_cursor = None
+
+        if len(results) > limit:
+            results = results[:limit]
+            next_cursor = encode_tokens_cursor(results[-1].created_at, results[-1].auth_id)
 
         tokens = [dict(
             auth_id=token.auth_id,
             created_at=token.created_at,
             ip_address=token.ip_address,
             user_agent=token.user_agent,
+            device=(token.log_metadata or {}).get("device") or parse_user_agent(token.user_agent),
         ) for token in results]
 
         return {
             "tokens": tokens,
+            "next_cursor": next_cursor,
         }
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e),
+        )
     except Exception as e:
         log_error.add_error(
             message="An error occurred during get user tokens",
@@ -279,11 +445,11 @@ def get_user_tokens_handler(
         )
 
 
-def revoke_token_handler(
+async def revoke_token_handler(
         request: Request,
         params: RevokeTokenRequest,
         payload: AuthPayload,
-        session: Session,
+        session: AsyncSession,
     ):
     try:
         # Validate request params
@@ -291,21 +457,23 @@ def revoke_token_handler(
             raise ValueError("Token ID is required")
 
         # Check if token is exists
-        token = session.query(
-            AuthToken,
-        ).filter(
-            AuthToken.auth_id == params.token_id,
-            AuthToken.user_id == int(payload.user_id),
-        ).first()
+        token = await session.scalar(
+            select(
+                AuthToken,
+            ).filter(
+                AuthToken.auth_id == params.token_id,
+                AuthToken.user_id == int(payload.user_id),
+            )
+        )
 
         if not token:
             raise DataNotFoundError("Token not found")
 
         # Delete token
-        session.delete(token)
+        await session.delete(token)
 
         # Commit transactions
-        session.commit()
+        await session.commit()
 
         return {
             "data": {
@@ -323,7 +491,7 @@ def revoke_token_handler(
             detail=str(e),
         )
     except Exception as e:
-        session.rollback()
+        await session.rollback()
 
         log_error.add_error(
             message="An error occurred during revoke token",
@@ -336,37 +504,30 @@ def revoke_token_handler(
         )
 
 
-def revoke_other_sessions_handler(
+async def revoke_other_sessions_handler(
         request: Request,
         params: RevokeOtherSessionsRequest,
         payload: AuthPayload,
-        session: Session,
+        session: AsyncSession,
     ):
     try:
         # Validate request params
         if not params.refresh_token:
             raise ValueError("Refresh token is required")
 
-        # Check if token is exists
-        tokens = session.query(
-            AuthToken,
-        ).filter(
-            AuthToken.user_id == int(payload.user_id),
-        ).all()
-
-        if not tokens:
-            raise DataNotFoundError("Token not found")
-
         # Delete all tokens except current session
-        for token in tokens:
-            if token.refresh_token != params.refresh_token:
-                session.delete(token)
+        deleted_count = await delete_refresh_tokens(
+            session=session,
+            user_ids=[int(payload.user_id)],
+            except_token_digest=hash_token(params.refresh_token),
+        )
 
         # Commit transactions
-        session.commit()
+        await session.commit()
 
         return {
             "data": {
+                "deleted_count": deleted_count,
                 "status": "other_tokens_deleted",
             },
         }
@@ -375,13 +536,8 @@ def revoke_other_sessions_handler(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail=str(e),
         )
-    except DataNotFoundError as e:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail=str(e),
-        )
     except Exception as e:
-        session.rollback()
+        await session.rollback()
 
         log_error.add_error(
             message="An error occurred during revoke token",
@@ -9,6 +9,7 @@ class ChangePasswordRequest(BaseModel):
     old_password: str = ""
     new_password: str = ""
     confirm_password: str = ""
+    refresh_token: str = ""
 
 
 class RevokeTokenRequest(BaseModel):
@@ -17,3 +18,7 @@ class RevokeTokenRequest(BaseModel):
 
 class RevokeOtherSessionsRequest(BaseModel):
     refresh_token: str = ""
+
+
+class CanRequest(BaseModel):
+    capabilities: list[str] = []
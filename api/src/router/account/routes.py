@@ -1,20 +1,23 @@
-from fastapi import APIRouter, Depends, Request
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, Query, Request
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from src.db import db_session
-from src.dependencies.auth import authorize_token
-from src.models.auth import AuthPayload
+from src.db import async_db_session
+from src.dependencies.auth import authorize_token, get_principal
+from src.models.auth import AuthPayload, Principal
 
 from .models import (
     UpdateProfileRequest,
     ChangePasswordRequest,
     RevokeTokenRequest,
     RevokeOtherSessionsRequest,
+    CanRequest,
 )
 
 from .handlers import (
     get_profile_me_handler,
     get_my_role_capabilities_handler,
+    can_handler,
+    get_can_handler,
     update_profile_handler,
     change_password_handler,
     get_user_tokens_handler,
@@ -29,67 +32,86 @@ account_router = APIRouter(
 )
 
 @account_router.get("/me")
-def route_get_profile(
+async def route_get_profile(
         request: Request,
         with_role_access: bool = False,
-        payload: AuthPayload = Depends(authorize_token),
-        session: Session = Depends(db_session),
+        principal: Principal = Depends(get_principal),
+        session: AsyncSession = Depends(async_db_session),
     ):
-    return get_profile_me_handler(
+    return await get_profile_me_handler(
         request=request,
         with_role_access=with_role_access,
-        payload=payload,
+        principal=principal,
         session=session,
     )
 
 @account_router.get("/role-access")
-def route_get_my_role_capabilities(
+async def route_get_my_role_capabilities(
         request: Request,
-        payload: AuthPayload = Depends(authorize_token),
-        session: Session = Depends(db_session),
+        principal: Principal = Depends(get_principal),
+        session: AsyncSession = Depends(async_db_session),
+    ):
+    return await get_my_role_capabilities_handler(request=request, principal=principal, session=session)
+
+@account_router.get("/can")
+async def route_get_can(
+        request: Request,
+        capabilities: list[str] = Query(default=[]),
+        principal: Principal = Depends(get_principal),
+        session: AsyncSession = Depends(async_db_session),
     ):
-    return get_my_role_capabilities_handler(request=request, payload=payload, session=session)
+    return await get_can_handler(request=request, capabilities=capabilities, principal=principal, session=session)
+
+@account_router.post("/can")
+async def route_can(
+        request: Request,
+        params: CanRequest,
+        principal: Principal = Depends(get_principal),
+    ):
+    return await can_handler(request=request, params=params, principal=principal)
 
 @account_router.post("/update-profile")
-def route_update_profile(
+async def route_update_profile(
         request: Request,
         params: UpdateProfileRequest,
-        payload: AuthPayload = Depends(authorize_token),
-        session: Session = Depends(db_session),
+        principal: Principal = Depends(get_principal),
+        session: AsyncSession = Depends(async_db_session),
     ):
-    return update_profile_handler(request=request, params=params, payload=payload, session=session)
+    return await update_profile_handler(request=request, params=params, principal=principal, session=session)
 
 @account_router.post("/change-password")
-def route_change_password(
+async def route_change_password(
         request: Request,
         params: ChangePasswordRequest,
         payload: AuthPayload = Depends(authorize_token),
-        session: Session = Depends(db_session),
+        session: AsyncSession = Depends(async_db_session),
     ):
-    return change_password_handler(request=request, params=params, payload=payload, session=session)
+    return await change_password_handler(request=request, params=params, payload=payload, session=session)
 
 @account_router.get("/tokens")
-def route_get_user_tokens(
+async def route_get_user_tokens(
         request: Request,
+        cursor: str = "",
+        limit: int = 20,
         payload: AuthPayload = Depends(authorize_token),
-        session: Session = Depends(db_session),
+        session: AsyncSession = Depends(async_db_session),
     ):
-    return get_user_tokens_handler(request=request, payload=payload, session=session)
+    return await get_user_tokens_handler(request=request, payload=payload, session=session, cursor=cursor, limit=limit)
 
 @account_router.post("/revoke-token")
-def route_revoke_token(
+async def route_revoke_token(
         request: Request,
         params: RevokeTokenRequest,
         payload: AuthPayload = Depends(authorize_token),
-        session: Session = Depends(db_session),
+        session: AsyncSession = Depends(async_db_session),
     ):
-    return revoke_token_handler(request=request, params=params, payload=payload, session=session)
+    return await revoke_token_handler(request=request, params=params, payload=payload, session=session)
 
 @account_router.post("/revoke-other-sessions")
-def route_revoke_other_sessions(
+async def route_revoke_other_sessions(
         request: Request,
         params: RevokeOtherSessionsRequest,
         payload: AuthPayload = Depends(authorize_token),
-        session: Session = Depends(db_session),
+        session: AsyncSession = Depends(async_db_session),
     ):
-    return revoke_other_sessions_handler(request=request, params=params, payload=payload, session=session)
+    return await revoke_other_sessions_handler(request=request, params=params, payload=payload, session=session)
@@ -1,19 +1,41 @@
 import datetime
 
 from fastapi import Request, HTTPException, status
-from sqlalchemy import select
-from sqlalchemy.orm import Session, load_only
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import select, delete
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import load_only
 from sqlalchemy.sql import func
 
 from lib.log_error import log_error
-from lib.validator import is_valid_email
+from lib.validator import is_valid_email, normalize_email
 from lib.generator import generate_random_code
 from src.config import app_config
 from src.models.auth import AuthPayload
 from src.repository import User, AuthToken
-from src.services.auth import verify_password, generate_token, encrypt_password
+from src.services.auth import (
+    verify_password,
+    generate_token,
+    generate_refresh_token,
+    encrypt_password,
+    hash_token,
+    password_needs_rehash,
+    verify_token,
+)
+from src.services.auth_code import (
+    PURPOSE_RESET_PASSWORD,
+    PURPOSE_VERIFY_ACCOUNT,
+    save_auth_code,
+    consume_auth_code,
+)
+from src.services.auth_token import create_refresh_token, rotate_refresh_token, delete_refresh_tokens
+from src.services.client_ip import get_client_ip
+from src.services.events import dispatch_event
+from src.services.login_guard import login_guard
 from src.services.mail import Mail
-from src.error import UnauthorizedError, ForbiddenError, DataNotFoundError
+from src.services.revocation import revocation_store, revoke_user_tokens, revoke_access_token
+from src.services.user import get_user_claims_columns, build_user_claims, get_roles_capabilities
+from src.error import InvalidTokenError, UnauthorizedError, ForbiddenError, DataNotFoundError, ServiceUnavailableError, TooManyRequestsError
 
 from .models import (
     LoginRequest,
@@ -22,11 +44,19 @@ from .models import (
     ResetPasswordRequest,
     ConfirmAccountRequest,
     LogoutRequest,
+    IntrospectRequest,
 )
 
 
-def login_handler(request: Request, params: LoginRequest, session: Session):
+# Maximum tokens per introspection request
+MAX_INTROSPECT_TOKENS = 100
+
+
+async def login_handler(request: Request, params: LoginRequest, session: AsyncSession):
     try:
+        # Normalize email, lookups use the lower(email) index
+        params.email = normalize_email(params.email)
+
         # Validate request params
         if not params.email:
             raise ValueError("Email is required")
@@ -36,24 +66,34 @@ def login_handler(request: Request, params: LoginRequest, session: Session):
         if not params.password:
             raise ValueError("Password is required")
 
-        # Check if email is exists
-        stmt = select(User).options(
+        # Limit attempts before any database query or password hashing
+        await login_guard.check(ip=get_client_ip(request), email=params.email)
+
+        # Check if email is exists, claims are selected along with the user
+        stmt = select(
+            User,
+            *get_user_claims_columns(),
+        ).options(
             load_only(
                 User.user_id,
                 User.password,
+                User.role,
                 User.is_verified,
                 User.is_active,
+                User.token_epoch,
             )
         ).where(
-            User.email == params.email,
+            func.lower(User.email) == params.email,
             User.is_deleted == False,
         )
 
-        user = session.scalar(statement=stmt)
+        row = (await session.execute(statement=stmt)).first()
 
-        if not user:
+        if not row:
             raise DataNotFoundError("User not found")
 
+        user = row.User
+
         # Check if user is verified
         if not user.is_verified:
             raise ValueError("User is not verified")
@@ -63,32 +103,39 @@ def login_handler(request: Request, params: LoginRequest, session: Session):
             raise ValueError("User is not active")
 
         # Verify password
-        if not verify_password(password=params.password, hashed_password=user.password):
+        if not await verify_password(password=params.password, hashed_password=user.password):
             raise ValueError("Incorrect password")
 
-        # Generate token
-        tokens = generate_token(user_id=str(user.user_id))
+        # Upgrade outdated hash while the plain password is known
+        if password_needs_rehash(user.password):
+            try:
+                user.password = await encrypt_password(password=params.password)
+            except ServiceUnavailableError:
+                # Keep the old hash when the hashing pool is busy
+                pass
 
-        # Create refresh token expiration date
-        days_added_from_now = datetime.timedelta(
-            days=int(app_config.JWT_REFRESH_TOKEN_DURATION_DAYS),
+        # Generate token
+        tokens = generate_token(
+            user_id=str(user.user_id),
+            epoch=user.token_epoch,
+            claims=build_user_claims(
+                role_id=user.role,
+                role_version=row.role_version,
+                capability_ids=row.capability_ids,
+            ),
         )
 
-        refresh_token_expiration_date = func.now() + days_added_from_now
-
         # Save refresh token to auth tokens log
-        session.add(
-            AuthToken(
-                user_id=user.user_id,
-                refresh_token=tokens["refresh_token"],
-                user_agent=request.headers.get("user-agent"),
-                ip_address=request.client.host,
-                expires_at=refresh_token_expiration_date,
-            )
+        await create_refresh_token(
+            session=session,
+            user_id=user.user_id,
+            token_digest=hash_token(tokens["refresh_token"]),
+            user_agent=request.headers.get("user-agent"),
+            ip_address=get_client_ip(request),
         )
 
         # Commit transactions
-        session.commit()
+        await session.commit()
 
         return {
             "tokens": tokens,
@@ -103,8 +150,20 @@ def login_handler(request: Request, params: LoginRequest, session: Session):
             status_code=status.HTTP_404_NOT_FOUND,
             detail=str(e),
         )
+    except TooManyRequestsError as e:
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail=str(e),
+            headers={"Retry-After": str(e.retry_after)},
+        )
+    except ServiceUnavailableError as e:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=str(e),
+            headers={"Retry-After": str(e.retry_after)},
+        )
     except Exception as e:
-        session.rollback()
+        await session.rollback()
 
         log_error.add_error(
             message="An error occurred during login",
@@ -117,55 +176,47 @@ def login_handler(request: Request, params: LoginRequest, session: Session):
         )
 
 
-def refresh_token_handler(request: Request, params: RefreshTokenRequest, session: Session):
+async def refresh_token_handler(request: Request, params: RefreshTokenRequest, session: AsyncSession):
     try:
         # Validate request params
         if not params.refresh_token:
             raise ValueError("Refresh token is required")
 
-        # Verify refresh token
-        refresh_token = session.query(
-            AuthToken,
-        ).filter(
-            AuthToken.refresh_token == params.refresh_token,
-        ).first()
+        # Rotate refresh token in a single statement
+        new_refresh_token = generate_refresh_token()
 
-        if not refresh_token:
-            raise ForbiddenError("Invalid refresh token")
+        rotated = await rotate_refresh_token(
+            session=session,
+            token_digest=hash_token(params.refresh_token),
+            new_token_digest=hash_token(new_refresh_token),
+            user_agent=request.headers.get("user-agent"),
+            ip_address=get_client_ip(request),
+        )
 
-        if refresh_token.expires_at <= datetime.datetime.now(datetime.timezone.utc):
-            # Delete the expired refresh token
-            session.delete(refresh_token)
-            session.commit()
-            raise ForbiddenError("Refresh token is expired")
+        # Commit transactions, an expired token is deleted as well
+        await session.commit()
 
-        # Generate new tokens
-        tokens = generate_token(user_id=str(refresh_token.user_id))
+        if not rotated:
+            raise ForbiddenError("Invalid refresh token")
 
-        # Create refresh token expiration date
-        days_added_from_now = datetime.timedelta(
-            days=int(app_config.JWT_REFRESH_TOKEN_DURATION_DAYS),
-        )
+        if not rotated.is_valid:
+            if rotated.expires_at <= datetime.datetime.now(datetime.timezone.utc):
+                raise ForbiddenError("Refresh token is expired")
 
-        refresh_token_expiration_date = func.now() + days_added_from_now
+            raise ForbiddenError("User is not active")
 
-        # Save refresh token to auth tokens log
-        session.add(
-            AuthToken(
-                user_id=refresh_token.user_id,
-                refresh_token=tokens["refresh_token"],
-                user_agent=request.headers.get("user-agent"),
-                ip_address=request.client.host,
-                expires_at=refresh_token_expiration_date,
-            )
+        # Generate new tokens
+        tokens = generate_token(
+            user_id=str(rotated.user_id),
+            epoch=rotated.token_epoch,
+            claims=build_user_claims(
+                role_id=rotated.role,
+                role_version=rotated.role_version,
+                capability_ids=rotated.capability_ids,
+            ),
+            refresh_token=new_refresh_token,
         )
 
-        # Delete previous refresh token
-        session.delete(refresh_token)
-
-        # Commit transactions
-        session.commit()
-
         return {
             "tokens": tokens,
         }
@@ -180,7 +231,7 @@ def refresh_token_handler(request: Request, params: RefreshTokenRequest, session
             detail=str(e),
         )
     except Exception as e:
-        session.rollback()
+        await session.rollback()
 
         log_error.add_error(
             message="An error occurred during token refresh",
@@ -193,8 +244,11 @@ def refresh_token_handler(request: Request, params: RefreshTokenRequest, session
         )
 
 
-def forgot_password_handler(request: Request, params: ForgotPasswordRequest, session: Session):
+async def forgot_password_handler(request: Request, params: ForgotPasswordRequest, session: AsyncSession):
     try:
+        # Normalize email, lookups use the lower(email) index
+        params.email = normalize_email(params.email)
+
         # Validate request params
         if not params.email:
             raise ValueError("Email is required")
@@ -202,12 +256,14 @@ def forgot_password_handler(request: Request, params: ForgotPasswordRequest, ses
             raise ValueError("Invalid email format")
 
         # Check if email is exists
-        user = session.query(
-            User,
-        ).filter(
-            User.email == params.email,
-            User.is_deleted == False,
-        ).first()
+        user = await session.scalar(
+            select(
+                User,
+            ).filter(
+                func.lower(User.email) == params.email,
+                User.is_deleted == False,
+            )
+        )
 
         if not user:
             raise DataNotFoundError("Email not found")
@@ -220,12 +276,18 @@ def forgot_password_handler(request: Request, params: ForgotPasswordRequest, ses
         if not user.is_active:
             raise ValueError("User is not active")
 
-        # Generate & save reset code
+        # Generate & save reset code, the user row is not updated
         reset_code = generate_random_code()
-        user.reset_code = reset_code
+
+        await save_auth_code(
+            session=session,
+            user_id=user.user_id,
+            purpose=PURPOSE_RESET_PASSWORD,
+            code=reset_code,
+        )
 
         # Commit transactions
-        session.commit()
+        await session.commit()
 
         # Send email
         try:
@@ -236,7 +298,7 @@ def forgot_password_handler(request: Request, params: ForgotPasswordRequest, ses
                 message=f"Click link below to reset your password. Your reset code: {reset_code}.\n<a href='{app_config.FRONTEND_APP_URL}/reset-password?email={params.email}'>Reset password</a>",
             )
 
-            mail.send()
+            await run_in_threadpool(mail.send)
         except Exception as e:
             log_error.add_error(
                 message="An error occurred during forgot password: send email",
@@ -260,7 +322,7 @@ def forgot_password_handler(request: Request, params: ForgotPasswordRequest, ses
             detail=str(e),
         )
     except Exception as e:
-        session.rollback()
+        await session.rollback()
 
         log_error.add_error(
             message="An error occurred during forgot password",
@@ -273,8 +335,11 @@ def forgot_password_handler(request: Request, params: ForgotPasswordRequest, ses
         )
 
 
-def reset_password_handler(request: Request, params: ResetPasswordRequest, session: Session):
+async def reset_password_handler(request: Request, params: ResetPasswordRequest, session: AsyncSession):
     try:
+        # Normalize email, lookups use the lower(email) index
+        params.email = normalize_email(params.email)
+
         # Validate request params
         if params.email == "":
             raise ValueError("Email is required")
@@ -292,13 +357,18 @@ def reset_password_handler(request: Request, params: ResetPasswordRequest, sessi
         elif params.confirm_password != params.new_password:
             raise ValueError("Invalid confirm password")
 
+        # Limit attempts before any database query or password hashing
+        await login_guard.check(ip=get_client_ip(request), email=params.email)
+
         # Check if email is exists
-        user = session.query(
-            User,
-        ).filter(
-            User.email == params.email,
-            User.is_deleted == False,
-        ).first()
+        user = await session.scalar(
+            select(
+                User,
+            ).filter(
+                func.lower(User.email) == params.email,
+                User.is_deleted == False,
+            )
+        )
 
         if not user:
             raise DataNotFoundError("Email not found")
@@ -311,19 +381,35 @@ def reset_password_handler(request: Request, params: ResetPasswordRequest, sessi
         if not user.is_verified:
             raise ValueError("User is not verified")
 
-        # Verify reset code
-        if user.reset_code == "" or user.reset_code != params.code:
+        # Verify reset code, a failed attempt is counted
+        if not await consume_auth_code(
+                session=session,
+                user_id=user.user_id,
+                purpose=PURPOSE_RESET_PASSWORD,
+                code=params.code,
+            ):
+            await session.commit()
             raise ValueError("Invalid code")
 
         # Encrypt new password
-        hashed_new_password = encrypt_password(password=params.new_password)
+        hashed_new_password = await encrypt_password(password=params.new_password)
 
         # Update user data
         user.password = hashed_new_password
-        user.reset_code = ""
+
+        # Sign out every session, refresh tokens could mint new access tokens
+        await delete_refresh_tokens(
+            session=session,
+            user_ids=[user.user_id],
+        )
+
+        # Revoke issued access tokens
+        event = await revoke_user_tokens(session=session, user_id=user.user_id)
 
         # Commit transactions
-        session.commit()
+        await session.commit()
+
+        dispatch_event(event)
 
         return {
             "data": {
@@ -341,8 +427,20 @@ def reset_password_handler(request: Request, params: ResetPasswordRequest, sessi
             status_code=status.HTTP_404_NOT_FOUND,
             detail=str(e),
         )
+    except TooManyRequestsError as e:
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail=str(e),
+            headers={"Retry-After": str(e.retry_after)},
+        )
+    except ServiceUnavailableError as e:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=str(e),
+            headers={"Retry-After": str(e.retry_after)},
+        )
     except Exception as e:
-        session.rollback()
+        await session.rollback()
 
         log_error.add_error(
             message="An error occurred during reset password",
@@ -355,8 +453,11 @@ def reset_password_handler(request: Request, params: ResetPasswordRequest, sessi
         )
 
 
-def confirm_account_handler(request: Request, params: ConfirmAccountRequest, session: Session):
+async def confirm_account_handler(request: Request, params: ConfirmAccountRequest, session: AsyncSession):
     try:
+        # Normalize email, lookups use the lower(email) index
+        params.email = normalize_email(params.email)
+
         # Validate request params
         if not params.email:
             raise ValueError("Email is required")
@@ -374,32 +475,42 @@ def confirm_account_handler(request: Request, params: ConfirmAccountRequest, ses
         elif params.confirm_password != params.new_password:
             raise ValueError("Invalid confirm password")
 
+        # Limit attempts before any database query or password hashing
+        await login_guard.check(ip=get_client_ip(request), email=params.email)
+
         # Check if email is exists
-        user = session.query(
-            User,
-        ).filter(
-            User.email == params.email,
-            User.is_deleted == False,
-        ).first()
+        user = await session.scalar(
+            select(
+                User,
+            ).filter(
+                func.lower(User.email) == params.email,
+                User.is_deleted == False,
+            )
+        )
 
         if not user:
             raise DataNotFoundError("Email not found")
 
-        # Verify confirm code
-        if user.verify_code == "" or user.verify_code != params.code:
+        # Verify confirm code, a failed attempt is counted
+        if not await consume_auth_code(
+                session=session,
+                user_id=user.user_id,
+                purpose=PURPOSE_VERIFY_ACCOUNT,
+                code=params.code,
+            ):
+            await session.commit()
             raise ValueError("Invalid code")
 
         # Encrypt new password
-        hashed_new_password = encrypt_password(password=params.new_password)
+        hashed_new_password = await encrypt_password(password=params.new_password)
 
         # Update user data
         user.password = hashed_new_password
-        user.verify_code = ""
         user.verified_at = func.now()
         user.is_verified = True
 
         # Commit transactions
-        session.commit()
+        await session.commit()
 
         return {
             "data": {
@@ -417,8 +528,20 @@ def confirm_account_handler(request: Request, params: ConfirmAccountRequest, ses
             status_code=status.HTTP_404_NOT_FOUND,
             detail=str(e),
         )
+    except TooManyRequestsError as e:
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail=str(e),
+            headers={"Retry-After": str(e.retry_after)},
+        )
+    except ServiceUnavailableError as e:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=str(e),
+            headers={"Retry-After": str(e.retry_after)},
+        )
     except Exception as e:
-        session.rollback()
+        await session.rollback()
 
         log_error.add_error(
             message="An error occurred during confirm account",
@@ -431,29 +554,33 @@ def confirm_account_handler(request: Request, params: ConfirmAccountRequest, ses
         )
 
 
-def logout_handler(request: Request, params: LogoutRequest, payload: AuthPayload, session: Session):
+async def logout_handler(request: Request, params: LogoutRequest, payload: AuthPayload, session: AsyncSession):
     try:
         # Validate request params
         if not params.refresh_token:
             raise ValueError("Refresh token is required")
 
-        # Verify refresh token
-        refresh_token = session.query(
-            AuthToken,
-        ).filter(
-            AuthToken.user_id == int(payload.user_id),
-            AuthToken.refresh_token == params.refresh_token,
-            AuthToken.expires_at > func.now(),
-        ).first()
+        # Delete refresh token if it is valid
+        result = await session.execute(
+            delete(
+                AuthToken,
+            ).where(
+                AuthToken.user_id == int(payload.user_id),
+                AuthToken.token_digest == hash_token(params.refresh_token),
+                AuthToken.expires_at > func.now(),
+            )
+        )
 
-        if not refresh_token:
+        if not result.rowcount:
             raise UnauthorizedError("Invalid refresh token")
 
-        # Delete refresh token
-        session.delete(refresh_token)
+        # Revoke current access token
+        event = await revoke_access_token(session=session, payload=payload)
 
         # Commit transactions
-        session.commit()
+        await session.commit()
+
+        dispatch_event(event)
 
         return {
             "data": {
@@ -471,7 +598,7 @@ def logout_handler(request: Request, params: LogoutRequest, payload: AuthPayload
             detail=str(e),
         )
     except Exception as e:
-        session.rollback()
+        await session.rollback()
 
         log_error.add_error(
             message="An error occurred during logout",
@@ -484,21 +611,21 @@ def logout_handler(request: Request, params: LogoutRequest, payload: AuthPayload
         )
 
 
-def logout_all_handler(request: Request, payload: AuthPayload, session: Session):
+async def logout_all_handler(request: Request, payload: AuthPayload, session: AsyncSession):
     try:
         # Delete all refresh tokens
-        deleted_count = (
-            session.query(
-                AuthToken,
-            ).filter(
-                AuthToken.user_id == int(payload.user_id),
-            ).delete(
-                synchronize_session=False,
-            )
+        deleted_count = await delete_refresh_tokens(
+            session=session,
+            user_ids=[int(payload.user_id)],
         )
 
+        # Revoke issued access tokens
+        event = await revoke_user_tokens(session=session, user_id=payload.user_id)
+
         # Commit transactions
-        session.commit()
+        await session.commit()
+
+        dispatch_event(event)
 
         return {
             "data": {
@@ -507,7 +634,7 @@ def logout_all_handler(request: Request, payload: AuthPayload, session: Session)
             },
         }
     except Exception as e:
-        session.rollback()
+        await session.rollback()
 
         log_error.add_error(
             message="An error occurred during logout all",
@@ -518,3 +645,92 @@ def logout_all_handler(request: Request, payload: AuthPayload, session: Session)
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="An error occurred during logout all" if app_config.ENV == "production" else str(e),
         )
+
+
+async def introspect_handler(request: Request, params: IntrospectRequest, session: AsyncSession):
+    try:
+        # Validate request params
+        if not params.tokens:
+            raise ValueError("Tokens are required")
+
+        if len(params.tokens) > MAX_INTROSPECT_TOKENS:
+            raise ValueError(f"Maximum {MAX_INTROSPECT_TOKENS} tokens per request")
+
+        # Verify every distinct token without a database query
+        payloads = {}
+
+        for token in set(params.tokens):
+            try:
+                payload = verify_token(token=token)
+            except InvalidTokenError:
+                continue
+
+            if payload.user_id.isdigit() and not revocation_store.is_revoked(payload):
+                payloads[token] = payload
+
+        # Get all users of valid tokens at once
+        user_ids = {int(payload.user_id) for payload in payloads.values()}
+        users = {}
+
+        if user_ids:
+            rows = await session.execute(
+                select(
+                    User.user_id,
+                    User.role,
+                    User.token_epoch,
+                ).where(
+                    User.user_id.in_(user_ids),
+                    User.is_active == True,
+                    User.is_deleted == False,
+                )
+            )
+
+            users = {row.user_id: row for row in rows}
+
+        # Get capabilities of all distinct roles at once
+        role_capabilities = await get_roles_capabilities(
+            session=session,
+            role_ids=list({user.role for user in users.values()}),
+        )
+
+        results = []
+
+        for token in params.tokens:
+            payload = payloads.get(token)
+            user = users.get(int(payload.user_id)) if payload else None
+
+            # Tokens issued before the last revocation are inactive
+            if user is None or (payload.epoch or 0) < user.token_epoch:
+                results.append({
+                    "active": False,
+                })
+                continue
+
+            results.append({
+                "active": True,
+                "sub": payload.user_id,
+                "exp": payload.exp,
+                "role_id": user.role,
+                "capabilities": role_capabilities[user.role],
+            })
+
+        return {
+            "tokens": results,
+        }
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e),
+        )
+    except Exception as e:
+        await session.rollback()
+
+        log_error.add_error(
+            message="An error occurred during introspect tokens",
+            exc_info=e,
+        )
+
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="An error occurred during introspect tokens" if app_config.ENV == "production" else str(e),
+        )
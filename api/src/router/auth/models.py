@@ -30,3 +30,7 @@ class ConfirmAccountRequest(BaseModel):
 
 class LogoutRequest(BaseModel):
     refresh_token: str = ""
+
+
+class IntrospectRequest(BaseModel):
+    tokens: list[str] = []
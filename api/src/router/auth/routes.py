@@ -1,9 +1,9 @@
 from fastapi import APIRouter, Depends, Request
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from src.db import db_session
+from src.db import async_db_session
 from src.models.auth import AuthPayload
-from src.dependencies.auth import authorize_token
+from src.dependencies.auth import authorize_token, authorize_internal
 
 from .models import (
     LoginRequest,
@@ -12,6 +12,7 @@ from .models import (
     ResetPasswordRequest,
     ConfirmAccountRequest,
     LogoutRequest,
+    IntrospectRequest,
 )
 
 from .handlers import (
@@ -22,6 +23,7 @@ from .handlers import (
     confirm_account_handler,
     logout_handler,
     logout_all_handler,
+    introspect_handler,
 )
 
 
@@ -31,58 +33,66 @@ auth_router = APIRouter(
 )
 
 @auth_router.post("/login")
-def route_login(
+async def route_login(
         request: Request,
         params: LoginRequest,
-        session: Session = Depends(db_session),
+        session: AsyncSession = Depends(async_db_session),
     ):
-    return login_handler(request=request, params=params, session=session)
+    return await login_handler(request=request, params=params, session=session)
 
 @auth_router.post("/refresh-token")
-def route_refresh_token(
+async def route_refresh_token(
         request: Request,
         params: RefreshTokenRequest,
-        session: Session = Depends(db_session),
+        session: AsyncSession = Depends(async_db_session),
     ):
-    return refresh_token_handler(request=request, params=params, session=session)
+    return await refresh_token_handler(request=request, params=params, session=session)
 
 @auth_router.post("/forgot-password")
-def route_forgot_password(
+async def route_forgot_password(
         request: Request,
         params: ForgotPasswordRequest,
-        session: Session = Depends(db_session),
+        session: AsyncSession = Depends(async_db_session),
     ):
-    return forgot_password_handler(request=request, params=params, session=session)
+    return await forgot_password_handler(request=request, params=params, session=session)
 
 @auth_router.post("/reset-password")
-def route_reset_password(
+async def route_reset_password(
         request: Request,
         params: ResetPasswordRequest,
-        session: Session = Depends(db_session),
+        session: AsyncSession = Depends(async_db_session),
     ):
-    return reset_password_handler(request=request, params=params, session=session)
+    return await reset_password_handler(request=request, params=params, session=session)
 
 @auth_router.post("/confirm-account")
-def route_confirm_account(
+async def route_confirm_account(
         request: Request,
         params: ConfirmAccountRequest,
-        session: Session = Depends(db_session),
+        session: AsyncSession = Depends(async_db_session),
     ):
-    return confirm_account_handler(request=request, params=params, session=session)
+    return await confirm_account_handler(request=request, params=params, session=session)
 
 @auth_router.post("/logout")
-def route_logout(
+async def route_logout(
         request: Request,
         params: LogoutRequest,
         payload: AuthPayload = Depends(authorize_token),
-        session: Session = Depends(db_session),
+        session: AsyncSession = Depends(async_db_session),
     ):
-    return logout_handler(request=request, params=params, payload=payload, session=session)
+    return await logout_handler(request=request, params=params, payload=payload, session=session)
 
 @auth_router.post("/logout-all")
-def route_logout_all(
+async def route_logout_all(
         request: Request,
         payload: AuthPayload = Depends(authorize_token),
-        session: Session = Depends(db_session),
+        session: AsyncSession = Depends(async_db_session),
     ):
-    return logout_all_handler(request=request, payload=payload, session=session)
+    return await logout_all_handler(request=request, payload=payload, session=session)
+
+@auth_router.post("/introspect", dependencies=[Depends(authorize_internal)])
+async def route_introspect(
+        request: Request,
+        params: IntrospectRequest,
+        session: AsyncSession = Depends(async_db_session),
+    ):
+    return await introspect_handler(request=request, params=params, session=session)
@@ -0,0 +1,51 @@
+from src.db import get_pool_stats
+from src.services.auth import verified_token_cache
+from src.services.capability_registry import capability_registry
+from src.services.events import event_listener
+from src.services.hashing import hashing_engine
+from src.services.login_guard import login_guard
+from src.services.reaper import token_reaper
+from src.services.role_cache import role_capability_cache
+
+
+async def get_hashing_stats_handler():
+    return {
+        "hashing": hashing_engine.stats(),
+    }
+
+
+async def get_token_cache_stats_handler():
+    return {
+        "token_cache": verified_token_cache.stats(),
+    }
+
+
+async def get_token_reaper_stats_handler():
+    return {
+        "token_reaper": token_reaper.stats(),
+    }
+
+
+async def get_login_guard_stats_handler():
+    return {
+        "login_guard": login_guard.stats(),
+    }
+
+
+async def get_role_cache_stats_handler():
+    return {
+        "role_cache": role_capability_cache.stats(),
+        "capability_registry": capability_registry.stats(),
+    }
+
+
+async def get_events_stats_handler():
+    return {
+        "events": event_listener.stats(),
+    }
+
+
+async def get_db_pool_stats_handler():
+    return {
+        "db_pool": get_pool_stats(),
+    }
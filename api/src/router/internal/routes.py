@@ -0,0 +1,49 @@
+from fastapi import APIRouter, Depends
+
+from src.dependencies.auth import authorize_internal
+
+from .handlers import (
+    get_hashing_stats_handler,
+    get_db_pool_stats_handler,
+    get_login_guard_stats_handler,
+    get_role_cache_stats_handler,
+    get_events_stats_handler,
+    get_token_cache_stats_handler,
+    get_token_reaper_stats_handler,
+)
+
+
+internal_router = APIRouter(
+    prefix="/internal",
+    tags=["Internal"],
+    dependencies=[Depends(authorize_internal)],
+    include_in_schema=False,
+)
+
+@internal_router.get("/hashing")
+async def route_get_hashing_stats():
+    return await get_hashing_stats_handler()
+
+@internal_router.get("/token-cache")
+async def route_get_token_cache_stats():
+    return await get_token_cache_stats_handler()
+
+@internal_router.get("/token-reaper")
+async def route_get_token_reaper_stats():
+    return await get_token_reaper_stats_handler()
+
+@internal_router.get("/login-guard")
+async def route_get_login_guard_stats():
+    return await get_login_guard_stats_handler()
+
+@internal_router.get("/role-cache")
+async def route_get_role_cache_stats():
+    return await get_role_cache_stats_handler()
+
+@internal_router.get("/events")
+async def route_get_events_stats():
+    return await get_events_stats_handler()
+
+@internal_router.get("/db-pool")
+async def route_get_db_pool_stats():
+    return await get_db_pool_stats_handler()
@@ -0,0 +1,17 @@
+from fastapi import Request
+from fastapi.responses import JSONResponse
+
+from src.config import app_config
+from src.services.keyring import jwt_keyring, is_asymmetric_algorithm
+
+
+async def get_jwks_handler(request: Request):
+    # Symmetric algorithms have no public keys
+    jwks = jwt_keyring.jwks() if is_asymmetric_algorithm(app_config.JWT_ALGORITHM) else {"keys": []}
+
+    return JSONResponse(
+        content=jwks,
+        headers={
+            "Cache-Control": f"public, max-age={app_config.JWKS_CACHE_MAX_AGE}",
+        },
+    )
@@ -0,0 +1,13 @@
+from fastapi import APIRouter, Request
+
+from .handlers import get_jwks_handler
+
+
+jwks_router = APIRouter(
+    prefix="/.well-known",
+    tags=["Authentication"],
+)
+
+@jwks_router.get("/jwks.json")
+async def route_get_jwks(request: Request):
+    return await get_jwks_handler(request=request)
@@ -1,24 +1,18 @@
 from fastapi import Request, HTTPException, status
-from sqlalchemy import select
-from sqlalchemy.orm import Session, load_only
+from sqlalchemy import select, delete
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import load_only
 from sqlalchemy.sql import func
 
 from lib.log_error import log_error
 from src.config import app_config
-from src.models.auth import AuthPayload
-from src.services.user import is_user_can
+from src.models.auth import Principal
+from src.services.capability_registry import capability_registry
+from src.services.events import dispatch_event
+from src.services.role_cache import role_capability_cache, publish_role_changed
 from src.services.role import superadmin_role_id, get_all_role_capabilities
 from src.repository import User, Role, RoleCapabilities
-from src.error import ForbiddenError, DataNotFoundError, ERROR_MESSAGES
-
-from src.constants.capabilities import (
-    READ_ROLE,
-    CREATE_ROLE,
-    UPDATE_ROLE,
-    DELETE_ROLE,
-    CREATE_USER,
-    UPDATE_USER,
-)
+from src.error import ForbiddenError, DataNotFoundError
 
 from .models import (
     CreateRoleRequest,
@@ -27,28 +21,19 @@ from .models import (
 )
 
 
-def get_roles_handler(
+async def get_roles_handler(
         request: Request,
-        payload: AuthPayload,
-        session: Session,
+        session: AsyncSession,
         search: str,
         page: int,
         limit: int,
     ):
     try:
-        # Verify if user has permission to read roles
-        if not is_user_can(
-                session=session,
-                user_id=int(payload.user_id),
-                capabilities=[READ_ROLE, CREATE_USER, UPDATE_USER],
-            ):
-            raise ForbiddenError(ERROR_MESSAGES["forbidden"])
-
         # Set offset for pagination
         offset = (page * limit) - limit
 
         # Setup base query & filters
-        base_query = session.query(
+        base_query = select(
             Role.role_id,
             Role.role_name,
             Role.created_at,
@@ -65,9 +50,9 @@ def get_roles_handler(
 
         # Apply filters to the base query
         if limit == -1:
-            results = base_query.filter(*filters).all()
+            results = (await session.execute(base_query.filter(*filters))).all()
         else:
-            results = base_query.filter(*filters).offset(offset).limit(limit).all()
+            results = (await session.execute(base_query.filter(*filters).offset(offset).limit(limit))).all()
 
         roles = [dict(
             role_id=role.role_id,
@@ -77,17 +62,14 @@ def get_roles_handler(
         ) for role in results]
 
         # Get total count for pagination
-        total_count = base_query.filter(*filters).count()
+        total_count = await session.scalar(
+            select(func.count()).select_from(base_query.filter(*filters).subquery())
+        )
 
         return {
             "roles": roles,
             "count": total_count,
         }
-    except ForbiddenError as e:
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail=str(e),
-        )
     except Exception as e:
         log_error.add_error(
             message="An error occurred during get roles",
@@ -100,22 +82,13 @@ def get_roles_handler(
         )
 
 
-def get_role_handler(
+async def get_role_handler(
         request: Request,
         role_id: int,
         with_role_access: bool,
-        payload: AuthPayload,
-        session: Session,
+        session: AsyncSession,
     ):
     try:
-        # Verify if user has permission to read roles
-        if not is_user_can(
-                session=session,
-                user_id=int(payload.user_id),
-                capabilities=[READ_ROLE],
-            ):
-            raise ForbiddenError(ERROR_MESSAGES["forbidden"])
-
         # Validate role_id
         if not role_id:
             raise ValueError("Role ID is required")
@@ -134,7 +107,7 @@ def get_role_handler(
             Role.role_id == role_id,
         )
 
-        role = session.scalar(
+        role = await session.scalar(
             statement=stmt,
         )
 
@@ -143,17 +116,14 @@ def get_role_handler(
 
         # Get role access if True
         if with_role_access:
-            role_access = session.scalars(
-                select(
-                    RoleCapabilities.capability_id,
-                ).filter(
-                    RoleCapabilities.role_id == role.role_id,
-                )
-            ).all()
+            role_access = await role_capability_cache.get_capabilities(
+                session=session,
+                role_id=role.role_id,
+            )
 
             return {
                 "role": role,
-                "capabilities": role_access,
+                "capabilities": sorted(role_access or []),
             }
 
         return {
@@ -164,11 +134,6 @@ def get_role_handler(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail=str(e),
         )
-    except ForbiddenError as e:
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail=str(e),
-        )
     except DataNotFoundError as e:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -186,20 +151,11 @@ def get_role_handler(
         )
 
 
-def get_all_role_capabilities_handler(
+async def get_all_role_capabilities_handler(
         request: Request,
-        payload: AuthPayload,
-        session: Session,
+        session: AsyncSession,
     ):
     try:
-        # Verify if user has permission to read roles
-        if not is_user_can(
-                session=session,
-                user_id=int(payload.user_id),
-                capabilities=[READ_ROLE],
-            ):
-            raise ForbiddenError(ERROR_MESSAGES["forbidden"])
-
         return {
             "modules": get_all_role_capabilities(),
         }
@@ -215,62 +171,34 @@ def get_all_role_capabilities_handler(
         )
 
 
-def get_role_capability_handler(
+async def get_role_capability_handler(
         request: Request,
         role_id: int,
-        payload: AuthPayload,
-        session: Session,
+        session: AsyncSession,
     ):
     try:
-        # Verify if user has permission to read roles
-        if not is_user_can(
-                session=session,
-                user_id=int(payload.user_id),
-                capabilities=[READ_ROLE],
-            ):
-            raise ForbiddenError(ERROR_MESSAGES["forbidden"])
-
         # Validate role_id
         if not role_id:
             raise ValueError("Role ID is required")
 
-        # Get role details
-        stmt = select(
-            Role,
-        ).where(
-            Role.role_id == role_id,
-        )
-
-        role = session.scalar(
-            statement=stmt,
+        # Get role capabilities from memory
+        capabilities = await role_capability_cache.get_capabilities(
+            session=session,
+            role_id=role_id,
         )
 
-        if not role:
+        if capabilities is None:
             raise DataNotFoundError("Role not found")
 
-        # Get role capabilities
-        capabilities = session.scalars(
-            select(
-                RoleCapabilities.capability_id,
-            ).filter(
-                RoleCapabilities.role_id == role_id,
-            )
-        ).all()
-
         return {
             "role_id": role_id,
-            "capabilities": capabilities,
+            "capabilities": sorted(capabilities),
         }
     except ValueError as e:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail=str(e),
         )
-    except ForbiddenError as e:
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail=str(e),
-        )
     except DataNotFoundError as e:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -288,34 +216,32 @@ def get_role_capability_handler(
         )
 
 
-def create_role_handler(
+async def create_role_handler(
         request: Request,
         params: CreateRoleRequest,
-        payload: AuthPayload,
-        session: Session,
+        principal: Principal,
+        session: AsyncSession,
     ):
     try:
-        # Verify if user has permission to create roles
-        if not is_user_can(
-                session=session,
-                user_id=int(payload.user_id),
-                capabilities=[CREATE_ROLE],
-            ):
-            raise ForbiddenError(ERROR_MESSAGES["forbidden"])
-
         # Validate request params
         if not params.role_name:
             raise ValueError("Role name is required")
 
-        # Create new role
+        unknown_capabilities = capability_registry.get_unknown(params.capabilities)
+
+        if unknown_capabilities:
+            raise ValueError(f"Unknown capabilities: {', '.join(unknown_capabilities)}")
+
+        # Create new role with its capability mask
         new_role = Role(
             role_name=params.role_name,
-            created_by=int(payload.user_id),
+            capability_mask=capability_registry.get_mask(params.capabilities),
+            created_by=principal.user_id,
             updated_at=func.now(),
         )
 
         session.add(new_role)
-        session.flush()
+        await session.flush()
 
         # Assign capabilities to the new role
         if len(params.capabilities) > 0:
@@ -329,8 +255,13 @@ def create_role_handler(
 
             session.add_all(new_capabilities)
 
+        # Reload role capabilities on every worker
+        event = await publish_role_changed(session=session, role_id=new_role.role_id)
+
         # Commit transactions
-        session.commit()
+        await session.commit()
+
+        dispatch_event(event)
 
         return {
             "data": {
@@ -338,13 +269,13 @@ def create_role_handler(
                 "status": "role_created",
             },
         }
-    except ForbiddenError as e:
+    except ValueError as e:
         raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
+            status_code=status.HTTP_400_BAD_REQUEST,
             detail=str(e),
         )
     except Exception as e:
-        session.rollback()
+        await session.rollback()
 
         log_error.add_error(
             message="An error occurred during create role",
@@ -357,47 +288,51 @@ def create_role_handler(
         )
 
 
-def update_role_handler(
+async def update_role_handler(
         request: Request,
         params: UpdateRoleRequest,
-        payload: AuthPayload,
-        session: Session,
+        session: AsyncSession,
     ):
     try:
-        # Verify if user has permission to update roles
-        if not is_user_can(
-                session=session,
-                user_id=int(payload.user_id),
-                capabilities=[UPDATE_ROLE],
-            ):
-            raise ForbiddenError(ERROR_MESSAGES["forbidden"])
-
         # Validate request params
         if not params.role_id:
             raise ValueError("Role ID is required")
 
+        if params.capabilities is not None:
+            unknown_capabilities = capability_registry.get_unknown(params.capabilities)
+
+            if unknown_capabilities:
+                raise ValueError(f"Unknown capabilities: {', '.join(unknown_capabilities)}")
+
         # Check if role exists
-        role = session.query(
-            Role,
-        ).filter(
-            Role.role_id == params.role_id,
-        ).first()
+        role = await session.scalar(
+            select(
+                Role,
+            ).filter(
+                Role.role_id == params.role_id,
+            )
+        )
 
         if not role:
             raise DataNotFoundError("Role not found")
 
-        # Update role data
+        # Update role data, new version invalidates access token claims
         role.role_name = params.role_name
+        role.version = Role.version + 1
         role.updated_at = func.now()
 
         # Update role capabilities
         if params.capabilities is not None:
+            role.capability_mask = capability_registry.get_mask(params.capabilities)
+
             # Delete existing capabilities
-            session.query(
-                RoleCapabilities,
-            ).filter(
-                RoleCapabilities.role_id == params.role_id,
-            ).delete()
+            await session.execute(
+                delete(
+                    RoleCapabilities,
+                ).where(
+                    RoleCapabilities.role_id == params.role_id,
+                )
+            )
 
             # Add new capabilities
             new_capabilities = []
@@ -410,8 +345,13 @@ def update_role_handler(
 
             session.add_all(new_capabilities)
 
+        # Reload role capabilities on every worker
+        event = await publish_role_changed(session=session, role_id=params.role_id)
+
         # Commit transactions
-        session.commit()
+        await session.commit()
+
+        dispatch_event(event)
 
         return {
             "data": {
@@ -424,18 +364,13 @@ def update_role_handler(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail=str(e),
         )
-    except ForbiddenError as e:
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail=str(e),
-        )
     except DataNotFoundError as e:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail=str(e),
         )
     except Exception as e:
-        session.rollback()
+        await session.rollback()
 
         log_error.add_error(
             message="An error occurred during update role",
@@ -448,60 +383,62 @@ def update_role_handler(
         )
 
 
-def delete_role_handler(
+async def delete_role_handler(
         request: Request,
         params: DeleteRoleRequest,
-        payload: AuthPayload,
-        session: Session,
+        session: AsyncSession,
     ):
     try:
-        # Verify if user has permission to delete roles
-        if not is_user_can(
-                session=session,
-                user_id=int(payload.user_id),
-                capabilities=[DELETE_ROLE],
-            ):
-            raise ForbiddenError(ERROR_MESSAGES["forbidden"])
-
         # Validate request params
         if not params.role_id:
             raise ValueError("Role ID is required")
 
         # Check if role exists
-        role = session.query(
-            Role,
-        ).filter(
-            Role.role_id == params.role_id,
-        ).first()
+        role = await session.scalar(
+            select(
+                Role,
+            ).filter(
+                Role.role_id == params.role_id,
+            )
+        )
 
         if not role:
             raise DataNotFoundError("Role not found")
 
         # Check if role is assigned to any user
-        assigned_user_count = session.query(
-            func.count(),
-        ).select_from(
-            User,
-        ).filter(
-            User.role == params.role_id,
-            User.is_deleted.is_(False),
-        ).scalar()
+        assigned_user_count = await session.scalar(
+            select(
+                func.count(),
+            ).select_from(
+                User,
+            ).filter(
+                User.role == params.role_id,
+                User.is_deleted.is_(False),
+            )
+        )
 
         if assigned_user_count > 0:
             raise ForbiddenError("Role is assigned to existing users and cannot be deleted")
 
         # Delete role capabilities
-        session.query(
-            RoleCapabilities,
-        ).filter(
-            RoleCapabilities.role_id == params.role_id,
-        ).delete()
+        await session.execute(
+            delete(
+                RoleCapabilities,
+            ).where(
+                RoleCapabilities.role_id == params.role_id,
+            )
+        )
 
         # Delete role
-        session.delete(role)
+        await session.delete(role)
+
+        # Reload role capabilities on every worker
+        event = await publish_role_changed(session=session, role_id=params.role_id)
 
         # Commit transactions
-        session.commit()
+        await session.commit()
+
+        dispatch_event(event)
 
         return {
             "data": {
@@ -525,7 +462,7 @@ def delete_role_handler(
             detail=str(e),
         )
     except Exception as e:
-        session.rollback()
+        await session.rollback()
 
         log_error.add_error(
             message="An error occurred during delete role",
@@ -1,9 +1,18 @@
 from fastapi import APIRouter, Depends, Request
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from src.db import db_session
-from src.dependencies.auth import authorize_token
-from src.models.auth import AuthPayload
+from src.db import async_db_session
+from src.dependencies.auth import get_principal, require
+from src.models.auth import Principal
+
+from src.constants.capabilities import (
+    READ_ROLE,
+    CREATE_ROLE,
+    UPDATE_ROLE,
+    DELETE_ROLE,
+    CREATE_USER,
+    UPDATE_USER,
+)
 
 from .models import (
     CreateRoleRequest,
@@ -27,104 +36,92 @@ role_router = APIRouter(
     tags=["Role"],
 )
 
-@role_router.get("/list")
-def route_get_roles(
+@role_router.get("/list", dependencies=[require(READ_ROLE, CREATE_USER, UPDATE_USER)])
+async def route_get_roles(
         request: Request,
         search: str = "",
         page: int = 1,
         limit: int = 10,
-        payload: AuthPayload = Depends(authorize_token),
-        session: Session = Depends(db_session),
+        session: AsyncSession = Depends(async_db_session),
     ):
-    return get_roles_handler(
+    return await get_roles_handler(
         request=request,
-        payload=payload,
         session=session,
         search=search,
         page=page,
         limit=limit,
     )
 
-@role_router.get("/detail/{role_id}")
-def route_get_role(
+@role_router.get("/detail/{role_id}", dependencies=[require(READ_ROLE)])
+async def route_get_role(
         request: Request,
         role_id: int,
         with_role_access: bool = False,
-        payload: AuthPayload = Depends(authorize_token),
-        session: Session = Depends(db_session),
+        session: AsyncSession = Depends(async_db_session),
     ):
-    return get_role_handler(
+    return await get_role_handler(
         request=request,
         role_id=role_id,
         with_role_access=with_role_access,
-        payload=payload,
         session=session,
     )
 
-@role_router.get("/capabilities")
-def route_get_role_capabilities(
+@role_router.get("/capabilities", dependencies=[require(READ_ROLE)])
+async def route_get_role_capabilities(
         request: Request,
-        payload: AuthPayload = Depends(authorize_token),
-        session: Session = Depends(db_session),
+        session: AsyncSession = Depends(async_db_session),
     ):
-    return get_all_role_capabilities_handler(
+    return await get_all_role_capabilities_handler(
         request=request,
-        payload=payload,
         session=session,
     )
 
-@role_router.get("/capability/{role_id}")
-def route_get_role_capability(
+@role_router.get("/capability/{role_id}", dependencies=[require(READ_ROLE)])
+async def route_get_role_capability(
         request: Request,
         role_id: int,
-        payload: AuthPayload = Depends(authorize_token),
-        session: Session = Depends(db_session),
+        session: AsyncSession = Depends(async_db_session),
     ):
-    return get_role_capability_handler(
+    return await get_role_capability_handler(
         request=request,
         role_id=role_id,
-        payload=payload,
         session=session,
     )
 
-@role_router.post("/create")
-def route_create_role(
+@role_router.post("/create", dependencies=[require(CREATE_ROLE)])
+async def route_create_role(
         request: Request,
         params: CreateRoleRequest,
-        payload: AuthPayload = Depends(authorize_token),
-        session: Session = Depends(db_session),
+        principal: Principal = Depends(get_principal),
+        session: AsyncSession = Depends(async_db_session),
     ):
-    return create_role_handler(
+    return await create_role_handler(
         request=request,
         params=params,
-        payload=payload,
+        principal=principal,
         session=session,
     )
 
-@role_router.patch("/update")
-def route_update_role(
+@role_router.patch("/update", dependencies=[require(UPDATE_ROLE)])
+async def route_update_role(
         request: Request,
         params: UpdateRoleRequest,
-        payload: AuthPayload = Depends(authorize_token),
-        session: Session = Depends(db_session),
+        session: AsyncSession = Depends(async_db_session),
     ):
-    return update_role_handler(
+    return await update_role_handler(
         request=request,
         params=params,
-        payload=payload,
         session=session,
     )
 
-@role_router.delete("/delete")
-def route_delete_role(
+@role_router.delete("/delete", dependencies=[require(DELETE_ROLE)])
+async def route_delete_role(
         request: Request,
         params: DeleteRoleRequest,
-        payload: AuthPayload = Depends(authorize_token),
-        session: Session = Depends(db_session),
+        session: AsyncSession = Depends(async_db_session),
     ):
-    return delete_role_handler(
+    return await delete_role_handler(
         request=request,
         params=params,
-        payload=payload,
         session=session,
     )
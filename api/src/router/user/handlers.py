@@ -1,56 +1,51 @@
 from fastapi import Request, HTTPException, status
+from fastapi.concurrency import run_in_threadpool
 from sqlalchemy import select
-from sqlalchemy.orm import Session, load_only
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import load_only
 from sqlalchemy.sql import func
 
-from lib.validator import is_valid_email
+from lib.validator import is_valid_email, normalize_email
 from lib.generator import generate_random_code
 from lib.log_error import log_error
 from src.config import app_config
-from src.models.auth import AuthPayload
+from src.models.auth import Principal
 from src.services.auth import encrypt_password
-from src.services.user import is_user_can, is_superadmin
+from src.services.auth_code import PURPOSE_VERIFY_ACCOUNT, save_auth_code
+from src.services.auth_token import delete_refresh_tokens
+from src.services.events import dispatch_event
+from src.services.revocation import revoke_user_tokens, revoke_users_tokens
+from src.services.user import is_superadmin
 from src.services.mail import Mail
 from src.repository import User, Role
-from src.error import ForbiddenError, DataNotFoundError, ERROR_MESSAGES
-
-from src.constants.capabilities import (
-    READ_USER,
-    CREATE_USER,
-    UPDATE_USER,
-    DELETE_USER,
-)
+from src.error import ForbiddenError, DataNotFoundError, ServiceUnavailableError
 
 from .models import (
     CreateUserRequest,
     ChangeUserStatusRequest,
     ChangeUserRoleRequest,
     DeleteUserRequest,
+    RevokeUsersSessionsRequest,
 )
 
 
-def get_users_handler(
+# Maximum users of a bulk session revocation
+MAX_REVOKE_USERS = 1000
+
+
+async def get_users_handler(
         request: Request,
-        payload: AuthPayload,
-        session: Session,
+        session: AsyncSession,
         search: str = "",
         page: int = 1,
         limit: int = 10,
     ):
     try:
-        # Verify if user has permission to read roles
-        if not is_user_can(
-                session=session,
-                user_id=int(payload.user_id),
-                capabilities=[READ_USER],
-            ):
-            raise ForbiddenError(ERROR_MESSAGES["forbidden"])
-
         # Set offset for pagination
         offset = (page * limit) - limit
 
         # Setup base query & filters
-        base_query = session.query(
+        base_query = select(
             User.user_id,
             User.full_name,
             User.email,
@@ -78,9 +73,9 @@ def get_users_handler(
 
         # Apply filters to the base query
         if limit == -1:
-            results = base_query.filter(*filters).order_by(User.created_at.desc()).all()
+            results = (await session.execute(base_query.filter(*filters).order_by(User.created_at.desc()))).all()
         else:
-            results = base_query.filter(*filters).order_by(User.created_at.desc()).offset(offset).limit(limit).all()
+            results = (await session.execute(base_query.filter(*filters).order_by(User.created_at.desc()).offset(offset).limit(limit))).all()
 
         users = [dict(
             user_id=user.user_id,
@@ -96,17 +91,14 @@ def get_users_handler(
         ) for user in results]
 
         # Get total count for pagination
-        total_count = base_query.filter(*filters).count()
+        total_count = await session.scalar(
+            select(func.count()).select_from(base_query.filter(*filters).subquery())
+        )
 
         return {
             "users": users,
             "count": total_count,
         }
-    except ForbiddenError as e:
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail=str(e),
-        )
     except Exception as e:
         log_error.add_error(
             message="An error occurred during get users",
@@ -119,21 +111,12 @@ def get_users_handler(
         )
 
 
-def get_user_handler(
+async def get_user_handler(
         request: Request,
-        payload: AuthPayload,
-        session: Session,
+        session: AsyncSession,
         user_id: int,
     ):
     try:
-        # Verify if user has permission to read user detail
-        if not is_user_can(
-                session=session,
-                user_id=int(payload.user_id),
-                capabilities=[READ_USER],
-            ):
-            raise ForbiddenError(ERROR_MESSAGES["forbidden"])
-
         # Validate user_id
         if not user_id:
             raise ValueError("User ID is required")
@@ -156,7 +139,7 @@ def get_user_handler(
             User.is_deleted == False,
         )
 
-        user = session.scalar(
+        user = await session.scalar(
             statement=stmt
         )
 
@@ -171,11 +154,6 @@ def get_user_handler(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail=str(e),
         )
-    except ForbiddenError as e:
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail=str(e),
-        )
     except DataNotFoundError as e:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -193,20 +171,15 @@ def get_user_handler(
         )
 
 
-def create_user_handler(
+async def create_user_handler(
         request: Request,
         params: CreateUserRequest,
-        payload: AuthPayload,
-        session: Session,
+        principal: Principal,
+        session: AsyncSession,
     ):
     try:
-        # Verify if user has permission to create user
-        if not is_user_can(
-                session=session,
-                user_id=int(payload.user_id),
-                capabilities=[CREATE_USER],
-            ):
-            raise ForbiddenError(ERROR_MESSAGES["forbidden"])
+        # Normalize email, lookups use the lower(email) index
+        params.email = normalize_email(params.email)
 
         # Validate request params
         if not params.email:
@@ -221,19 +194,21 @@ def create_user_handler(
             raise ValueError("Role is required")
 
         # Check if email already exists
-        existing_user = session.query(
-            User.user_id,
-        ).filter(
-            User.email == params.email,
-            User.is_deleted == False,
-        ).first()
+        existing_user = await session.scalar(
+            select(
+                User.user_id,
+            ).filter(
+                func.lower(User.email) == params.email,
+                User.is_deleted == False,
+            )
+        )
 
         if existing_user:
             raise ValueError("Email already exists")
 
         # Generate random password
         random_code = generate_random_code(length=6)
-        random_password = encrypt_password(
+        random_password = await encrypt_password(
             password=random_code + "_" + str(func.now()),
         )
 
@@ -243,17 +218,25 @@ def create_user_handler(
             password=random_password,
             full_name=params.full_name,
             role=params.role,
-            verify_code=random_code,
             is_active=True,
             is_verified=False,
-            created_by=int(payload.user_id),
+            created_by=principal.user_id,
             updated_at=func.now(),
         )
 
         session.add(new_user)
+        await session.flush()
+
+        # Save activation code
+        await save_auth_code(
+            session=session,
+            user_id=new_user.user_id,
+            purpose=PURPOSE_VERIFY_ACCOUNT,
+            code=random_code,
+        )
 
         # Commit transactions
-        session.commit()
+        await session.commit()
 
         # Send email
         try:
@@ -264,7 +247,7 @@ def create_user_handler(
                 message=f"Click link below to verify your account and confirm a new password. Your activation code: {random_code}.\n<a href='{app_config.FRONTEND_APP_URL}/confirm-account?email={params.email}'>Confirm account</a>",
             )
 
-            mail.send()
+            await run_in_threadpool(mail.send)
         except Exception as e:
             log_error.add_error(
                 message="An error occurred during create user: send email",
@@ -282,13 +265,14 @@ def create_user_handler(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail=str(e),
         )
-    except ForbiddenError as e:
+    except ServiceUnavailableError as e:
         raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
             detail=str(e),
+            headers={"Retry-After": str(e.retry_after)},
         )
     except Exception as e:
-        session.rollback()
+        await session.rollback()
 
         log_error.add_error(
             message="An error occurred during create user",
@@ -301,21 +285,12 @@ def create_user_handler(
         )
 
 
-def change_user_status_handler(
+async def change_user_status_handler(
         request: Request,
         params: ChangeUserStatusRequest,
-        payload: AuthPayload,
-        session: Session,
+        session: AsyncSession,
     ):
     try:
-        # Verify if user has permission to update user
-        if not is_user_can(
-                session=session,
-                user_id=int(payload.user_id),
-                capabilities=[UPDATE_USER],
-            ):
-            raise ForbiddenError(ERROR_MESSAGES["forbidden"])
-
         # Validate request params
         if not params.user_id:
             raise ValueError("User ID is required")
@@ -324,12 +299,14 @@ def change_user_status_handler(
             raise ValueError("Active status is required")
 
         # Check if user exists
-        user = session.query(
-            User,
-        ).filter(
-            User.user_id == params.user_id,
-            User.is_deleted == False,
-        ).first()
+        user = await session.scalar(
+            select(
+                User,
+            ).filter(
+                User.user_id == params.user_id,
+                User.is_deleted == False,
+            )
+        )
 
         if not user:
             raise DataNotFoundError("User not found")
@@ -338,8 +315,17 @@ def change_user_status_handler(
         user.is_active = params.is_active
         user.updated_at = func.now()
 
+        # Revoke issued access tokens of deactivated user
+        event = None
+
+        if not params.is_active:
+            event = await revoke_user_tokens(session=session, user_id=user.user_id)
+
         # Commit transactions
-        session.commit()
+        await session.commit()
+
+        if event:
+            dispatch_event(event)
 
         return {
             "data": {
@@ -352,18 +338,13 @@ def change_user_status_handler(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail=str(e),
         )
-    except ForbiddenError as e:
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail=str(e),
-        )
     except DataNotFoundError as e:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail=str(e),
         )
     except Exception as e:
-        session.rollback()
+        await session.rollback()
 
         log_error.add_error(
             message="An error occurred during change user status",
@@ -376,21 +357,12 @@ def change_user_status_handler(
         )
 
 
-def change_user_role_handler(
+async def change_user_role_handler(
         request: Request,
         params: ChangeUserRoleRequest,
-        payload: AuthPayload,
-        session: Session,
+        session: AsyncSession,
     ):
     try:
-        # Verify if user has permission to update user
-        if not is_user_can(
-                session=session,
-                user_id=int(payload.user_id),
-                capabilities=[UPDATE_USER],
-            ):
-            raise ForbiddenError(ERROR_MESSAGES["forbidden"])
-
         # Validate request params
         if not params.user_id:
             raise ValueError("User ID is required")
@@ -399,12 +371,14 @@ def change_user_role_handler(
             raise ValueError("Role is required")
 
         # Check if user exists
-        user = session.query(
-            User,
-        ).filter(
-            User.user_id == params.user_id,
-            User.is_deleted == False,
-        ).first()
+        user = await session.scalar(
+            select(
+                User,
+            ).filter(
+                User.user_id == params.user_id,
+                User.is_deleted == False,
+            )
+        )
 
         if not user:
             raise DataNotFoundError("User not found")
@@ -413,8 +387,17 @@ def change_user_role_handler(
         user.role = params.role
         user.updated_at = func.now()
 
+        # Embedded claims carry the old role, revoke issued access tokens
+        event = None
+
+        if app_config.JWT_EMBED_CLAIMS:
+            event = await revoke_user_tokens(session=session, user_id=user.user_id)
+
         # Commit transactions
-        session.commit()
+        await session.commit()
+
+        if event is not None:
+            dispatch_event(event)
 
         return {
             "data": {
@@ -427,18 +410,13 @@ def change_user_role_handler(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail=str(e),
         )
-    except ForbiddenError as e:
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail=str(e),
-        )
     except DataNotFoundError as e:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail=str(e),
         )
     except Exception as e:
-        session.rollback()
+        await session.rollback()
 
         log_error.add_error(
             message="An error occurred during change user role",
@@ -451,21 +429,13 @@ def change_user_role_handler(
         )
 
 
-def delete_user_handler(
+async def delete_user_handler(
         request: Request,
         params: DeleteUserRequest,
-        payload: AuthPayload,
-        session: Session,
+        principal: Principal,
+        session: AsyncSession,
     ):
     try:
-        # Verify if user has permission to delete user
-        if not is_user_can(
-                session=session,
-                user_id=int(payload.user_id),
-                capabilities=[DELETE_USER],
-            ):
-            raise ForbiddenError(ERROR_MESSAGES["forbidden"])
-
         # Validate request params
         if not params.user_id:
             raise ValueError("User ID is required")
@@ -474,16 +444,18 @@ def delete_user_handler(
         if is_superadmin(params.user_id):
             raise ForbiddenError("Forbidden access to delete superadmin")
 
-        if int(payload.user_id) == params.user_id:
+        if principal.user_id == params.user_id:
             raise ForbiddenError("Forbidden access to delete my self")
 
         # Check if user exists
-        user = session.query(
-            User,
-        ).filter(
-            User.user_id == params.user_id,
-            User.is_deleted == False,
-        ).first()
+        user = await session.scalar(
+            select(
+                User,
+            ).filter(
+                User.user_id == params.user_id,
+                User.is_deleted == False,
+            )
+        )
 
         if not user:
             raise DataNotFoundError("User not found")
@@ -492,8 +464,13 @@ def delete_user_handler(
         user.is_deleted = True
         user.updated_at = func.now()
 
+        # Revoke issued access tokens
+        event = await revoke_user_tokens(session=session, user_id=user.user_id)
+
         # Commit transactions
-        session.commit()
+        await session.commit()
+
+        dispatch_event(event)
 
         return {
             "data": {
@@ -517,7 +494,7 @@ def delete_user_handler(
             detail=str(e),
         )
     except Exception as e:
-        session.rollback()
+        await session.rollback()
 
         log_error.add_error(
             message="An error occurred during delete user",
@@ -528,3 +505,69 @@ def delete_user_handler(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="An error occurred during delete user" if app_config.ENV == "production" else str(e),
         )
+
+
+async def revoke_users_sessions_handler(
+        request: Request,
+        params: RevokeUsersSessionsRequest,
+        principal: Principal,
+        session: AsyncSession,
+    ):
+    try:
+        # Validate request params
+        user_ids = sorted(set(params.user_ids))
+
+        if not user_ids:
+            raise ValueError("User IDs are required")
+
+        if len(user_ids) > MAX_REVOKE_USERS:
+            raise ValueError(f"Maximum {MAX_REVOKE_USERS} users per request")
+
+        # Only superadmin can revoke superadmin sessions
+        if any(is_superadmin(user_id) for user_id in user_ids) and not is_superadmin(principal.user_id):
+            raise ForbiddenError("Forbidden access to revoke superadmin sessions")
+
+        # Delete refresh tokens of all users at once
+        deleted_count = await delete_refresh_tokens(
+            session=session,
+            user_ids=user_ids,
+        )
+
+        # Revoke issued access tokens
+        events = await revoke_users_tokens(session=session, user_ids=user_ids)
+
+        # Commit transactions
+        await session.commit()
+
+        for event in events:
+            dispatch_event(event)
+
+        return {
+            "data": {
+                "user_count": len(events),
+                "deleted_count": deleted_count,
+                "status": "sessions_revoked",
+            },
+        }
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e),
+        )
+    except ForbiddenError as e:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail=str(e),
+        )
+    except Exception as e:
+        await session.rollback()
+
+        log_error.add_error(
+            message="An error occurred during revoke users sessions",
+            exc_info=e,
+        )
+
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="An error occurred during revoke users sessions" if app_config.ENV == "production" else str(e),
+        )
@@ -19,3 +19,7 @@ class ChangeUserRoleRequest(BaseModel):
 
 class DeleteUserRequest(BaseModel):
     user_id: int = 0
+
+
+class RevokeUsersSessionsRequest(BaseModel):
+    user_ids: list[int] = []
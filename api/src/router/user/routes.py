@@ -1,15 +1,23 @@
 from fastapi import APIRouter, Depends, Request
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from src.db import db_session
-from src.dependencies.auth import authorize_token
-from src.models.auth import AuthPayload
+from src.db import async_db_session
+from src.dependencies.auth import get_principal, require
+from src.models.auth import Principal
+
+from src.constants.capabilities import (
+    READ_USER,
+    CREATE_USER,
+    UPDATE_USER,
+    DELETE_USER,
+)
 
 from .models import (
     CreateUserRequest,
     ChangeUserStatusRequest,
     ChangeUserRoleRequest,
     DeleteUserRequest,
+    RevokeUsersSessionsRequest,
 )
 
 from .handlers import (
@@ -19,6 +27,7 @@ from .handlers import (
     change_user_status_handler,
     change_user_role_handler,
     delete_user_handler,
+    revoke_users_sessions_handler,
 )
 
 
@@ -27,90 +36,96 @@ user_router = APIRouter(
     tags=["User"],
 )
 
-@user_router.get("/list")
-def route_get_users(
+@user_router.get("/list", dependencies=[require(READ_USER)])
+async def route_get_users(
         request: Request,
         search: str = "",
         page: int = 1,
         limit: int = 10,
-        payload: AuthPayload = Depends(authorize_token),
-        session: Session = Depends(db_session),
+        session: AsyncSession = Depends(async_db_session),
     ):
-    return get_users_handler(
+    return await get_users_handler(
         request=request,
-        payload=payload,
         session=session,
         search=search,
         page=page,
         limit=limit,
     )
 
-@user_router.get("/detail/{user_id}")
-def route_get_user(
+@user_router.get("/detail/{user_id}", dependencies=[require(READ_USER)])
+async def route_get_user(
         request: Request,
         user_id: int,
-        payload: AuthPayload = Depends(authorize_token),
-        session: Session = Depends(db_session),
+        session: AsyncSession = Depends(async_db_session),
     ):
-    return get_user_handler(
+    return await get_user_handler(
         request=request,
         user_id=user_id,
-        payload=payload,
         session=session,
     )
 
-@user_router.post("/create")
-def route_create_user(
+@user_router.post("/create", dependencies=[require(CREATE_USER)])
+async def route_create_user(
         request: Request,
         params: CreateUserRequest,
-        payload: AuthPayload = Depends(authorize_token),
-        session: Session = Depends(db_session),
+        principal: Principal = Depends(get_principal),
+        session: AsyncSession = Depends(async_db_session),
     ):
-    return create_user_handler(
+    return await create_user_handler(
         request=request,
         params=params,
-        payload=payload,
+        principal=principal,
         session=session,
     )
 
-@user_router.patch("/change-status")
-def route_change_user_status(
+@user_router.patch("/change-status", dependencies=[require(UPDATE_USER)])
+async def route_change_user_status(
         request: Request,
         params: ChangeUserStatusRequest,
-        payload: AuthPayload = Depends(authorize_token),
-        session: Session = Depends(db_session),
+        session: AsyncSession = Depends(async_db_session),
     ):
-    return change_user_status_handler(
+    return await change_user_status_handler(
         request=request,
         params=params,
-        payload=payload,
         session=session,
     )
 
-@user_router.patch("/change-role")
-def route_change_user_role(
+@user_router.patch("/change-role", dependencies=[require(UPDATE_USER)])
+async def route_change_user_role(
         request: Request,
         params: ChangeUserRoleRequest,
-        payload: AuthPayload = Depends(authorize_token),
-        session: Session = Depends(db_session),
+        session: AsyncSession = Depends(async_db_session),
     ):
-    return change_user_role_handler(
+    return await change_user_role_handler(
         request=request,
         params=params,
-        payload=payload,
         session=session,
     )
 
-@user_router.delete("/delete")
-def route_delete_user(
+@user_router.delete("/delete", dependencies=[require(DELETE_USER)])
+async def route_delete_user(
         request: Request,
         params: DeleteUserRequest,
-        payload: AuthPayload = Depends(authorize_token),
-        session: Session = Depends(db_session),
+        principal: Principal = Depends(get_principal),
+        session: AsyncSession = Depends(async_db_session),
+    ):
+    return await delete_user_handler(
+        request=request,
+        params=params,
+        principal=principal,
+        session=session,
+    )
+
+@user_router.post("/revoke-sessions", dependencies=[require(UPDATE_USER)])
+async def route_revoke_users_sessions(
+        request: Request,
+        params: RevokeUsersSessionsRequest,
+        principal: Principal = Depends(get_principal),
+        session: AsyncSession = Depends(async_db_session),
     ):
-    return delete_user_handler(
+    return await revoke_users_sessions_handler(
         request=request,
         params=params,
-        payload=payload,
+        principal=principal,
         session=session,
     )
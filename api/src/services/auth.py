@@ -1,10 +1,33 @@
-import bcrypt
+import hashlib
+import hmac
+import secrets
 import time
 
-from jose import jwt, JWTError
-
+from lib.cache import TTLCache
+from lib.log_error import log_error
 from src.config import app_config
+from src.error import InvalidTokenError
 from src.models.auth import AuthPayload
+from src.services.hashers import needs_rehash
+from src.services.jwt_backend import jwt_backend, get_unverified_header, validate_claims
+from src.services.keyring import jwt_keyring, is_asymmetric_algorithm
+from src.services.hashing import (
+    hashing_engine,
+    hash_password_worker,
+    check_password_worker,
+    PRIORITY_HASH,
+    PRIORITY_VERIFY,
+)
+
+
+# Verified access tokens keyed by token digest
+verified_token_cache = TTLCache(
+    max_entries=app_config.JWT_CACHE_MAX_ENTRIES,
+    max_bytes=app_config.JWT_CACHE_MAX_MB * 1024 * 1024,
+)
+
+# Estimated memory of a cached payload besides the claims, which grow with the token length
+CACHE_ENTRY_OVERHEAD = 512
 
 
 def superadmin_id() -> int:
@@ -12,25 +35,76 @@ def superadmin_id() -> int:
     return 1
 
 
-def encrypt_password(password: str) -> str:
-    """Encrypt password using bcrypt"""
+async def encrypt_password(password: str) -> str:
+    """Encrypt password using the configured hasher"""
     try:
-        hashed = bcrypt.hashpw(password.encode("utf-8"), bcrypt.gensalt())
-        return hashed.decode("utf-8")
+        return await hashing_engine.run_async(hash_password_worker, password, priority=PRIORITY_HASH)
     except Exception as e:
         raise e
 
 
-def verify_password(password: str, hashed_password: str) -> bool:
-    """Compare plain password with hashed password"""
+async def verify_password(password: str, hashed_password: str) -> bool:
+    """Compare plain password with hashed password, a malformed stored hash never matches"""
     try:
-        return bcrypt.checkpw(password.encode("utf-8"), hashed_password.encode("utf-8"))
+        return await hashing_engine.run_async(check_password_worker, password, hashed_password, priority=PRIORITY_VERIFY)
+    except ValueError as e:
+        # Same answer as a wrong password, the stored hash is not revealed to the client
+        log_error.add_error(
+            message="An error occurred during verify password, unknown or malformed stored hash",
+            exc_info=e,
+        )
+        return False
     except Exception as e:
         raise e
 
 
-def generate_token(user_id: str) -> dict:
-    """Generate access token and refresh token"""
+def password_needs_rehash(hashed_password: str) -> bool:
+    """Verify if hashed password should be replaced after a successful login"""
+    try:
+        return needs_rehash(hashed_password)
+    except ValueError:
+        return False
+
+
+def get_signing_key() -> tuple:
+    """Get key and headers used to sign access token"""
+    if is_asymmetric_algorithm(app_config.JWT_ALGORITHM):
+        kid, private_key = jwt_keyring.get_signing_key()
+        return private_key, {"kid": kid}
+
+    return app_config.JWT_SECRET_KEY, None
+
+
+def get_verification_key(token: str):
+    """Get key used to verify access token"""
+    if is_asymmetric_algorithm(app_config.JWT_ALGORITHM):
+        kid = get_unverified_header(token).get("kid")
+        public_key = jwt_keyring.get_verification_key(kid) if isinstance(kid, str) else None
+
+        if public_key is None:
+            raise InvalidTokenError("Unknown signing key")
+
+        return public_key
+
+    return app_config.JWT_SECRET_KEY
+
+
+def generate_refresh_token() -> str:
+    """Generate random opaque refresh token"""
+    return secrets.token_urlsafe(48)
+
+
+def hash_token(token: str) -> str:
+    """Create fixed-length keyed digest (HMAC-SHA256) of a refresh token"""
+    return hmac.new(
+        app_config.REFRESH_TOKEN_HASH_KEY.encode("utf-8"),
+        token.encode("utf-8"),
+        hashlib.sha256,
+    ).hexdigest()
+
+
+def generate_token(user_id: str, epoch: int = 0, claims: dict | None = None, refresh_token: str | None = None) -> dict:
+    """Generate access token and refresh token, optionally with authorization claims"""
     try:
         current_time = int(time.time())
 
@@ -39,49 +113,74 @@ def generate_token(user_id: str) -> dict:
             "sub": user_id,
             "iat": current_time,
             "exp": current_time + app_config.JWT_TOKEN_DURATION_MINUTES * 60,
+            "jti": secrets.token_urlsafe(12),
+            "ep": epoch,
         }
 
-        access_token = jwt.encode(
-            payload,
-            app_config.JWT_SECRET_KEY,
-            algorithm=app_config.JWT_ALGORITHM,
-        )
+        if claims:
+            payload.update(claims)
 
-        # create refresh token
-        payload_refresh = {
-            "sub": user_id,
-            "iat": current_time,
-            "exp": current_time + app_config.JWT_REFRESH_TOKEN_DURATION_DAYS * 24 * 60 * 60,
-        }
+        signing_key, headers = get_signing_key()
 
-        refresh_token = jwt.encode(
-            payload_refresh,
-            app_config.JWT_SECRET_KEY,
+        access_token = jwt_backend.encode(
+            payload,
+            signing_key,
             algorithm=app_config.JWT_ALGORITHM,
+            headers=headers,
         )
 
-        hashed_refresh_token = encrypt_password(refresh_token)
+        # create opaque refresh token, only its digest is stored
+        if refresh_token is None:
+            refresh_token = generate_refresh_token()
 
         return {
             "access_token": access_token,
-            "refresh_token": hashed_refresh_token,
+            "refresh_token": refresh_token,
             "token_type": "bearer",
         }
-    except JWTError as err:
+    except Exception as err:
         raise err
 
 
 def verify_token(token: str) -> AuthPayload:
     """Verify token by returning payload"""
     try:
-        payload = jwt.decode(
-            token,
-            app_config.JWT_SECRET_KEY,
-            algorithms=app_config.JWT_ALGORITHM,
+        # Return cached payload until the token expires, within the same leeway as verification
+        if app_config.JWT_CACHE_ENABLED:
+            cache_key = hashlib.sha256(token.encode("utf-8")).digest()
+            cached_payload = verified_token_cache.get(cache_key)
+
+            if cached_payload is not None:
+                return cached_payload
+
+        # Verify signature, then validate claims the same way for every backend
+        payload = validate_claims(
+            jwt_backend.decode(
+                token,
+                get_verification_key(token),
+                algorithm=app_config.JWT_ALGORITHM,
+            ),
+            leeway=app_config.JWT_LEEWAY_SECONDS,
         )
 
-        return AuthPayload(
+        auth_payload = AuthPayload(
             user_id=payload.get("sub"),
+            exp=payload.get("exp", 0),
+            role_id=payload.get("rid"),
+            role_version=payload.get("rv"),
+            capabilities=payload.get("caps"),
+            jti=payload.get("jti"),
+            epoch=payload.get("ep"),
         )
-    except JWTError as err:
+
+        if app_config.JWT_CACHE_ENABLED and auth_payload.exp:
+            verified_token_cache.set(
+                cache_key,
+                auth_payload,
+                expires_at=auth_payload.exp + app_config.JWT_LEEWAY_SECONDS,
+                size=CACHE_ENTRY_OVERHEAD + len(token),
+            )
+
+        return auth_payload
+    except InvalidTokenError as err:
         raise err
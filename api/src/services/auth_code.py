@@ -0,0 +1,87 @@
+import datetime
+
+from sqlalchemy import delete, update
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.sql import func
+
+from src.config import app_config
+from src.repository import AuthCode
+from src.services.auth import hash_token
+
+
+PURPOSE_RESET_PASSWORD = "reset_password"
+PURPOSE_VERIFY_ACCOUNT = "verify_account"
+
+
+def get_auth_code_expire_minutes(purpose: str) -> int:
+    """Get lifetime of a code by purpose"""
+    if purpose == PURPOSE_RESET_PASSWORD:
+        return app_config.AUTH_CODE_RESET_EXPIRE_MINUTES
+
+    if purpose == PURPOSE_VERIFY_ACCOUNT:
+        return app_config.AUTH_CODE_VERIFY_EXPIRE_MINUTES
+
+    raise ValueError(f"Unsupported code purpose: {purpose}")
+
+
+async def save_auth_code(session: AsyncSession, user_id: int, purpose: str, code: str):
+    """Save code digest, a new code replaces the previous code of the same purpose"""
+    stmt = insert(
+        AuthCode,
+    ).values(
+        user_id=user_id,
+        purpose=purpose,
+        code_digest=hash_token(code),
+        attempts=0,
+        expires_at=func.now() + datetime.timedelta(minutes=get_auth_code_expire_minutes(purpose)),
+    )
+
+    await session.execute(
+        stmt.on_conflict_do_update(
+            index_elements=[AuthCode.user_id, AuthCode.purpose],
+            set_={
+                "code_digest": stmt.excluded.code_digest,
+                "attempts": 0,
+                "created_at": func.now(),
+                "expires_at": stmt.excluded.expires_at,
+            },
+        )
+    )
+
+
+async def consume_auth_code(session: AsyncSession, user_id: int, purpose: str, code: str) -> bool:
+    """Delete code when it matches, otherwise count the failed attempt.
+
+    Expired codes and codes out of attempts never match. The failed attempt
+    is only saved when the caller commits.
+    """
+    result = await session.execute(
+        delete(
+            AuthCode,
+        ).where(
+            AuthCode.user_id == user_id,
+            AuthCode.purpose == purpose,
+            AuthCode.code_digest == hash_token(code),
+            AuthCode.expires_at > func.now(),
+            AuthCode.attempts < app_config.AUTH_CODE_MAX_ATTEMPTS,
+        ).returning(
+            AuthCode.user_id,
+        )
+    )
+
+    if result.first() is not None:
+        return True
+
+    await session.execute(
+        update(
+            AuthCode,
+        ).where(
+            AuthCode.user_id == user_id,
+            AuthCode.purpose == purpose,
+        ).values(
+            attempts=AuthCode.attempts + 1,
+        )
+    )
+
+    return False
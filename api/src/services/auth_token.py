@@ -0,0 +1,199 @@
+import base64
+import datetime
+
+from sqlalchemy import delete, insert, literal, select, tuple_
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.engine import Row
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.sql import func
+
+from lib.user_agent import parse_user_agent
+from src.config import app_config
+from src.repository import User, AuthToken
+from src.services.user import get_user_claims_columns
+
+
+def get_refresh_token_expiration():
+    """Get expiration date of a new refresh token"""
+    return func.now() + datetime.timedelta(
+        days=int(app_config.JWT_REFRESH_TOKEN_DURATION_DAYS),
+    )
+
+
+def get_refresh_token_metadata(user_agent: str | None) -> dict:
+    """Get metadata stored with a refresh token, parsed once when it is created"""
+    return {
+        "device": parse_user_agent(user_agent),
+    }
+
+
+async def create_refresh_token(
+        session: AsyncSession,
+        user_id: int,
+        token_digest: str,
+        user_agent: str | None,
+        ip_address: str | None,
+    ):
+    """Save refresh token digest without loading it into the session"""
+    await session.execute(
+        insert(
+            AuthToken,
+        ).values(
+            user_id=user_id,
+            token_digest=token_digest,
+            user_agent=user_agent,
+            ip_address=ip_address,
+            log_metadata=get_refresh_token_metadata(user_agent),
+            expires_at=get_refresh_token_expiration(),
+        )
+    )
+
+
+async def delete_refresh_tokens(
+        session: AsyncSession,
+        user_ids: list[int],
+        except_token_digest: str | None = None,
+    ) -> int:
+    """Delete refresh tokens of users in one statement, optionally keeping one session"""
+    stmt = delete(
+        AuthToken,
+    ).where(
+        AuthToken.user_id.in_(user_ids),
+    )
+
+    if except_token_digest is not None:
+        stmt = stmt.where(AuthToken.token_digest != except_token_digest)
+
+    result = await session.execute(stmt)
+
+    return result.rowcount
+
+
+async def rotate_refresh_token(
+        session: AsyncSession,
+        token_digest: str,
+        new_token_digest: str,
+        user_agent: str | None,
+        ip_address: str | None,
+    ) -> Row | None:
+    """Replace refresh token with a new one in a single statement.
+
+    The old token is deleted and the new token is inserted only when the old
+    token is not expired and its user is active. Concurrent rotations of the
+    same token wait on the deleted row, so only one of them succeeds.
+
+    Returns None when the token does not exist, otherwise a row with
+    user_id, expires_at, is_valid, token_epoch, role and claims columns.
+    """
+    old_token = delete(
+        AuthToken,
+    ).where(
+        AuthToken.token_digest == token_digest,
+    ).returning(
+        AuthToken.user_id,
+        AuthToken.expires_at,
+    ).cte("old_token")
+
+    valid_user = select(
+        User.user_id,
+        User.token_epoch,
+        User.role,
+        *get_user_claims_columns(),
+    ).join(
+        old_token,
+        old_token.c.user_id == User.user_id,
+    ).where(
+        old_token.c.expires_at > func.now(),
+        User.is_active == True,
+        User.is_deleted == False,
+    ).cte("valid_user")
+
+    new_token = insert(
+        AuthToken,
+    ).from_select(
+        [
+            AuthToken.user_id,
+            AuthToken.token_digest,
+            AuthToken.user_agent,
+            AuthToken.ip_address,
+            AuthToken.log_metadata,
+            AuthToken.expires_at,
+        ],
+        select(
+            valid_user.c.user_id,
+            literal(new_token_digest),
+            literal(user_agent),
+            literal(ip_address),
+            literal(get_refresh_token_metadata(user_agent), JSONB),
+            get_refresh_token_expiration(),
+        ),
+    ).returning(
+        AuthToken.auth_id,
+    ).cte("new_token")
+
+    result = await session.execute(
+        select(
+            old_token.c.user_id,
+            old_token.c.expires_at,
+            select(func.count()).select_from(new_token).scalar_subquery().label("is_valid"),
+            valid_user.c.token_epoch,
+            valid_user.c.role,
+            valid_user.c.role_version,
+            valid_user.c.capability_ids,
+        ).select_from(
+            old_token,
+        ).outerjoin(
+            valid_user,
+            valid_user.c.user_id == old_token.c.user_id,
+        )
+    )
+
+    return result.first()
+
+
+def encode_tokens_cursor(created_at: datetime.datetime, auth_id: int) -> str:
+    """Encode last row of a page as opaque cursor"""
+    value = f"{created_at.isoformat()}|{auth_id}"
+    return base64.urlsafe_b64encode(value.encode("utf-8")).decode("ascii")
+
+
+def decode_tokens_cursor(cursor: str) -> tuple[datetime.datetime, int]:
+    """Decode cursor into (created_at, auth_id)"""
+    try:
+        created_at, auth_id = base64.urlsafe_b64decode(cursor.encode("ascii")).decode("utf-8").split("|")
+        return datetime.datetime.fromisoformat(created_at), int(auth_id)
+    except Exception:
+        raise ValueError("Invalid cursor")
+
+
+async def get_active_refresh_tokens(
+        session: AsyncSession,
+        user_id: int,
+        limit: int,
+        cursor: tuple | None = None,
+    ) -> list[Row]:
+    """Get page of unexpired refresh tokens, newest first.
+
+    Keyset pagination on (created_at, auth_id), cursor is the last row of
+    the previous page.
+    """
+    stmt = select(
+        AuthToken.auth_id,
+        AuthToken.created_at,
+        AuthToken.ip_address,
+        AuthToken.user_agent,
+        AuthToken.log_metadata,
+    ).where(
+        AuthToken.user_id == user_id,
+        AuthToken.expires_at > func.now(),
+    ).order_by(
+        AuthToken.created_at.desc(),
+        AuthToken.auth_id.desc(),
+    ).limit(
+        limit,
+    )
+
+    if cursor is not None:
+        stmt = stmt.where(tuple_(AuthToken.created_at, AuthToken.auth_id) < cursor)
+
+    return (await session.execute(stmt)).all()
@@ -0,0 +1,161 @@
+import threading
+
+from sqlalchemy import text
+from sqlalchemy.engine import Connection
+
+from src.db import engine
+from src.services.events import notify_event
+from src.services.role_cache import EVENT_ROLE_CHANGED
+from src.services.role import get_all_role_capabilities, freeze_role_capabilities
+
+
+# Masks are stored in a signed BIGINT column
+MAX_CAPABILITY_BITS = 63
+
+# Advisory lock key serializing bit assignment between workers
+CAPABILITY_BITS_LOCK_ID = 7310002
+
+QUERY_ASSIGN_CAPABILITY_BITS = """
+    INSERT INTO capability_bits (capability_id, bit)
+    SELECT capability_id, (SELECT coalesce(max(bit), -1) FROM capability_bits) + row_number() OVER (ORDER BY ordinality)
+    FROM unnest(CAST(:capability_ids AS VARCHAR[])) WITH ORDINALITY AS registered (capability_id, ordinality)
+    WHERE capability_id NOT IN (SELECT capability_id FROM capability_bits)
+"""
+
+QUERY_REFRESH_ROLE_CAPABILITY_MASKS = """
+    WITH role_masks AS (
+        SELECT roles.role_id, coalesce(bit_or(CAST(1 AS BIGINT) << capability_bits.bit), 0) AS capability_mask
+        FROM roles
+        LEFT JOIN role_capabilities ON role_capabilities.role_id = roles.role_id
+        LEFT JOIN capability_bits ON capability_bits.capability_id = role_capabilities.capability_id
+        GROUP BY roles.role_id
+    )
+    UPDATE roles SET capability_mask = role_masks.capability_mask
+    FROM role_masks
+    WHERE roles.role_id = role_masks.role_id
+    AND roles.capability_mask <> role_masks.capability_mask
+"""
+
+
+class CapabilityRegistry:
+    """Stable capability -> bit index shared by every worker.
+
+    Bits are assigned once in the capability_bits table in registration
+    order and never reused, so masks stored on roles stay valid across
+    deploys. The registry is frozen at startup, after every module
+    registered its capabilities.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._bits = None
+
+    @property
+    def is_frozen(self) -> bool:
+        return self._bits is not None
+
+    def get_registered_ids(self) -> list[str]:
+        return [
+            capability["id"]
+            for module in get_all_role_capabilities()
+            for capability in module["capabilities"]
+        ]
+
+    def check_duplicates(self):
+        """Raise when a capability id is registered more than once"""
+        modules_by_id = {}
+
+        for module in get_all_role_capabilities():
+            for capability in module["capabilities"]:
+                modules_by_id.setdefault(capability["id"], []).append(module["module_id"])
+
+        duplicates = [
+            f"{capability_id} ({', '.join(module_ids)})"
+            for capability_id, module_ids in modules_by_id.items()
+            if len(module_ids) > 1
+        ]
+
+        if duplicates:
+            raise RuntimeError(f"Capabilities registered more than once: {', '.join(duplicates)}")
+
+    def check_capacity(self, assigned_bits: dict, registered_ids: list[str]):
+        """Raise when new capabilities would need more bits than a mask holds"""
+        new_count = len(set(registered_ids) - assigned_bits.keys())
+        next_bit = max(assigned_bits.values(), default=-1) + 1
+
+        if next_bit + new_count > MAX_CAPABILITY_BITS:
+            raise RuntimeError(
+                f"Maximum {MAX_CAPABILITY_BITS} capabilities are supported, "
+                f"{next_bit} bits are assigned and {new_count} capabilities are new"
+            )
+
+    def freeze(self, connection: Connection) -> int:
+        """Assign bits of new capabilities and refresh role masks.
+
+        Returns number of roles whose mask changed.
+        """
+        self.check_duplicates()
+
+        registered_ids = self.get_registered_ids()
+
+        connection.execute(text("SELECT pg_advisory_xact_lock(:lock_id)"), {"lock_id": CAPABILITY_BITS_LOCK_ID})
+
+        self.check_capacity(
+            assigned_bits=dict(connection.execute(text("SELECT capability_id, bit FROM capability_bits")).all()),
+            registered_ids=registered_ids,
+        )
+
+        connection.execute(text(QUERY_ASSIGN_CAPABILITY_BITS), {"capability_ids": registered_ids})
+
+        bits = dict(connection.execute(text("SELECT capability_id, bit FROM capability_bits")).all())
+
+        updated_count = connection.execute(text(QUERY_REFRESH_ROLE_CAPABILITY_MASKS)).rowcount
+
+        freeze_role_capabilities()
+
+        with self._lock:
+            self._bits = bits
+
+        return updated_count
+
+    def get_unknown(self, capability_ids: list[str]) -> list[str]:
+        """Get capability ids that are not registered"""
+        registered = set(self.get_registered_ids())
+        return [capability_id for capability_id in capability_ids if capability_id not in registered]
+
+    def get_mask(self, capability_ids: list[str]) -> int:
+        """Get bitmask of capabilities, unknown capabilities have no bit"""
+        if self._bits is None:
+            raise RuntimeError("Capability registry is not frozen")
+
+        mask = 0
+
+        for capability_id in capability_ids:
+            bit = self._bits.get(capability_id)
+
+            if bit is not None:
+                mask |= 1 << bit
+
+        return mask
+
+    def stats(self) -> dict:
+        return {
+            "frozen": self.is_frozen,
+            "capabilities": len(self._bits or {}),
+        }
+
+
+capability_registry = CapabilityRegistry()
+
+
+def freeze_capability_registry():
+    """Freeze registry of current worker, called on startup"""
+    with engine.begin() as connection:
+        updated_count = capability_registry.freeze(connection=connection)
+
+    # Masks changed by a new module, reload roles on running workers
+    if updated_count:
+        notify_event({
+            "type": EVENT_ROLE_CHANGED,
+            "role_id": 0,
+        })
@@ -0,0 +1,16 @@
+from fastapi import Request
+
+from lib.client_ip import parse_networks, resolve_client_ip
+from src.config import app_config
+
+
+trusted_proxies = parse_networks(app_config.TRUSTED_PROXIES)
+
+
+def get_client_ip(request: Request) -> str | None:
+    """Get client address, resolved through X-Forwarded-For of trusted proxies"""
+    return resolve_client_ip(
+        peer=request.client.host if request.client else None,
+        forwarded_for=request.headers.get("x-forwarded-for"),
+        trusted_proxies=trusted_proxies,
+    )
@@ -0,0 +1,221 @@
+import json
+import threading
+
+from select import select as wait_readable
+
+from sqlalchemy import select
+from sqlalchemy.dialects.postgresql import array
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.sql import func
+
+from lib.log_error import log_error
+from src.config import app_config
+from src.db import engine
+
+
+# Event type -> list of handlers
+event_handlers = {}
+
+# Called after the listener subscribed, to load state published before
+resync_handlers = []
+
+
+def register_event_handler(event_type: str, handler):
+    """Register handler for event published by any worker"""
+    global event_handlers
+    event_handlers.setdefault(event_type, []).append(handler)
+
+
+def register_resync_handler(handler):
+    """Register handler to reload state when listener is (re)subscribed"""
+    global resync_handlers
+    resync_handlers.append(handler)
+
+
+def dispatch_event(event: dict):
+    """Run handlers of event in current worker"""
+    for handler in event_handlers.get(event["type"], []):
+        try:
+            handler(event)
+        except Exception as e:
+            log_error.add_error(
+                message=f"An error occurred during handle event {event['type']}",
+                exc_info=e,
+            )
+
+
+async def publish_event(session: AsyncSession, event: dict):
+    """Notify all workers, delivered when the transaction is committed"""
+    if not app_config.EVENTS_ENABLED:
+        return
+
+    await session.execute(
+        func.pg_notify(app_config.EVENTS_CHANNEL, json.dumps(event, separators=(",", ":"))).select()
+    )
+
+
+async def publish_events(session: AsyncSession, events: list[dict]):
+    """Notify all workers of many events in one statement"""
+    if not app_config.EVENTS_ENABLED or not events:
+        return
+
+    payloads = func.unnest(
+        array([json.dumps(event, separators=(",", ":")) for event in events])
+    ).table_valued("payload").render_derived()
+
+    await session.execute(
+        select(
+            func.pg_notify(app_config.EVENTS_CHANNEL, payloads.c.payload),
+        ).select_from(
+            payloads,
+        )
+    )
+
+
+def notify_event(event: dict):
+    """Notify all workers outside of a request transaction"""
+    if not app_config.EVENTS_ENABLED or engine.dialect.name != "postgresql":
+        return
+
+    with engine.begin() as connection:
+        connection.execute(
+            func.pg_notify(app_config.EVENTS_CHANNEL, json.dumps(event, separators=(",", ":"))).select()
+        )
+
+
+class EventListener:
+    """Background thread receiving events with PostgreSQL LISTEN.
+
+    Reconnects with exponential backoff when the connection is lost. Events
+    sent while disconnected are lost, so resync handlers run after every
+    subscribe to flush or reload cached state.
+    """
+
+    def __init__(
+            self,
+            channel: str,
+            poll_timeout: float = 5.0,
+            reconnect_min_delay: float = 1.0,
+            reconnect_max_delay: float = 30.0,
+        ):
+        self.channel = channel
+        self.poll_timeout = poll_timeout
+        self.reconnect_min_delay = reconnect_min_delay
+        self.reconnect_max_delay = reconnect_max_delay
+
+        self._thread = None
+        self._stop = threading.Event()
+
+        self.connected = False
+        self.connects = 0
+        self.received = 0
+        self.last_error = None
+
+    def start(self):
+        if self._thread is not None:
+            return
+
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="event-listener", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+        if self._thread is not None:
+            self._thread.join(timeout=self.poll_timeout + 1)
+            self._thread = None
+
+    def _run(self):
+        delay = self.reconnect_min_delay
+
+        while not self._stop.is_set():
+            try:
+                self._listen()
+            except Exception as e:
+                self.last_error = str(e)
+
+                log_error.add_error(
+                    message="An error occurred during listen events",
+                    exc_info=e,
+                )
+
+            # Reset backoff once a connection was established
+            if self.connected:
+                delay = self.reconnect_min_delay
+
+            self.connected = False
+
+            if self._stop.wait(delay):
+                break
+
+            delay = min(delay * 2, self.reconnect_max_delay)
+
+    def _listen(self):
+        # Use a dedicated connection outside of the pool
+        connection = engine.raw_connection()
+        connection.detach()
+
+        dbapi_connection = connection.dbapi_connection
+
+        try:
+            dbapi_connection.autocommit = True
+
+            with dbapi_connection.cursor() as cursor:
+                cursor.execute(f'LISTEN "{self.channel}"')
+
+            self.connected = True
+            self.connects += 1
+
+            # Events may have been missed before subscribing, resync cached state
+            for handler in resync_handlers:
+                handler()
+
+            while not self._stop.is_set():
+                if wait_readable([dbapi_connection], [], [], self.poll_timeout) == ([], [], []):
+                    # Detect a dropped connection while idle
+                    with dbapi_connection.cursor() as cursor:
+                        cursor.execute("SELECT 1")
+
+                    continue
+
+                dbapi_connection.poll()
+
+                while dbapi_connection.notifies:
+                    notify = dbapi_connection.notifies.pop(0)
+                    self.received += 1
+                    dispatch_event(json.loads(notify.payload))
+        finally:
+            dbapi_connection.close()
+
+    def stats(self) -> dict:
+        return {
+            "enabled": self._thread is not None,
+            "channel": self.channel,
+            "connected": self.connected,
+            "connects": self.connects,
+            "received": self.received,
+            "last_error": self.last_error,
+        }
+
+
+event_listener = EventListener(
+    channel=app_config.EVENTS_CHANNEL,
+    reconnect_min_delay=app_config.EVENTS_RECONNECT_MIN_DELAY,
+    reconnect_max_delay=app_config.EVENTS_RECONNECT_MAX_DELAY,
+)
+
+
+def is_receiving_events() -> bool:
+    """Verify if events of other workers are received, True when the listener is not running"""
+    return event_listener._thread is None or event_listener.connected
+
+
+def start_event_listener():
+    """Start listener when events are enabled on PostgreSQL"""
+    if app_config.EVENTS_ENABLED and engine.dialect.name == "postgresql":
+        event_listener.start()
+
+
+def stop_event_listener():
+    event_listener.stop()
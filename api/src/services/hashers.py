@@ -0,0 +1,192 @@
+import base64
+import bcrypt
+import hashlib
+import hmac
+import os
+
+from src.config import app_config
+
+try:
+    import argon2
+except ImportError:
+    argon2 = None
+
+
+def b64encode(data: bytes) -> str:
+    return base64.b64encode(data).decode("ascii").rstrip("=")
+
+
+def b64decode(data: str) -> bytes:
+    return base64.b64decode(data + "=" * (-len(data) % 4))
+
+
+class BcryptHasher:
+    """bcrypt with configurable rounds, hashes look like $2b$12$..."""
+
+    name = "bcrypt"
+
+    def __init__(self, rounds: int):
+        self.rounds = rounds
+
+    def identify(self, hashed_password: str) -> bool:
+        return hashed_password.startswith(("$2a$", "$2b$", "$2y$"))
+
+    def hash(self, password: str) -> str:
+        hashed = bcrypt.hashpw(password.encode("utf-8"), bcrypt.gensalt(rounds=self.rounds))
+        return hashed.decode("utf-8")
+
+    def verify(self, password: str, hashed_password: str) -> bool:
+        return bcrypt.checkpw(password.encode("utf-8"), hashed_password.encode("utf-8"))
+
+    def needs_rehash(self, hashed_password: str) -> bool:
+        # Old $2a$ prefix is rewritten with the current $2b$ format
+        return not hashed_password.startswith("$2b$") or int(hashed_password.split("$")[2]) != self.rounds
+
+
+class ScryptHasher:
+    """hashlib scrypt, hashes look like $scrypt$ln=15,r=8,p=1$<salt>$<hash>"""
+
+    name = "scrypt"
+
+    def __init__(self, log_n: int, r: int, p: int):
+        self.log_n = log_n
+        self.r = r
+        self.p = p
+
+    def identify(self, hashed_password: str) -> bool:
+        return hashed_password.startswith("$scrypt$")
+
+    @staticmethod
+    def memory_bytes(log_n: int, r: int) -> int:
+        """Memory used by one hash, scrypt needs 128 * n * r bytes"""
+        return 128 * (2 ** log_n) * r
+
+    def _derive(self, password: str, salt: bytes, log_n: int, r: int, p: int) -> bytes:
+        n = 2 ** log_n
+
+        return hashlib.scrypt(
+            password.encode("utf-8"),
+            salt=salt,
+            n=n,
+            r=r,
+            p=p,
+            maxmem=256 * n * r,
+            dklen=32,
+        )
+
+    def _parse(self, hashed_password: str) -> tuple[dict, bytes, bytes]:
+        _, _, params, salt, digest = hashed_password.split("$")
+        params = {key: int(value) for key, value in (item.split("=") for item in params.split(","))}
+
+        return params, b64decode(salt), b64decode(digest)
+
+    def hash(self, password: str) -> str:
+        salt = os.urandom(16)
+        digest = self._derive(password, salt, self.log_n, self.r, self.p)
+
+        return f"$scrypt$ln={self.log_n},r={self.r},p={self.p}${b64encode(salt)}${b64encode(digest)}"
+
+    def verify(self, password: str, hashed_password: str) -> bool:
+        params, salt, digest = self._parse(hashed_password)
+
+        return hmac.compare_digest(
+            self._derive(password, salt, params["ln"], params["r"], params["p"]),
+            digest,
+        )
+
+    def needs_rehash(self, hashed_password: str) -> bool:
+        params, _, _ = self._parse(hashed_password)
+        return params != {"ln": self.log_n, "r": self.r, "p": self.p}
+
+
+class Argon2Hasher:
+    """argon2id from the optional argon2-cffi package, hashes look like $argon2id$..."""
+
+    name = "argon2id"
+
+    def __init__(self, time_cost: int, memory_cost: int, parallelism: int):
+        self.time_cost = time_cost
+        self.memory_cost = memory_cost
+        self.parallelism = parallelism
+
+    @property
+    def hasher(self):
+        if argon2 is None:
+            raise RuntimeError("argon2id requires the argon2-cffi package")
+
+        return argon2.PasswordHasher(
+            time_cost=self.time_cost,
+            memory_cost=self.memory_cost,
+            parallelism=self.parallelism,
+            type=argon2.Type.ID,
+        )
+
+    def identify(self, hashed_password: str) -> bool:
+        return hashed_password.startswith("$argon2")
+
+    def hash(self, password: str) -> str:
+        return self.hasher.hash(password)
+
+    def verify(self, password: str, hashed_password: str) -> bool:
+        try:
+            return self.hasher.verify(hashed_password, password)
+        except argon2.exceptions.VerificationError:
+            return False
+
+    def needs_rehash(self, hashed_password: str) -> bool:
+        return self.hasher.check_needs_rehash(hashed_password)
+
+
+def create_hasher(name: str, **params):
+    """Create hasher by name, params default to the configured cost"""
+    if name == BcryptHasher.name:
+        return BcryptHasher(
+            rounds=params.get("rounds", app_config.BCRYPT_ROUNDS),
+        )
+
+    if name == ScryptHasher.name:
+        return ScryptHasher(
+            log_n=params.get("log_n", app_config.SCRYPT_LOG_N),
+            r=params.get("r", app_config.SCRYPT_R),
+            p=params.get("p", app_config.SCRYPT_P),
+        )
+
+    if name == Argon2Hasher.name:
+        return Argon2Hasher(
+            time_cost=params.get("time_cost", app_config.ARGON2_TIME_COST),
+            memory_cost=params.get("memory_cost", app_config.ARGON2_MEMORY_COST),
+            parallelism=params.get("parallelism", app_config.ARGON2_PARALLELISM),
+        )
+
+    raise ValueError(f"Unsupported password hasher: {name}")
+
+
+# Registered hashers, every format is accepted for verification
+password_hashers = {
+    name: create_hasher(name)
+    for name in (BcryptHasher.name, ScryptHasher.name, Argon2Hasher.name)
+}
+
+
+def get_default_hasher():
+    """Get hasher used for new passwords"""
+    return password_hashers[app_config.PASSWORD_HASHER]
+
+
+def identify_hasher(hashed_password: str):
+    """Get hasher by format of hashed password"""
+    for hasher in password_hashers.values():
+        if hasher.identify(hashed_password):
+            return hasher
+
+    raise ValueError("Unknown password hash format")
+
+
+def needs_rehash(hashed_password: str) -> bool:
+    """Verify if hashed password uses another algorithm or outdated cost"""
+    hasher = identify_hasher(hashed_password)
+
+    if hasher is not get_default_hasher():
+        return True
+
+    return hasher.needs_rehash(hashed_password)
@@ -0,0 +1,168 @@
+import asyncio
+import heapq
+import itertools
+import multiprocessing
+import os
+import threading
+import time
+
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from functools import partial
+
+from starlette.concurrency import run_in_threadpool
+
+from src.config import app_config
+from src.error import ServiceUnavailableError
+from src.services.hashers import get_default_hasher, identify_hasher
+
+
+# Lower value is served first
+PRIORITY_VERIFY = 0
+PRIORITY_HASH = 1
+
+
+def hash_password_worker(password: str) -> str:
+    """Hash password with the configured hasher, runs inside a pool process"""
+    return get_default_hasher().hash(password)
+
+
+def check_password_worker(password: str, hashed_password: str) -> bool:
+    """Compare password with hash of any registered format, runs inside a pool process"""
+    return identify_hasher(hashed_password).verify(password, hashed_password)
+
+
+class HashingEngine:
+    """Runs password hashing in a dedicated process pool.
+
+    Jobs wait in a bounded priority queue until a pool process is free, so
+    hashing never occupies more processes than there are cores and a burst of
+    logins fails fast. Callers await jobs with run_async, no request thread
+    is blocked while a job is queued.
+    """
+
+    def __init__(self, enabled: bool, max_workers: int, max_queue_size: int, retry_after: int):
+        self.enabled = enabled
+        self.max_workers = max_workers
+        self.max_queue_size = max_queue_size
+        self.retry_after = retry_after
+
+        self._executor = None
+        self._lock = threading.RLock()
+        self._queue = []
+        self._sequence = itertools.count()
+        self._running = 0
+
+        self._submitted = 0
+        self._dispatched = 0
+        self._completed = 0
+        self._rejected = 0
+        self._wait_time_total = 0.0
+        self._wait_time_max = 0.0
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.max_workers,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+
+        return self._executor
+
+    def submit(self, fn, *args, priority: int = PRIORITY_HASH) -> Future:
+        """Queue a job, raise ServiceUnavailableError when the queue is full"""
+        future = Future()
+
+        with self._lock:
+            if len(self._queue) >= self.max_queue_size:
+                self._rejected += 1
+                raise ServiceUnavailableError(
+                    "Server is busy, please try again later",
+                    retry_after=self.retry_after,
+                )
+
+            heapq.heappush(self._queue, (priority, next(self._sequence), time.monotonic(), fn, args, future))
+            self._submitted += 1
+            self._dispatch()
+
+        return future
+
+    async def run_async(self, fn, *args, priority: int = PRIORITY_HASH):
+        """Run a job without blocking the event loop"""
+        if not self.enabled:
+            return await run_in_threadpool(fn, *args)
+
+        return await asyncio.wrap_future(self.submit(fn, *args, priority=priority))
+
+    def _dispatch(self):
+        # Lock must be held by the caller
+        while self._running < self.max_workers and self._queue:
+            _, _, enqueued_at, fn, args, future = heapq.heappop(self._queue)
+
+            if not future.set_running_or_notify_cancel():
+                continue
+
+            wait_time = time.monotonic() - enqueued_at
+            self._dispatched += 1
+            self._wait_time_total += wait_time
+            self._wait_time_max = max(self._wait_time_max, wait_time)
+            self._running += 1
+
+            try:
+                task = self._get_executor().submit(fn, *args)
+            except (BrokenProcessPool, RuntimeError) as e:
+                # Drop the broken pool, a new one is created on next submit
+                self._executor = None
+                self._running -= 1
+                future.set_exception(e)
+                continue
+
+            task.add_done_callback(partial(self._on_done, future))
+
+    def _on_done(self, future: Future, task: Future):
+        with self._lock:
+            self._running -= 1
+            self._completed += 1
+
+            if isinstance(task.exception(), BrokenProcessPool):
+                self._executor = None
+
+            self._dispatch()
+
+        if task.exception() is not None:
+            future.set_exception(task.exception())
+        else:
+            future.set_result(task.result())
+
+    def stats(self) -> dict:
+        """Get queue depth and wait time stats"""
+        with self._lock:
+            return {
+                "enabled": self.enabled,
+                "workers": self.max_workers,
+                "queue_size": self.max_queue_size,
+                "queue_depth": len(self._queue),
+                "running": self._running,
+                "submitted": self._submitted,
+                "completed": self._completed,
+                "rejected": self._rejected,
+                "wait_time_avg_ms": round(self._wait_time_total / self._dispatched * 1000, 3) if self._dispatched else 0.0,
+                "wait_time_max_ms": round(self._wait_time_max * 1000, 3),
+            }
+
+    def shutdown(self):
+        """Stop pool processes"""
+        with self._lock:
+            executor = self._executor
+            self._executor = None
+
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+
+hashing_engine = HashingEngine(
+    enabled=app_config.HASH_POOL_ENABLED,
+    max_workers=app_config.HASH_POOL_WORKERS or os.cpu_count() or 1,
+    max_queue_size=app_config.HASH_POOL_QUEUE_SIZE,
+    retry_after=app_config.HASH_POOL_RETRY_AFTER,
+)
@@ -0,0 +1,195 @@
+import base64
+import hashlib
+import hmac
+import json
+import time
+
+from jose import jws, JWSError
+
+from src.config import app_config
+from src.error import InvalidTokenError
+
+try:
+    import jwt as pyjwt
+except ImportError:
+    pyjwt = None
+
+
+def b64url_encode(data: bytes) -> str:
+    return base64.urlsafe_b64encode(data).decode("ascii").rstrip("=")
+
+
+def b64url_decode(data: str) -> bytes:
+    return base64.urlsafe_b64decode(data + "=" * (-len(data) % 4))
+
+
+def json_dumps(data: dict) -> bytes:
+    return json.dumps(data, separators=(",", ":")).encode("utf-8")
+
+
+def get_unverified_header(token: str) -> dict:
+    """Get header of token without verifying the signature"""
+    try:
+        header = json.loads(b64url_decode(token.split(".", 1)[0]))
+    except (ValueError, UnicodeError, TypeError, AttributeError):
+        raise InvalidTokenError("Invalid token header")
+
+    if not isinstance(header, dict):
+        raise InvalidTokenError("Invalid token header")
+
+    return header
+
+
+def validate_claims(payload: dict, leeway: int = 0) -> dict:
+    """Validate registered claims, shared by every backend"""
+    now = int(time.time())
+
+    if not isinstance(payload, dict):
+        raise InvalidTokenError("Invalid payload")
+
+    if not isinstance(payload.get("sub"), str):
+        raise InvalidTokenError("Invalid subject")
+
+    exp = payload.get("exp")
+
+    if not isinstance(exp, int):
+        raise InvalidTokenError("Invalid expiration")
+
+    if exp <= now - leeway:
+        raise InvalidTokenError("Signature has expired")
+
+    iat = payload.get("iat")
+
+    if iat is not None and (not isinstance(iat, int) or iat > now + leeway):
+        raise InvalidTokenError("Invalid issued at")
+
+    nbf = payload.get("nbf")
+
+    if nbf is not None and (not isinstance(nbf, int) or nbf > now + leeway):
+        raise InvalidTokenError("The token is not yet valid")
+
+    return payload
+
+
+class JoseBackend:
+    """python-jose, signature is verified with JWS only and claims are validated separately."""
+
+    name = "jose"
+
+    def encode(self, payload: dict, key, algorithm: str, headers: dict | None = None) -> str:
+        return jws.sign(json_dumps(payload), key, headers=headers, algorithm=algorithm)
+
+    def decode(self, token: str, key, algorithm: str) -> dict:
+        try:
+            return json.loads(jws.verify(token, key, algorithms=[algorithm]))
+        except (JWSError, ValueError) as e:
+            raise InvalidTokenError(str(e))
+
+
+class PyJWTBackend:
+    """PyJWT from the optional PyJWT package, asymmetric algorithms also require cryptography."""
+
+    name = "pyjwt"
+
+    def __init__(self):
+        if pyjwt is None:
+            raise RuntimeError("JWT backend pyjwt requires the PyJWT package")
+
+    def _key(self, key):
+        # Key ring keys are python-jose keys, PyJWT takes PEM
+        if hasattr(key, "to_pem"):
+            return key.to_pem()
+
+        return key
+
+    def encode(self, payload: dict, key, algorithm: str, headers: dict | None = None) -> str:
+        return pyjwt.encode(payload, self._key(key), algorithm=algorithm, headers=headers)
+
+    def decode(self, token: str, key, algorithm: str) -> dict:
+        try:
+            return pyjwt.decode(
+                token,
+                self._key(key),
+                algorithms=[algorithm],
+                options={
+                    "verify_exp": False,
+                    "verify_iat": False,
+                    "verify_nbf": False,
+                    "verify_aud": False,
+                    "verify_iss": False,
+                    "verify_sub": False,
+                    "verify_jti": False,
+                },
+            )
+        except pyjwt.PyJWTError as e:
+            raise InvalidTokenError(str(e))
+
+
+class BuiltinHS256Backend:
+    """Minimal HS256 codec built on hmac, supports HS256 only."""
+
+    name = "builtin"
+
+    def encode(self, payload: dict, key, algorithm: str, headers: dict | None = None) -> str:
+        if algorithm != "HS256":
+            raise RuntimeError("JWT backend builtin supports HS256 only")
+
+        header = {"alg": "HS256", "typ": "JWT", **(headers or {})}
+        signing_input = f"{b64url_encode(json_dumps(header))}.{b64url_encode(json_dumps(payload))}"
+        signature = hmac.new(key.encode("utf-8"), signing_input.encode("ascii"), hashlib.sha256).digest()
+
+        return f"{signing_input}.{b64url_encode(signature)}"
+
+    def decode(self, token: str, key, algorithm: str) -> dict:
+        # Malformed segments are invalid tokens, never server errors
+        try:
+            signing_input, signature = token.rsplit(".", 1)
+            encoded_header, encoded_payload = signing_input.split(".")
+            header = json.loads(b64url_decode(encoded_header))
+            signing_input = signing_input.encode("ascii")
+            signature = b64url_decode(signature)
+        except (ValueError, UnicodeError, TypeError):
+            raise InvalidTokenError("Invalid token")
+
+        if not isinstance(header, dict):
+            raise InvalidTokenError("Invalid token header")
+
+        # Only the configured algorithm is accepted
+        if header.get("alg") != algorithm or algorithm != "HS256":
+            raise InvalidTokenError("The specified alg value is not allowed")
+
+        expected = hmac.new(key.encode("utf-8"), signing_input, hashlib.sha256).digest()
+
+        if not hmac.compare_digest(expected, signature):
+            raise InvalidTokenError("Signature verification failed")
+
+        try:
+            payload = json.loads(b64url_decode(encoded_payload))
+        except (ValueError, UnicodeError, TypeError):
+            raise InvalidTokenError("Invalid payload")
+
+        if not isinstance(payload, dict):
+            raise InvalidTokenError("Invalid payload")
+
+        return payload
+
+
+jwt_backends = {
+    JoseBackend.name: JoseBackend,
+    PyJWTBackend.name: PyJWTBackend,
+    BuiltinHS256Backend.name: BuiltinHS256Backend,
+}
+
+
+def create_jwt_backend(name: str, algorithm: str):
+    """Create backend by name, auto picks the fastest backend supporting algorithm"""
+    if name == "auto":
+        name = BuiltinHS256Backend.name if algorithm == "HS256" else JoseBackend.name
+
+    if name not in jwt_backends:
+        raise ValueError(f"Unsupported JWT backend: {name}")
+
+    return jwt_backends[name]()
+
+
+jwt_backend = create_jwt_backend(app_config.JWT_BACKEND, app_config.JWT_ALGORITHM)
@@ -0,0 +1,276 @@
+import ecdsa
+import json
+import os
+import rsa
+import secrets
+import threading
+import time
+
+from jose import jwk
+from jose.backends.base import Key
+
+from src.config import app_config
+
+
+KEYRING_FILE = "keyring.json"
+
+KEY_STATUS_PENDING = "pending"
+KEY_STATUS_ACTIVE = "active"
+KEY_STATUS_RETIRED = "retired"
+
+# Minimum seconds between manifest checks caused by unknown kids
+UNKNOWN_KID_RECHECK_INTERVAL = 1
+
+# Seconds an unknown kid is rejected without checking the manifest again
+UNKNOWN_KID_CACHE_TTL = 10
+UNKNOWN_KID_CACHE_SIZE = 1024
+
+ECDSA_CURVES = {
+    "ES256": ecdsa.NIST256p,
+    "ES384": ecdsa.NIST384p,
+    "ES512": ecdsa.NIST521p,
+}
+
+
+def is_asymmetric_algorithm(algorithm: str) -> bool:
+    """Verify if algorithm signs with a private key"""
+    return not algorithm.startswith("HS")
+
+
+def generate_private_key(algorithm: str) -> str:
+    """Generate PEM encoded private key for algorithm"""
+    if algorithm.startswith("RS"):
+        _, private_key = rsa.newkeys(app_config.JWT_RSA_KEY_SIZE)
+        return private_key.save_pkcs1().decode("utf-8")
+
+    if algorithm in ECDSA_CURVES:
+        private_key = ecdsa.SigningKey.generate(curve=ECDSA_CURVES[algorithm])
+        return private_key.to_pem().decode("utf-8")
+
+    raise ValueError(f"Unsupported asymmetric algorithm: {algorithm}")
+
+
+class KeyRing:
+    """Signing keys stored as PEM files next to a keyring.json manifest.
+
+    A rotated key is published as pending first and only signs tokens
+    from its activates_at, after relying parties refreshed their cached
+    JWKS. The key it replaces keeps signing until then and stays published
+    until it is pruned. Every key in the manifest is used for verification
+    and published as JWKS. The manifest is re-read when its modification
+    time changes, so a key rotated by the CLI is picked up by running workers.
+    """
+
+    def __init__(self, directory: str, algorithm: str, reload_interval: int = 10):
+        self.directory = directory
+        self.algorithm = algorithm
+        self.reload_interval = reload_interval
+
+        self._lock = threading.Lock()
+        self._loaded_mtime = None
+        self._checked_at = 0.0
+        self._unknown_checked_at = 0.0
+        self._unknown_kids = {}
+        self._public_keys = {}
+        self._private_keys = {}
+        self._signing_schedule = []
+        self._jwks = {"keys": []}
+
+    @property
+    def manifest_path(self) -> str:
+        return os.path.join(self.directory, KEYRING_FILE)
+
+    def _read_manifest(self) -> dict:
+        if not os.path.exists(self.manifest_path):
+            return {"keys": []}
+
+        with open(self.manifest_path) as f:
+            return json.load(f)
+
+    def _write_manifest(self, manifest: dict):
+        os.makedirs(self.directory, exist_ok=True)
+
+        tmp_path = self.manifest_path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(manifest, f, indent=2)
+
+        os.replace(tmp_path, self.manifest_path)
+
+    def _load_if_changed(self, force: bool = False):
+        now = time.monotonic()
+
+        with self._lock:
+            if not force and now - self._checked_at < self.reload_interval:
+                return
+
+            self._checked_at = now
+            self._reload_if_modified(force=force)
+
+    def _reload_if_modified(self, force: bool = False):
+        """Re-read manifest and keys when the manifest changed, called with lock held"""
+        try:
+            mtime = os.stat(self.manifest_path).st_mtime_ns
+        except FileNotFoundError:
+            mtime = None
+
+        if not force and mtime == self._loaded_mtime:
+            return
+
+        manifest = self._read_manifest()
+        private_keys = {}
+        public_keys = {}
+        jwks = []
+        signing_schedule = []
+
+        for item in manifest["keys"]:
+            with open(os.path.join(self.directory, f"{item['kid']}.pem")) as f:
+                private_key = jwk.construct(f.read(), item["alg"])
+
+            public_key = private_key.public_key()
+
+            private_keys[item["kid"]] = private_key
+            public_keys[item["kid"]] = public_key
+            jwks.append({
+                **public_key.to_dict(),
+                "kid": item["kid"],
+                "use": "sig",
+            })
+
+            # Manifests written before pending keys activate at creation
+            signing_schedule.append((
+                item.get("activates_at") or item["created_at"],
+                item["retired_at"] if item["status"] == KEY_STATUS_RETIRED else None,
+                item["kid"],
+            ))
+
+        # Newest activation first
+        signing_schedule.sort(key=lambda entry: entry[0], reverse=True)
+
+        self._private_keys = private_keys
+        self._public_keys = public_keys
+        self._jwks = {"keys": jwks}
+        self._signing_schedule = signing_schedule
+        self._unknown_kids = {}
+        self._loaded_mtime = mtime
+
+    def get_signing_key(self) -> tuple[str, Key]:
+        """Get kid and private key of the newest activated key"""
+        self._load_if_changed()
+
+        now = time.time()
+
+        for activates_at, retired_at, kid in self._signing_schedule:
+            if activates_at <= now and (retired_at is None or retired_at > now):
+                return kid, self._private_keys[kid]
+
+        raise RuntimeError("No active signing key, run cli_rotate_keys.py")
+
+    def get_verification_key(self, kid: str) -> Key | None:
+        """Get public key by kid"""
+        self._load_if_changed()
+
+        public_key = self._public_keys.get(kid)
+
+        if public_key is not None:
+            return public_key
+
+        # Unknown kid may come from a key rotated after the last check.
+        # Keys are published as pending before they sign, so only the
+        # manifest mtime is checked, at most once per interval, and
+        # unknown kids are remembered to keep forged tokens cheap.
+        now = time.monotonic()
+
+        with self._lock:
+            if self._unknown_kids.get(kid, 0.0) > now:
+                return None
+
+            if now - self._unknown_checked_at >= UNKNOWN_KID_RECHECK_INTERVAL:
+                self._unknown_checked_at = now
+                self._reload_if_modified()
+
+            public_key = self._public_keys.get(kid)
+
+            if public_key is None:
+                if len(self._unknown_kids) >= UNKNOWN_KID_CACHE_SIZE:
+                    self._unknown_kids = {}
+
+                self._unknown_kids[kid] = now + UNKNOWN_KID_CACHE_TTL
+
+        return public_key
+
+    def jwks(self) -> dict:
+        """Get public keys as JSON Web Key Set"""
+        self._load_if_changed()
+        return self._jwks
+
+    def rotate(self, publish_delay: int = 0) -> str:
+        """Add a new key, it signs tokens after publish_delay seconds.
+
+        Keys that sign until then are retired at the activation time.
+        The first key of the ring is activated immediately.
+        """
+        manifest = self._read_manifest()
+        now = int(time.time())
+        kid = secrets.token_hex(8)
+
+        has_signing_key = any(item["status"] != KEY_STATUS_RETIRED for item in manifest["keys"])
+        activates_at = now + publish_delay if has_signing_key else now
+
+        # Write private key
+        os.makedirs(self.directory, exist_ok=True)
+        key_path = os.path.join(self.directory, f"{kid}.pem")
+
+        with open(key_path, "w") as f:
+            f.write(generate_private_key(self.algorithm))
+
+        os.chmod(key_path, 0o600)
+
+        # Retire previous keys at activation, they stay available for verification
+        for item in manifest["keys"]:
+            if item["status"] != KEY_STATUS_RETIRED:
+                item["status"] = KEY_STATUS_RETIRED
+                item["retired_at"] = activates_at
+
+        manifest["keys"].append({
+            "kid": kid,
+            "alg": self.algorithm,
+            "status": KEY_STATUS_PENDING if activates_at > now else KEY_STATUS_ACTIVE,
+            "created_at": now,
+            "activates_at": activates_at,
+            "retired_at": None,
+        })
+
+        self._write_manifest(manifest)
+        self._load_if_changed(force=True)
+
+        return kid
+
+    def prune(self, max_age: int) -> list[str]:
+        """Remove keys retired longer than max_age seconds ago"""
+        manifest = self._read_manifest()
+        now = int(time.time())
+        pruned = []
+        keys = []
+
+        for item in manifest["keys"]:
+            if item["status"] == KEY_STATUS_RETIRED and now - item["retired_at"] > max_age:
+                pruned.append(item["kid"])
+            else:
+                keys.append(item)
+
+        if pruned:
+            manifest["keys"] = keys
+            self._write_manifest(manifest)
+
+            for kid in pruned:
+                os.remove(os.path.join(self.directory, f"{kid}.pem"))
+
+            self._load_if_changed(force=True)
+
+        return pruned
+
+
+jwt_keyring = KeyRing(
+    directory=app_config.JWT_KEYS_DIR,
+    algorithm=app_config.JWT_ALGORITHM,
+)
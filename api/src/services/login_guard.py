@@ -0,0 +1,150 @@
+import math
+import queue
+import threading
+import time
+
+from lib.log_error import log_error
+from lib.rate_limit import TokenBucketLimiter
+from src.config import app_config
+from src.error import TooManyRequestsError
+from src.services.events import notify_event, register_event_handler
+
+
+EVENT_LOGIN_GUARD_BLOCK = "login_guard_block"
+
+# Blocks waiting to be shared, further blocks are dropped while full
+PUBLISH_QUEUE_SIZE = 1000
+
+
+class LoginGuard:
+    """Limit password attempts by client IP and by target email.
+
+    Runs before any database query or password hashing. When a bucket runs
+    out, the block is shared with other workers so an attacker can not
+    multiply the limit by the number of workers. Blocks are published by a
+    background thread, once per key until the block ends, so a burst of
+    attempts never waits on or multiplies database writes.
+    """
+
+    def __init__(self):
+        self.limiters = {
+            "ip": TokenBucketLimiter(
+                capacity=app_config.LOGIN_GUARD_IP_CAPACITY,
+                refill_per_second=app_config.LOGIN_GUARD_IP_REFILL_PER_MINUTE / 60,
+                max_entries=app_config.LOGIN_GUARD_MAX_ENTRIES,
+            ),
+            "email": TokenBucketLimiter(
+                capacity=app_config.LOGIN_GUARD_EMAIL_CAPACITY,
+                refill_per_second=app_config.LOGIN_GUARD_EMAIL_REFILL_PER_MINUTE / 60,
+                max_entries=app_config.LOGIN_GUARD_MAX_ENTRIES,
+            ),
+        }
+
+        self.shared_blocks = 0
+        self.published_blocks = 0
+        self.dropped_blocks = 0
+
+        # (scope, key) -> until of blocks already published
+        self._published = {}
+        self._queue = queue.Queue(maxsize=PUBLISH_QUEUE_SIZE)
+        self._lock = threading.Lock()
+        self._thread = None
+
+    async def check(self, ip: str, email: str):
+        """Take one attempt or raise TooManyRequestsError"""
+        if not app_config.LOGIN_GUARD_ENABLED:
+            return
+
+        keys = {
+            "ip": ip or "",
+            "email": email.strip().lower(),
+        }
+
+        # Reject without taking a token when any bucket is empty
+        waits = {scope: self.limiters[scope].get_wait(key) for scope, key in keys.items()}
+        wait = max(waits.values())
+
+        if wait > 0:
+            for scope, scope_wait in waits.items():
+                self.limiters[scope].record(allowed=scope_wait == 0)
+
+            raise TooManyRequestsError("Too many attempts, try again later", retry_after=math.ceil(wait))
+
+        for scope, key in keys.items():
+            limiter = self.limiters[scope]
+            limiter.record(allowed=True)
+
+            # Share the block once the bucket is empty
+            wait = limiter.consume(key)
+
+            if wait > 0 and app_config.LOGIN_GUARD_SHARED:
+                self.publish_block(scope=scope, key=key, until=time.time() + wait)
+
+    def publish_block(self, scope: str, key: str, until: float):
+        """Queue block to be shared with other workers, without waiting for the database"""
+        now = time.time()
+
+        with self._lock:
+            if self._published.get((scope, key), 0) > now:
+                return
+
+            # Forget ended blocks before the map grows unbounded
+            if len(self._published) >= app_config.LOGIN_GUARD_MAX_ENTRIES:
+                self._published = {
+                    published_key: published_until
+                    for published_key, published_until in self._published.items()
+                    if published_until > now
+                }
+
+            try:
+                self._queue.put_nowait({
+                    "type": EVENT_LOGIN_GUARD_BLOCK,
+                    "scope": scope,
+                    "key": key,
+                    "until": until,
+                })
+            except queue.Full:
+                self.dropped_blocks += 1
+                return
+
+            self._published[(scope, key)] = until
+
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="login-guard-publisher", daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        while True:
+            event = self._queue.get()
+
+            try:
+                notify_event(event)
+                self.published_blocks += 1
+            except Exception as e:
+                log_error.add_error(
+                    message="An error occurred during share login guard block",
+                    exc_info=e,
+                )
+
+    def apply_block(self, event: dict):
+        """Apply block published by any worker"""
+        limiter = self.limiters.get(event["scope"])
+
+        if limiter is not None:
+            limiter.block(key=event["key"], until=event["until"])
+            self.shared_blocks += 1
+
+    def stats(self) -> dict:
+        return {
+            "enabled": app_config.LOGIN_GUARD_ENABLED,
+            "shared_blocks": self.shared_blocks,
+            "published_blocks": self.published_blocks,
+            "dropped_blocks": self.dropped_blocks,
+            "pending_blocks": self._queue.qsize(),
+            **{scope: limiter.stats() for scope, limiter in self.limiters.items()},
+        }
+
+
+login_guard = LoginGuard()
+
+register_event_handler(EVENT_LOGIN_GUARD_BLOCK, login_guard.apply_block)
@@ -0,0 +1,219 @@
+import threading
+import time
+
+from sqlalchemy import text
+
+from lib.log_error import log_error
+from src.config import app_config
+from src.db import engine
+from src.db.partitions import (
+    is_auth_tokens_partitioned,
+    create_future_partitions,
+    drop_expired_partitions,
+)
+
+
+# Advisory lock key shared by every worker, only the holder runs the reaper
+REAPER_LOCK_ID = 7310001
+
+QUERY_DELETE_EXPIRED_TOKENS = """
+    DELETE FROM {table}
+    WHERE auth_id IN (
+        SELECT auth_id FROM {table}
+        WHERE expires_at < CURRENT_TIMESTAMP
+        ORDER BY expires_at
+        LIMIT :batch_size
+        FOR UPDATE SKIP LOCKED
+    )
+"""
+
+QUERY_DELETE_EXPIRED_AUTH_CODES = """
+    DELETE FROM auth_codes
+    WHERE (user_id, purpose) IN (
+        SELECT user_id, purpose FROM auth_codes
+        WHERE expires_at < CURRENT_TIMESTAMP
+        LIMIT :batch_size
+        FOR UPDATE SKIP LOCKED
+    )
+"""
+
+QUERY_DELETE_EXPIRED_REVOKED_TOKENS = """
+    DELETE FROM revoked_tokens
+    WHERE jti IN (
+        SELECT jti FROM revoked_tokens
+        WHERE expires_at < CURRENT_TIMESTAMP
+        LIMIT :batch_size
+        FOR UPDATE SKIP LOCKED
+    )
+"""
+
+
+def delete_in_batches(
+        connection,
+        query: str,
+        batch_size: int,
+        batch_timeout_ms: int,
+        deadline: float,
+    ) -> tuple[int, int]:
+    """Run delete query until it deletes less than a batch or the deadline passes"""
+    deleted_count = 0
+    batches = 0
+
+    while True:
+        # Bound each batch so a slow delete never blocks other queries for long
+        connection.execute(text(f"SET LOCAL statement_timeout = {int(batch_timeout_ms)}"))
+
+        result = connection.execute(text(query), {"batch_size": batch_size})
+        connection.commit()
+
+        deleted_count += result.rowcount
+        batches += 1
+
+        if result.rowcount < batch_size or time.monotonic() >= deadline:
+            return deleted_count, batches
+
+
+def reap_expired_tokens(
+        batch_size: int = app_config.REAPER_BATCH_SIZE,
+        batch_timeout_ms: int = app_config.REAPER_BATCH_TIMEOUT_MS,
+        time_budget: float = app_config.REAPER_TIME_BUDGET,
+    ) -> dict:
+    """Delete expired refresh tokens, one-time codes and revoked token ids in batches, each batch is committed separately.
+
+    Stops when no expired row is left or the time budget is spent. On the
+    partitioned layout expired partitions are dropped, future partitions are
+    created and only the default partition is deleted by rows. Returns None
+    when another worker holds the reaper lock.
+    """
+    started_at = time.monotonic()
+    deadline = started_at + time_budget
+    deleted_codes = 0
+    deleted_revoked_tokens = 0
+    created_partitions = []
+    dropped_partitions = []
+    table = "auth_tokens"
+
+    with engine.connect() as connection:
+        if not connection.scalar(text("SELECT pg_try_advisory_lock(:lock_id)"), {"lock_id": REAPER_LOCK_ID}):
+            connection.rollback()
+            return None
+
+        connection.commit()
+
+        try:
+            if is_auth_tokens_partitioned(connection=connection):
+                created_partitions = create_future_partitions(connection=connection)
+                dropped_partitions = drop_expired_partitions(connection=connection)
+
+                table = "auth_tokens_default"
+
+            deleted_count, batches = delete_in_batches(
+                connection=connection,
+                query=QUERY_DELETE_EXPIRED_TOKENS.format(table=table),
+                batch_size=batch_size,
+                batch_timeout_ms=batch_timeout_ms,
+                deadline=deadline,
+            )
+
+            if time.monotonic() < deadline:
+                deleted_codes, _ = delete_in_batches(
+                    connection=connection,
+                    query=QUERY_DELETE_EXPIRED_AUTH_CODES,
+                    batch_size=batch_size,
+                    batch_timeout_ms=batch_timeout_ms,
+                    deadline=deadline,
+                )
+
+            if time.monotonic() < deadline:
+                deleted_revoked_tokens, _ = delete_in_batches(
+                    connection=connection,
+                    query=QUERY_DELETE_EXPIRED_REVOKED_TOKENS,
+                    batch_size=batch_size,
+                    batch_timeout_ms=batch_timeout_ms,
+                    deadline=deadline,
+                )
+        finally:
+            try:
+                connection.rollback()
+                connection.execute(text("SELECT pg_advisory_unlock(:lock_id)"), {"lock_id": REAPER_LOCK_ID})
+                connection.commit()
+            except Exception as e:
+                # Keep the original error, a closed session releases the lock
+                log_error.add_error(
+                    message="An error occurred during release reaper lock",
+                    exc_info=e,
+                )
+                connection.invalidate()
+
+    return {
+        "deleted_count": deleted_count,
+        "batches": batches,
+        "deleted_codes": deleted_codes,
+        "deleted_revoked_tokens": deleted_revoked_tokens,
+        "created_partitions": created_partitions,
+        "dropped_partitions": dropped_partitions,
+        "duration_ms": round((time.monotonic() - started_at) * 1000, 2),
+    }
+
+
+class TokenReaper:
+    """Background thread deleting expired refresh tokens periodically."""
+
+    def __init__(self, interval: int):
+        self.interval = interval
+
+        self._thread = None
+        self._stop = threading.Event()
+        self._last_run = None
+
+    def start(self):
+        if self._thread is not None:
+            return
+
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="token-reaper", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+        if self._thread is not None:
+            self._thread.join(timeout=app_config.REAPER_TIME_BUDGET + 1)
+            self._thread = None
+
+    def _run(self):
+        # First pass on startup, rows expired while the API was down are not kept another interval
+        while True:
+            try:
+                result = reap_expired_tokens()
+
+                if result is not None:
+                    self._last_run = {**result, "finished_at": int(time.time())}
+            except Exception as e:
+                log_error.add_error(
+                    message="An error occurred during reap expired tokens",
+                    exc_info=e,
+                )
+
+            if self._stop.wait(self.interval):
+                break
+
+    def stats(self) -> dict:
+        return {
+            "enabled": self._thread is not None,
+            "interval": self.interval,
+            "last_run": self._last_run,
+        }
+
+
+token_reaper = TokenReaper(interval=app_config.REAPER_INTERVAL)
+
+
+def start_token_reaper():
+    """Start reaper when enabled on PostgreSQL"""
+    if app_config.REAPER_ENABLED and engine.dialect.name == "postgresql":
+        token_reaper.start()
+
+
+def stop_token_reaper():
+    token_reaper.stop()
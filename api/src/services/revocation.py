@@ -0,0 +1,215 @@
+import datetime
+import threading
+import time
+
+from sqlalchemy import select, update
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.sql import func
+
+from src.db import engine
+from src.models.auth import AuthPayload
+from src.repository import User, RevokedToken
+from src.services.events import (
+    publish_event,
+    publish_events,
+    register_event_handler,
+    register_resync_handler,
+)
+
+
+EVENT_USER_EPOCH = "user_epoch"
+EVENT_REVOKE_JTI = "revoke_jti"
+
+
+class RevocationStore:
+    """In-process revocation state checked on every request without a DB query.
+
+    A token is revoked when its epoch is lower than the user's current epoch
+    (logout all, password change, deactivation, deletion) or when its jti was
+    revoked (single logout). Revoked jti are kept until the token expires,
+    they are also stored in revoked_tokens to be reloaded on resync.
+    """
+
+    def __init__(self, prune_interval: int = 60):
+        self.prune_interval = prune_interval
+
+        self._lock = threading.Lock()
+        self._user_epochs = {}
+        self._revoked_jtis = {}
+        self._pruned_at = 0.0
+
+    def get_user_epoch(self, user_id: int) -> int:
+        return self._user_epochs.get(int(user_id), 0)
+
+    def set_user_epoch(self, user_id: int, epoch: int):
+        """Set user epoch, an older epoch never replaces a newer one"""
+        with self._lock:
+            if epoch > self._user_epochs.get(int(user_id), 0):
+                self._user_epochs[int(user_id)] = epoch
+
+    def revoke_jti(self, jti: str, expires_at: int):
+        now = time.time()
+
+        if not jti or expires_at <= now:
+            return
+
+        with self._lock:
+            self._revoked_jtis[jti] = expires_at
+
+            if now - self._pruned_at > self.prune_interval:
+                self._prune(now)
+
+    def _prune(self, now: float):
+        self._revoked_jtis = {
+            jti: expires_at
+            for jti, expires_at in self._revoked_jtis.items()
+            if expires_at > now
+        }
+        self._pruned_at = now
+
+    def is_revoked(self, payload: AuthPayload) -> bool:
+        """Verify if access token is revoked"""
+        if (payload.epoch or 0) < self._user_epochs.get(int(payload.user_id), 0):
+            return True
+
+        return payload.jti is not None and payload.jti in self._revoked_jtis
+
+    def stats(self) -> dict:
+        return {
+            "user_epochs": len(self._user_epochs),
+            "revoked_jtis": len(self._revoked_jtis),
+        }
+
+
+revocation_store = RevocationStore()
+
+
+def apply_revocation_event(event: dict):
+    """Apply revocation event to the store of current worker"""
+    if event["type"] == EVENT_USER_EPOCH:
+        revocation_store.set_user_epoch(user_id=event["user_id"], epoch=event["epoch"])
+    elif event["type"] == EVENT_REVOKE_JTI:
+        revocation_store.revoke_jti(jti=event["jti"], expires_at=event["exp"])
+
+
+def load_user_epochs():
+    """Load epochs of users whose tokens were revoked"""
+    with engine.connect() as connection:
+        rows = connection.execute(
+            select(
+                User.user_id,
+                User.token_epoch,
+            ).filter(
+                User.token_epoch > 0,
+            )
+        ).all()
+
+    for row in rows:
+        revocation_store.set_user_epoch(user_id=row.user_id, epoch=row.token_epoch)
+
+
+def load_revoked_jtis():
+    """Load revoked access token ids that are not expired yet"""
+    with engine.connect() as connection:
+        rows = connection.execute(
+            select(
+                RevokedToken.jti,
+                func.extract("epoch", RevokedToken.expires_at).label("exp"),
+            ).filter(
+                RevokedToken.expires_at > func.now(),
+            )
+        ).all()
+
+    for row in rows:
+        revocation_store.revoke_jti(jti=row.jti, expires_at=int(row.exp))
+
+
+register_event_handler(EVENT_USER_EPOCH, apply_revocation_event)
+register_event_handler(EVENT_REVOKE_JTI, apply_revocation_event)
+register_resync_handler(load_user_epochs)
+register_resync_handler(load_revoked_jtis)
+
+
+async def revoke_user_tokens(session: AsyncSession, user_id: int) -> dict:
+    """Bump user epoch so every access token issued before is rejected.
+
+    Returns the event, apply it with dispatch_event after commit.
+    """
+    epoch = await session.scalar(
+        update(
+            User,
+        ).where(
+            User.user_id == int(user_id),
+        ).values(
+            token_epoch=User.token_epoch + 1,
+        ).returning(
+            User.token_epoch,
+        )
+    )
+
+    event = {
+        "type": EVENT_USER_EPOCH,
+        "user_id": int(user_id),
+        "epoch": epoch,
+    }
+
+    await publish_event(session=session, event=event)
+
+    return event
+
+
+async def revoke_users_tokens(session: AsyncSession, user_ids: list[int]) -> list[dict]:
+    """Bump epoch of many users in one statement.
+
+    Returns the events, apply them with dispatch_event after commit.
+    """
+    rows = (await session.execute(
+        update(
+            User,
+        ).where(
+            User.user_id.in_(user_ids),
+        ).values(
+            token_epoch=User.token_epoch + 1,
+        ).returning(
+            User.user_id,
+            User.token_epoch,
+        )
+    )).all()
+
+    events = [{
+        "type": EVENT_USER_EPOCH,
+        "user_id": row.user_id,
+        "epoch": row.token_epoch,
+    } for row in rows]
+
+    await publish_events(session=session, events=events)
+
+    return events
+
+
+async def revoke_access_token(session: AsyncSession, payload: AuthPayload) -> dict:
+    """Revoke a single access token by jti.
+
+    Returns the event, apply it with dispatch_event after commit.
+    """
+    event = {
+        "type": EVENT_REVOKE_JTI,
+        "jti": payload.jti,
+        "exp": payload.exp,
+    }
+
+    if payload.jti:
+        # Stored until expiry, workers reload it after restart or reconnect
+        await session.execute(
+            insert(
+                RevokedToken,
+            ).values(
+                jti=payload.jti,
+                expires_at=datetime.datetime.fromtimestamp(payload.exp, tz=datetime.timezone.utc),
+            ).on_conflict_do_nothing()
+        )
+
+        await publish_event(session=session, event=event)
+
+    return event
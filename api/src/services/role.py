@@ -36,6 +36,8 @@ app_role_capabilities = [
     },
 ]
 
+app_role_capabilities_frozen = False
+
 
 def superadmin_role_id() -> int:
     """Get superadmin role_id"""
@@ -48,11 +50,22 @@ def is_superadmin(role_id: int) -> bool:
 
 
 def register_capabilities(capabilities):
-    """Register new capabilities"""
-    global app_role_capabilities
+    """Register new capabilities, modules register them when imported before startup"""
+    global app_role_capabilities, app_role_capabilities_frozen
+
+    # Bits are assigned when capabilities are frozen on startup
+    if app_role_capabilities_frozen:
+        raise RuntimeError("Capabilities must be registered before startup")
+
     app_role_capabilities.append(capabilities)
 
 
+def freeze_role_capabilities():
+    """Reject capabilities registered after startup"""
+    global app_role_capabilities_frozen
+    app_role_capabilities_frozen = True
+
+
 def get_all_role_capabilities():
     """Get all role capabilities"""
     global app_role_capabilities
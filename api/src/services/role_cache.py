@@ -0,0 +1,151 @@
+import threading
+import time
+
+from typing import NamedTuple
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.sql import func
+
+from src.config import app_config
+from src.repository import Role, RoleCapabilities
+from src.services.events import (
+    is_receiving_events,
+    publish_event,
+    register_event_handler,
+    register_resync_handler,
+)
+
+
+EVENT_ROLE_CHANGED = "role_changed"
+
+
+class CachedRole(NamedTuple):
+    version: int
+    capability_ids: frozenset
+    capability_mask: int
+
+
+class RoleCapabilityCache:
+    """Version, capabilities and capability mask of every role, kept in memory.
+
+    Roles are few and change rarely, so all of them are loaded in one query.
+    The cache is reloaded on next use after a role changes on any worker, and
+    at the latest after the TTL in case an event is missed. While the event
+    listener is disconnected every use reloads.
+    """
+
+    def __init__(self, ttl: int):
+        self.ttl = ttl
+
+        self._lock = threading.Lock()
+        self._roles = {}
+        self._loaded_at = None
+        self._generation = 0
+
+        self.hits = 0
+        self.loads = 0
+
+    def is_fresh(self) -> bool:
+        if self._loaded_at is None or not is_receiving_events():
+            return False
+
+        return time.monotonic() - self._loaded_at < self.ttl
+
+    def invalidate(self):
+        """Reload on next use, a load running meanwhile is not kept as fresh"""
+        with self._lock:
+            self._generation += 1
+            self._loaded_at = None
+
+    async def get_roles(self, session: AsyncSession) -> dict[int, CachedRole]:
+        """Get role_id -> CachedRole, loads all roles when stale"""
+        if self.is_fresh():
+            self.hits += 1
+            return self._roles
+
+        generation = self._generation
+
+        rows = (await session.execute(
+            select(
+                Role.role_id,
+                Role.version,
+                Role.capability_mask,
+                func.array(
+                    select(
+                        RoleCapabilities.capability_id,
+                    ).where(
+                        RoleCapabilities.role_id == Role.role_id,
+                    ).scalar_subquery()
+                ).label("capability_ids"),
+            )
+        )).all()
+
+        roles = {
+            row.role_id: CachedRole(
+                version=row.version,
+                capability_ids=frozenset(row.capability_ids or []),
+                capability_mask=row.capability_mask,
+            )
+            for row in rows
+        }
+
+        with self._lock:
+            self._roles = roles
+            self.loads += 1
+
+            if generation == self._generation:
+                self._loaded_at = time.monotonic()
+
+        return roles
+
+    def get_fresh_roles(self) -> dict[int, CachedRole] | None:
+        """Get role_id -> CachedRole without a session, None when a reload is due"""
+        if not self.is_fresh():
+            return None
+
+        self.hits += 1
+        return self._roles
+
+    async def get_role(self, session: AsyncSession, role_id: int) -> CachedRole | None:
+        return (await self.get_roles(session=session)).get(role_id)
+
+    async def get_capabilities(self, session: AsyncSession, role_id: int) -> frozenset | None:
+        """Get capability ids of role, None when the role does not exist"""
+        role = await self.get_role(session=session, role_id=role_id)
+        return role.capability_ids if role else None
+
+    def stats(self) -> dict:
+        return {
+            "roles": len(self._roles),
+            "ttl": self.ttl,
+            "fresh": self.is_fresh(),
+            "hits": self.hits,
+            "loads": self.loads,
+        }
+
+
+role_capability_cache = RoleCapabilityCache(ttl=app_config.ROLE_CACHE_TTL)
+
+
+def apply_role_changed_event(event: dict):
+    role_capability_cache.invalidate()
+
+
+register_event_handler(EVENT_ROLE_CHANGED, apply_role_changed_event)
+register_resync_handler(role_capability_cache.invalidate)
+
+
+async def publish_role_changed(session: AsyncSession, role_id: int) -> dict:
+    """Notify every worker that a role or its capabilities changed.
+
+    Returns the event, apply it with dispatch_event after commit.
+    """
+    event = {
+        "type": EVENT_ROLE_CHANGED,
+        "role_id": int(role_id),
+    }
+
+    await publish_event(session=session, event=event)
+
+    return event
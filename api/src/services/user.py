@@ -1,6 +1,13 @@
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.sql import func
 
-from src.repository import User, RoleCapabilities
+from src.config import app_config
+from src.error import UnauthorizedError
+from src.models.auth import AuthPayload, Principal
+from src.repository import User, Role, RoleCapabilities
+from src.services.capability_registry import capability_registry
+from src.services.role_cache import role_capability_cache
 
 
 def superadmin_id() -> int:
@@ -11,23 +18,186 @@ def is_superadmin(user_id: int) -> bool:
     return superadmin_id() == user_id
 
 
-def is_user_can(session: Session, user_id: int, capabilities: list[str]) -> bool:
+def get_user_claims_columns() -> list:
+    """Get role version and capabilities of User.role, to select claims along with a user"""
+    return [
+        select(
+            Role.version,
+        ).where(
+            Role.role_id == User.role,
+        ).scalar_subquery().label("role_version"),
+        func.array(
+            select(
+                RoleCapabilities.capability_id,
+            ).where(
+                RoleCapabilities.role_id == User.role,
+            ).order_by(
+                RoleCapabilities.capability_id,
+            ).scalar_subquery()
+        ).label("capability_ids"),
+    ]
+
+
+def build_user_claims(role_id: int, role_version: int | None, capability_ids: list[str] | None) -> dict | None:
+    """Build authorization claims from selected claims columns"""
+    if not app_config.JWT_EMBED_CLAIMS or role_version is None:
+        return None
+
+    return {
+        "rid": role_id,
+        "rv": role_version,
+        "caps": sorted(capability_ids or []),
+    }
+
+
+async def get_user_claims(session: AsyncSession, user_id: int) -> dict | None:
+    """Get authorization claims to embed in access token"""
+    if not app_config.JWT_EMBED_CLAIMS:
+        return None
+
+    # Get role, role version and capabilities in one query
+    row = (await session.execute(
+        select(
+            User.role,
+            *get_user_claims_columns(),
+        ).where(
+            User.user_id == user_id,
+        )
+    )).first()
+
+    if not row:
+        return None
+
+    return build_user_claims(
+        role_id=row.role,
+        role_version=row.role_version,
+        capability_ids=row.capability_ids,
+    )
+
+
+async def get_roles_capabilities(session: AsyncSession, role_ids: list[int]) -> dict[int, list[str]]:
+    """Get capabilities of many roles from the role capability cache"""
+    roles = await role_capability_cache.get_roles(session=session) if role_ids else {}
+
+    return {
+        role_id: sorted(roles[role_id].capability_ids) if role_id in roles else []
+        for role_id in role_ids
+    }
+
+
+def get_claims_principal(payload: AuthPayload) -> Principal | None:
+    """Resolve principal from embedded claims and the cached roles, without a session.
+
+    Returns None when the token has no claims or the role cache must be
+    reloaded first.
+    """
+    if payload.capabilities is None:
+        return None
+
+    roles = role_capability_cache.get_fresh_roles()
+
+    if roles is None:
+        return None
+
+    role = roles.get(payload.role_id)
+
+    if role is None or role.version != payload.role_version:
+        raise UnauthorizedError("Token is outdated")
+
+    return Principal(
+        user_id=int(payload.user_id),
+        role_id=payload.role_id,
+        capability_mask=role.capability_mask,
+        payload=payload,
+    )
+
+
+async def load_principal(session: AsyncSession, payload: AuthPayload) -> Principal:
+    """Resolve user, role and capability mask of an access token.
+
+    Embedded claims are trusted while the role version matches, without a
+    user query. Otherwise the user is loaded with its profile in one query.
+    The capability mask always comes from the role capability cache.
+    """
+    if payload.capabilities is not None:
+        role = await role_capability_cache.get_role(
+            session=session,
+            role_id=payload.role_id,
+        )
+
+        if role is None or role.version != payload.role_version:
+            raise UnauthorizedError("Token is outdated")
+
+        return Principal(
+            user_id=int(payload.user_id),
+            role_id=payload.role_id,
+            capability_mask=role.capability_mask,
+            payload=payload,
+        )
+
+    user = (await session.execute(
+        select(
+            User.user_id,
+            User.email,
+            User.full_name,
+            User.role,
+            User.is_active,
+        ).where(
+            User.user_id == int(payload.user_id),
+            User.is_deleted == False,
+        )
+    )).first()
+
+    if user is None:
+        raise UnauthorizedError("User is not found")
+
+    role = await role_capability_cache.get_role(
+        session=session,
+        role_id=user.role,
+    )
+
+    return Principal(
+        user_id=user.user_id,
+        role_id=user.role,
+        capability_mask=role.capability_mask if role else 0,
+        payload=payload,
+        email=user.email,
+        full_name=user.full_name,
+        is_active=user.is_active,
+    )
+
+
+async def is_user_can(session: AsyncSession, payload: AuthPayload, capabilities: list[str]) -> bool:
     try:
-        # Get user's role
-        user = session.query(User.role).filter(User.user_id == user_id).first()
-        if not user:
-            return False
+        required_mask = capability_registry.get_mask(capabilities)
+
+        # Authorize from token claims, only the role version is checked
+        if payload.capabilities is not None:
+            role = await role_capability_cache.get_role(
+                session=session,
+                role_id=payload.role_id,
+            )
 
-        # Get role capabilities
-        role_capabilities = session.query(RoleCapabilities.capability_id).filter(
-            RoleCapabilities.role_id == user[0],
-        ).all()
+            if role is None or role.version != payload.role_version:
+                raise UnauthorizedError("Token is outdated")
 
-        # Check if the requested capabilities are present
-        capability_ids = [cap[0] for cap in role_capabilities]
-        if not any(cap in capability_ids for cap in capabilities):
+            # Same version, the mask matches the capabilities in the token
+            return bool(role.capability_mask & required_mask)
+
+        # Get user's role
+        role_id = await session.scalar(
+            select(User.role).where(User.user_id == int(payload.user_id))
+        )
+
+        if role_id is None:
             return False
 
-        return True
+        # Check if any requested capability is present with the cached role mask
+        role = await role_capability_cache.get_role(
+            session=session,
+            role_id=role_id,
+        )
+
+        return role is not None and bool(role.capability_mask & required_mask)
     except Exception as e:
         raise e
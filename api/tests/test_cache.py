@@ -0,0 +1,90 @@
+import time
+
+import pytest
+
+from lib import cache
+from lib.cache import TTLCache
+from src.config import app_config
+from src.services.auth import get_signing_key, verified_token_cache, verify_token
+from src.services.jwt_backend import jwt_backend
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(cache.time, "time", lambda: now[0])
+    return now
+
+
+def test_entry_expires(clock):
+    ttl_cache = TTLCache(max_entries=10)
+    ttl_cache.set("a", 1, expires_at=clock[0] + 10)
+
+    assert ttl_cache.get("a") == 1
+
+    clock[0] += 10
+
+    assert ttl_cache.get("a") is None
+    assert ttl_cache.stats()["entries"] == 0
+
+
+def test_least_recently_used_entry_is_evicted(clock):
+    ttl_cache = TTLCache(max_entries=2)
+    ttl_cache.set("a", 1, expires_at=clock[0] + 10)
+    ttl_cache.set("b", 2, expires_at=clock[0] + 10)
+
+    # "a" becomes most recently used
+    ttl_cache.get("a")
+    ttl_cache.set("c", 3, expires_at=clock[0] + 10)
+
+    assert ttl_cache.get("b") is None
+    assert ttl_cache.get("a") == 1
+    assert ttl_cache.get("c") == 3
+    assert ttl_cache.stats()["evictions"] == 1
+
+
+def test_entries_are_evicted_by_size(clock):
+    ttl_cache = TTLCache(max_entries=10, max_bytes=100)
+    ttl_cache.set("a", 1, expires_at=clock[0] + 10, size=60)
+    ttl_cache.set("b", 2, expires_at=clock[0] + 10, size=30)
+    ttl_cache.set("c", 3, expires_at=clock[0] + 10, size=30)
+
+    assert ttl_cache.get("a") is None
+    assert ttl_cache.stats()["bytes"] == 60
+
+
+def test_entry_larger_than_cache_is_not_stored(clock):
+    ttl_cache = TTLCache(max_entries=10, max_bytes=100)
+    ttl_cache.set("a", 1, expires_at=clock[0] + 10, size=10)
+    ttl_cache.set("b", 2, expires_at=clock[0] + 10, size=101)
+
+    assert ttl_cache.get("b") is None
+    assert ttl_cache.get("a") == 1
+
+
+def test_replaced_and_deleted_entries_release_size(clock):
+    ttl_cache = TTLCache(max_entries=10, max_bytes=100)
+    ttl_cache.set("a", 1, expires_at=clock[0] + 10, size=50)
+    ttl_cache.set("a", 2, expires_at=clock[0] + 10, size=20)
+
+    assert ttl_cache.stats()["bytes"] == 20
+
+    ttl_cache.delete("a")
+
+    assert ttl_cache.stats()["bytes"] == 0
+
+
+def test_cached_token_expires_with_leeway(monkeypatch):
+    monkeypatch.setattr(app_config, "JWT_CACHE_ENABLED", True)
+    monkeypatch.setattr(app_config, "JWT_LEEWAY_SECONDS", 30)
+
+    signing_key, headers = get_signing_key()
+    exp = int(time.time()) - 10
+    token = jwt_backend.encode({"sub": "1", "exp": exp}, signing_key, algorithm=app_config.JWT_ALGORITHM, headers=headers)
+
+    assert verify_token(token).exp == exp
+
+    # Served from cache while the token is within the leeway
+    hits = verified_token_cache.hits
+    assert verify_token(token).exp == exp
+    assert verified_token_cache.hits == hits + 1
@@ -0,0 +1,37 @@
+import pytest
+
+from src.services import capability_registry as capability_registry_module
+from src.services.capability_registry import MAX_CAPABILITY_BITS, CapabilityRegistry
+
+
+def use_capabilities(monkeypatch, modules):
+    monkeypatch.setattr(capability_registry_module, "get_all_role_capabilities", lambda: modules)
+
+
+def test_duplicate_capability_is_rejected(monkeypatch):
+    use_capabilities(monkeypatch, [
+        {"module_id": "role", "capabilities": [{"id": "read_role"}, {"id": "shared"}]},
+        {"module_id": "sandbox", "capabilities": [{"id": "shared"}]},
+    ])
+
+    with pytest.raises(RuntimeError, match=r"more than once: shared \(role, sandbox\)"):
+        CapabilityRegistry().check_duplicates()
+
+
+def test_unique_capabilities_are_accepted(monkeypatch):
+    use_capabilities(monkeypatch, [
+        {"module_id": "role", "capabilities": [{"id": "read_role"}]},
+        {"module_id": "sandbox", "capabilities": [{"id": "read_sandbox"}]},
+    ])
+
+    CapabilityRegistry().check_duplicates()
+
+
+def test_capacity_counts_only_new_capabilities():
+    assigned_bits = {f"c{bit}": bit for bit in range(MAX_CAPABILITY_BITS - 1)}
+    registry = CapabilityRegistry()
+
+    registry.check_capacity(assigned_bits=assigned_bits, registered_ids=[*assigned_bits, "new"])
+
+    with pytest.raises(RuntimeError, match=f"Maximum {MAX_CAPABILITY_BITS} capabilities"):
+        registry.check_capacity(assigned_bits=assigned_bits, registered_ids=[*assigned_bits, "new", "newer"])
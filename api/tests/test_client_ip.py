@@ -0,0 +1,54 @@
+import pytest
+
+from lib.client_ip import is_in_networks, parse_networks, resolve_client_ip
+
+
+TRUSTED = parse_networks("10.0.0.0/8, 127.0.0.1")
+
+
+def test_parse_networks():
+    assert [str(network) for network in parse_networks(" 10.0.0.1/8,,::1 ")] == ["10.0.0.0/8", "::1/128"]
+
+
+def test_is_in_networks():
+    assert is_in_networks("10.1.2.3", TRUSTED)
+    assert not is_in_networks("11.1.2.3", TRUSTED)
+    assert not is_in_networks("not-an-ip", TRUSTED)
+
+
+def test_trusted_proxy_chain_resolves_first_untrusted_hop():
+    # Client 1.2.3.4, then two trusted proxies
+    assert resolve_client_ip("127.0.0.1", "1.2.3.4, 10.0.0.2", TRUSTED) == "1.2.3.4"
+
+
+def test_hops_left_of_client_are_ignored():
+    # 9.9.9.9 was sent by the client itself
+    assert resolve_client_ip("10.0.0.1", "9.9.9.9, 1.2.3.4", TRUSTED) == "1.2.3.4"
+
+
+def test_spoofed_header_from_untrusted_peer_is_ignored():
+    assert resolve_client_ip("5.6.7.8", "1.2.3.4", TRUSTED) == "5.6.7.8"
+
+
+def test_no_trusted_proxies_uses_peer():
+    assert resolve_client_ip("10.0.0.1", "1.2.3.4", []) == "10.0.0.1"
+
+
+@pytest.mark.parametrize("forwarded_for, expected", [
+    ("1.2.3.4, garbage", "10.0.0.1"),
+    ("garbage, 1.2.3.4", "1.2.3.4"),
+    ("1.2.3.4, , 10.0.0.2", "10.0.0.2"),
+    ("", "10.0.0.1"),
+    (None, "10.0.0.1"),
+])
+def test_malformed_hops(forwarded_for, expected):
+    # A malformed hop stops the walk at the last address reported by a trusted proxy
+    assert resolve_client_ip("10.0.0.1", forwarded_for, TRUSTED) == expected
+
+
+def test_all_hops_trusted_resolves_leftmost():
+    assert resolve_client_ip("10.0.0.1", "10.0.0.3, 10.0.0.2", TRUSTED) == "10.0.0.3"
+
+
+def test_missing_peer():
+    assert resolve_client_ip(None, "1.2.3.4", TRUSTED) is None
@@ -0,0 +1,86 @@
+import asyncio
+
+import pytest
+
+from src.config import app_config
+from src.services import hashers
+from src.services.auth import verify_password
+from src.services.hashers import (
+    Argon2Hasher,
+    BcryptHasher,
+    ScryptHasher,
+    identify_hasher,
+    needs_rehash,
+)
+
+
+# Cheap costs, the format is what matters here
+BCRYPT = BcryptHasher(rounds=4)
+SCRYPT = ScryptHasher(log_n=4, r=8, p=1)
+
+
+@pytest.fixture
+def default_hasher(monkeypatch):
+    def use(hasher):
+        monkeypatch.setitem(hashers.password_hashers, hasher.name, hasher)
+        monkeypatch.setattr(app_config, "PASSWORD_HASHER", hasher.name)
+
+    return use
+
+
+@pytest.mark.parametrize("hashed_password, name", [
+    ("$2b$12$abcdefghijklmnopqrstuu", "bcrypt"),
+    ("$2a$12$abcdefghijklmnopqrstuu", "bcrypt"),
+    ("$2y$12$abcdefghijklmnopqrstuu", "bcrypt"),
+    ("$scrypt$ln=15,r=8,p=1$c2FsdA$ZGlnZXN0", "scrypt"),
+    ("$argon2id$v=19$m=65536,t=3,p=1$c2FsdA$ZGlnZXN0", "argon2id"),
+])
+def test_identify_hasher(hashed_password, name):
+    assert identify_hasher(hashed_password).name == name
+
+
+@pytest.mark.parametrize("hashed_password", ["", "plain", "$1$md5crypt", "$pbkdf2$x"])
+def test_identify_hasher_rejects_unknown_format(hashed_password):
+    with pytest.raises(ValueError):
+        identify_hasher(hashed_password)
+
+
+def test_bcrypt_needs_rehash(default_hasher):
+    default_hasher(BCRYPT)
+    hashed_password = BCRYPT.hash("secret")
+
+    assert not needs_rehash(hashed_password)
+    assert needs_rehash(BcryptHasher(rounds=5).hash("secret"))
+    assert needs_rehash(hashed_password.replace("$2b$", "$2a$", 1))
+    assert needs_rehash(SCRYPT.hash("secret"))
+
+
+def test_scrypt_needs_rehash(default_hasher):
+    default_hasher(SCRYPT)
+    hashed_password = SCRYPT.hash("secret")
+
+    assert not needs_rehash(hashed_password)
+    assert needs_rehash(ScryptHasher(log_n=5, r=8, p=1).hash("secret"))
+    assert needs_rehash(BCRYPT.hash("secret"))
+    assert SCRYPT.verify("secret", hashed_password)
+    assert not SCRYPT.verify("wrong", hashed_password)
+
+
+def test_argon2id_needs_rehash(default_hasher):
+    pytest.importorskip("argon2")
+
+    argon2id = Argon2Hasher(time_cost=1, memory_cost=1024, parallelism=1)
+    default_hasher(argon2id)
+    hashed_password = argon2id.hash("secret")
+
+    assert identify_hasher(hashed_password) is argon2id
+    assert not needs_rehash(hashed_password)
+    assert needs_rehash(Argon2Hasher(time_cost=2, memory_cost=1024, parallelism=1).hash("secret"))
+    assert needs_rehash(BCRYPT.hash("secret"))
+
+
+@pytest.mark.parametrize("hashed_password", ["plain", "$scrypt$broken"])
+def test_malformed_stored_hash_is_a_wrong_password(monkeypatch, hashed_password):
+    monkeypatch.setattr("src.services.auth.hashing_engine.enabled", False)
+
+    assert asyncio.run(verify_password(password="secret", hashed_password=hashed_password)) is False
@@ -0,0 +1,41 @@
+import hashlib
+import hmac
+
+import pytest
+
+from src.error import InvalidTokenError
+from src.services.jwt_backend import BuiltinHS256Backend, b64url_encode
+
+
+SECRET = "secret"
+
+
+@pytest.mark.parametrize("token", [
+    "W10.e30.sig",
+    "e30.W10.sig",
+    "bnVsbA.e30.sig",
+    "not-base64!.e30.sig",
+    "e30.e30.é",
+    "é.e30.sig",
+    "e30.e30",
+    "",
+])
+def test_builtin_decode_rejects_malformed_token(token):
+    with pytest.raises(InvalidTokenError):
+        BuiltinHS256Backend().decode(token, SECRET, "HS256")
+
+
+def test_builtin_decode_rejects_non_object_payload():
+    # Correctly signed, but the payload is a JSON list
+    signing_input = b64url_encode(b'{"alg":"HS256"}') + "." + b64url_encode(b"[]")
+    signature = hmac.new(SECRET.encode(), signing_input.encode(), hashlib.sha256).digest()
+
+    with pytest.raises(InvalidTokenError):
+        BuiltinHS256Backend().decode(f"{signing_input}.{b64url_encode(signature)}", SECRET, "HS256")
+
+
+def test_builtin_roundtrip():
+    backend = BuiltinHS256Backend()
+    token = backend.encode({"sub": "1"}, SECRET, "HS256")
+
+    assert backend.decode(token, SECRET, "HS256") == {"sub": "1"}
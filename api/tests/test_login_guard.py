@@ -0,0 +1,42 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from src.config import app_config
+from src.error import TooManyRequestsError
+from src.services import login_guard as login_guard_module
+from src.services.login_guard import LoginGuard
+
+
+def test_block_is_published_once_per_key_without_waiting(monkeypatch):
+    published = []
+    release = threading.Event()
+
+    def notify_event(event):
+        # A slow database must not delay the login request
+        release.wait(5)
+        published.append(event)
+
+    monkeypatch.setattr(login_guard_module, "notify_event", notify_event)
+    monkeypatch.setattr(app_config, "LOGIN_GUARD_ENABLED", True)
+    monkeypatch.setattr(app_config, "LOGIN_GUARD_SHARED", True)
+
+    guard = LoginGuard()
+
+    async def attempt():
+        await guard.check(ip="1.2.3.4", email="user@example.ai")
+
+    with pytest.raises(TooManyRequestsError):
+        for _ in range(app_config.LOGIN_GUARD_EMAIL_CAPACITY + 10):
+            asyncio.run(attempt())
+
+    release.set()
+
+    for _ in range(50):
+        if guard.stats()["pending_blocks"] == 0 and published:
+            break
+        time.sleep(0.01)
+
+    assert [(event["scope"], event["key"]) for event in published] == [("email", "user@example.ai")]
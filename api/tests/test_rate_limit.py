@@ -0,0 +1,72 @@
+import pytest
+
+from lib import rate_limit
+from lib.rate_limit import TokenBucketLimiter
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(rate_limit.time, "time", lambda: now[0])
+    return now
+
+
+def test_bucket_allows_capacity_then_waits(clock):
+    limiter = TokenBucketLimiter(capacity=3, refill_per_second=1, max_entries=10)
+
+    assert limiter.get_wait("a") == 0
+    assert limiter.consume("a") == 0
+    assert limiter.consume("a") == 0
+    assert limiter.consume("a") == pytest.approx(1)
+    assert limiter.get_wait("a") == pytest.approx(1)
+    assert limiter.get_wait("b") == 0
+
+
+def test_bucket_refills_up_to_capacity(clock):
+    limiter = TokenBucketLimiter(capacity=2, refill_per_second=0.5, max_entries=10)
+
+    limiter.consume("a")
+    limiter.consume("a")
+    assert limiter.get_wait("a") == pytest.approx(2)
+
+    clock[0] += 1
+    assert limiter.get_wait("a") == pytest.approx(1)
+
+    clock[0] += 1
+    assert limiter.get_wait("a") == 0
+
+    # Idle time never refills above capacity
+    clock[0] += 100
+    limiter.consume("a")
+    assert limiter.consume("a") == pytest.approx(2)
+
+
+def test_block_delays_next_token(clock):
+    limiter = TokenBucketLimiter(capacity=5, refill_per_second=1, max_entries=10)
+
+    limiter.block("a", until=clock[0] + 30)
+    assert limiter.get_wait("a") == pytest.approx(30)
+
+    clock[0] += 30
+    assert limiter.get_wait("a") == 0
+
+
+def test_block_never_shortens_existing_wait(clock):
+    limiter = TokenBucketLimiter(capacity=1, refill_per_second=0.1, max_entries=10)
+
+    limiter.consume("a")
+    limiter.block("a", until=clock[0] + 1)
+
+    assert limiter.get_wait("a") == pytest.approx(10)
+
+
+def test_least_recently_used_bucket_is_evicted(clock):
+    limiter = TokenBucketLimiter(capacity=1, refill_per_second=1, max_entries=2)
+
+    limiter.consume("a")
+    limiter.consume("b")
+    limiter.consume("c")
+
+    assert limiter.get_wait("a") == 0
+    assert limiter.get_wait("c") > 0
+    assert limiter.stats()["evictions"] == 1
@@ -0,0 +1,64 @@
+import threading
+
+import pytest
+
+from src.services import reaper
+from src.services.reaper import TokenReaper, reap_expired_tokens
+
+
+def test_reaper_runs_first_pass_on_start(monkeypatch):
+    ran = threading.Event()
+
+    def reap():
+        ran.set()
+        return {"deleted_count": 0}
+
+    monkeypatch.setattr(reaper, "reap_expired_tokens", reap)
+
+    token_reaper = TokenReaper(interval=3600)
+    token_reaper.start()
+
+    try:
+        assert ran.wait(5)
+    finally:
+        token_reaper.stop()
+
+    assert token_reaper.stats()["last_run"]["deleted_count"] == 0
+
+
+class BrokenConnection:
+    """Connection lost while reaping, every later call fails too"""
+
+    invalidated = False
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        return False
+
+    def scalar(self, *args, **kwargs):
+        return True
+
+    def commit(self):
+        pass
+
+    def rollback(self):
+        raise ConnectionError("connection closed")
+
+    def execute(self, *args, **kwargs):
+        raise RuntimeError("server closed the connection unexpectedly")
+
+    def invalidate(self):
+        self.invalidated = True
+
+
+def test_lock_release_error_keeps_original_error(monkeypatch):
+    connection = BrokenConnection()
+    monkeypatch.setattr(reaper.engine, "connect", lambda: connection)
+    monkeypatch.setattr(reaper, "is_auth_tokens_partitioned", lambda connection: False)
+
+    with pytest.raises(RuntimeError, match="server closed"):
+        reap_expired_tokens()
+
+    assert connection.invalidated
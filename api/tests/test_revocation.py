@@ -0,0 +1,115 @@
+import datetime
+import time
+import uuid
+
+import pytest
+
+from sqlalchemy import delete, select, update
+
+from src.db import engine
+from src.models.auth import AuthPayload
+from src.repository import User, RevokedToken
+from src.services import revocation
+from src.services.revocation import (
+    EVENT_REVOKE_JTI,
+    EVENT_USER_EPOCH,
+    RevocationStore,
+    apply_revocation_event,
+    load_revoked_jtis,
+    load_user_epochs,
+)
+
+
+@pytest.fixture
+def store(monkeypatch):
+    store = RevocationStore()
+    monkeypatch.setattr(revocation, "revocation_store", store)
+    return store
+
+
+def test_token_of_older_epoch_is_revoked(store):
+    store.set_user_epoch(user_id=1, epoch=2)
+
+    assert store.is_revoked(AuthPayload(user_id="1", epoch=1))
+    assert not store.is_revoked(AuthPayload(user_id="1", epoch=2))
+    assert not store.is_revoked(AuthPayload(user_id="2", epoch=0))
+
+
+def test_token_without_epoch_is_revoked_after_epoch_bump(store):
+    assert not store.is_revoked(AuthPayload(user_id="1"))
+
+    store.set_user_epoch(user_id=1, epoch=1)
+
+    assert store.is_revoked(AuthPayload(user_id="1"))
+
+
+def test_older_epoch_never_replaces_newer(store):
+    store.set_user_epoch(user_id=1, epoch=3)
+    store.set_user_epoch(user_id=1, epoch=2)
+
+    assert store.get_user_epoch(user_id=1) == 3
+
+
+def test_revoked_jti(store):
+    store.revoke_jti(jti="a", expires_at=int(time.time()) + 60)
+
+    assert store.is_revoked(AuthPayload(user_id="1", jti="a"))
+    assert not store.is_revoked(AuthPayload(user_id="1", jti="b"))
+    assert not store.is_revoked(AuthPayload(user_id="1"))
+
+
+def test_expired_jti_is_not_stored(store):
+    store.revoke_jti(jti="a", expires_at=int(time.time()) - 1)
+    store.revoke_jti(jti="", expires_at=int(time.time()) + 60)
+
+    assert store.stats()["revoked_jtis"] == 0
+
+
+def test_expired_jti_is_pruned(monkeypatch):
+    store = RevocationStore(prune_interval=0)
+    now = time.time()
+
+    store.revoke_jti(jti="a", expires_at=now + 10)
+    store.revoke_jti(jti="b", expires_at=now + 100)
+
+    # Pruned on next revoke once "a" expired
+    monkeypatch.setattr(revocation.time, "time", lambda: now + 50)
+    store.revoke_jti(jti="c", expires_at=now + 100)
+
+    assert not store.is_revoked(AuthPayload(user_id="1", jti="a"))
+    assert store.is_revoked(AuthPayload(user_id="1", jti="b"))
+    assert store.stats()["revoked_jtis"] == 2
+
+
+def test_apply_revocation_event(store):
+    apply_revocation_event({"type": EVENT_USER_EPOCH, "user_id": 1, "epoch": 1})
+    apply_revocation_event({"type": EVENT_REVOKE_JTI, "jti": "a", "exp": int(time.time()) + 60})
+
+    assert store.is_revoked(AuthPayload(user_id="1", epoch=0))
+    assert store.is_revoked(AuthPayload(user_id="2", jti="a"))
+
+
+def test_revocation_survives_restart(store):
+    jti = uuid.uuid4().hex
+    expires_at = datetime.datetime.now(datetime.timezone.utc) + datetime.timedelta(minutes=5)
+
+    with engine.begin() as connection:
+        user_id, epoch = connection.execute(
+            select(User.user_id, User.token_epoch).order_by(User.user_id).limit(1)
+        ).one()
+
+        connection.execute(update(User).where(User.user_id == user_id).values(token_epoch=epoch + 1))
+        connection.execute(RevokedToken.__table__.insert().values(jti=jti, expires_at=expires_at))
+
+    try:
+        # Fresh store of a restarted worker, loaded on startup
+        load_user_epochs()
+        load_revoked_jtis()
+
+        assert store.is_revoked(AuthPayload(user_id=str(user_id), epoch=epoch))
+        assert store.is_revoked(AuthPayload(user_id=str(user_id), epoch=epoch + 1, jti=jti))
+        assert not store.is_revoked(AuthPayload(user_id=str(user_id), epoch=epoch + 1))
+    finally:
+        with engine.begin() as connection:
+            connection.execute(update(User).where(User.user_id == user_id).values(token_epoch=epoch))
+            connection.execute(delete(RevokedToken).where(RevokedToken.jti == jti))